@@ -0,0 +1,123 @@
+"""Process-wide registry of boto3 clients.
+
+Building a ``boto3`` session and client walks the credential chain and loads
+endpoint/service models, which costs tens of milliseconds. Clients are
+thread-safe once built (sessions are not), so one client per service, region
+and endpoint is shared by every thread in the process.
+
+Clients are rebuilt when the configured credentials change, after
+``AWS_CLIENT_MAX_AGE`` seconds (to pick up rotated credentials from the default
+chain), and in a forked child, where the parent's connection pool must not be
+reused.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+
+
+@dataclass(frozen=True)
+class _Entry:
+    client: Any
+    fingerprint: str
+    created_at: float
+
+
+_lock = threading.Lock()
+_clients: dict[tuple[str, str | None, str | None], _Entry] = {}
+_pid = os.getpid()
+
+
+def reset_clients() -> None:
+    """Drop every cached client; the next ``get_client`` call builds fresh ones."""
+
+    global _pid
+    with _lock:
+        _clients.clear()
+        _pid = os.getpid()
+
+
+def _after_fork_in_child() -> None:
+    # The lock may have been held by another thread at fork time.
+    global _lock
+    _lock = threading.Lock()
+    reset_clients()
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch - POSIX only
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _session_kwargs() -> dict[str, str]:
+    kwargs: dict[str, str] = {}
+    access_key = getattr(settings, "AWS_ACCESS_KEY_ID", None)
+    secret_key = getattr(settings, "AWS_SECRET_ACCESS_KEY", None)
+    session_token = getattr(settings, "AWS_SESSION_TOKEN", None)
+    if access_key and secret_key:
+        kwargs["aws_access_key_id"] = access_key
+        kwargs["aws_secret_access_key"] = secret_key
+    if session_token:
+        kwargs["aws_session_token"] = session_token
+    return kwargs
+
+
+def _fingerprint(kwargs: dict[str, str]) -> str:
+    raw = "\0".join(f"{key}={value}" for key, value in sorted(kwargs.items()))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_client(
+    service: str, *, region_name: str | None = None, endpoint_url: str | None = None
+) -> Any:
+    """Return the shared boto3 client for ``service``, building it on first use."""
+
+    if os.getpid() != _pid:
+        # Fork hooks do not run for every process model; double-check cheaply.
+        reset_clients()
+
+    region = region_name or getattr(settings, "AWS_DEFAULT_REGION", "") or None
+    endpoint = endpoint_url or None
+    key = (service, region, endpoint)
+    kwargs = _session_kwargs()
+    fingerprint = _fingerprint(kwargs)
+    max_age = float(getattr(settings, "AWS_CLIENT_MAX_AGE", 3600))
+
+    entry = _clients.get(key)
+    if (
+        entry
+        and entry.fingerprint == fingerprint
+        and time.monotonic() - entry.created_at < max_age
+    ):
+        return entry.client
+
+    with _lock:
+        entry = _clients.get(key)
+        now = time.monotonic()
+        if (
+            entry
+            and entry.fingerprint == fingerprint
+            and now - entry.created_at < max_age
+        ):
+            return entry.client
+        session = boto3.session.Session(**kwargs)
+        client = session.client(
+            service,
+            region_name=region,
+            endpoint_url=endpoint,
+            config=Config(
+                max_pool_connections=int(
+                    getattr(settings, "AWS_MAX_POOL_CONNECTIONS", 10)
+                )
+            ),
+        )
+        _clients[key] = _Entry(client=client, fingerprint=fingerprint, created_at=now)
+        return client
@@ -0,0 +1,82 @@
+"""Conditional GET (ETag / Last-Modified) for public pages.
+
+Views mixing in ``ConditionalGetMixin`` describe their content with values they
+can read cheaply (timestamps, version tokens) in ``get_validators``. A request
+carrying a matching ``If-None-Match`` or ``If-Modified-Since`` gets a 304
+before any template is rendered; other responses carry the validators.
+
+Only anonymous requests without pending flash messages are handled: signed-in
+pages are personalised, and a 304 would swallow a message.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def build_etag(*parts: Any) -> str:
+    raw = "\0".join(
+        str(part.isoformat() if isinstance(part, datetime) else part) for part in parts
+    )
+    salt = getattr(settings, "RELEASE_VERSION", "")
+    return quote_etag(hashlib.sha1(f"{salt}\0{raw}".encode("utf-8")).hexdigest())
+
+
+def latest(*values: datetime | None) -> datetime | None:
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+
+def _is_conditional_request(request: HttpRequest) -> bool:
+    if request.method not in ("GET", "HEAD"):
+        return False
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return False
+    storage = getattr(request, "_messages", None)
+    return not (storage is not None and len(storage))
+
+
+class ConditionalGetMixin:
+    """Answer conditional GETs for anonymous visitors without rendering the page."""
+
+    def get_validators(self) -> tuple[Iterable[Any], datetime | None]:
+        """Return ``(etag_parts, last_modified)`` describing the current content."""
+
+        raise NotImplementedError
+
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if not _is_conditional_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        parts, last_modified = self.get_validators()
+        validators = HttpResponse()
+        validators["ETag"] = build_etag(type(self).__name__, *parts)
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        if last_modified_ts is not None:
+            validators["Last-Modified"] = http_date(last_modified_ts)
+        # Pages embed a CSRF token, so only the visitor's own cache may keep them, and must revalidate.
+        patch_cache_control(validators, private=True, no_cache=True)
+
+        conditional = get_conditional_response(
+            request,
+            etag=validators["ETag"],
+            last_modified=last_modified_ts,
+            response=validators,
+        )
+        if conditional is not validators:
+            return conditional
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            for header in ("ETag", "Last-Modified", "Cache-Control"):
+                if header in validators and header not in response:
+                    response[header] = validators[header]
+        return response
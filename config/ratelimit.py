@@ -0,0 +1,226 @@
+"""Atomic rate limiting for public write endpoints.
+
+Two algorithms are available:
+
+* ``fixed`` – one counter per window, incremented atomically. Cheap, but a
+  burst straddling a window boundary can reach twice the limit.
+* ``sliding`` – a log of hit timestamps; a hit is allowed while fewer than
+  ``limit`` hits fall inside the trailing window.
+
+The ``locmem`` backend keeps state in this process (fine for development and
+single-process deployments). The ``redis`` backend shares state across every
+web process via ``REDIS_URL``; each check is a single atomic Lua call. Backend
+errors fail open so an unavailable Redis never blocks legitimate users.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ("fixed", "sliding")
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$")
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after: int
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Parse ``"<count>/<period>"`` (e.g. ``"5/m"``, ``"20/1h"``) into ``(limit, window_seconds)``."""
+
+    match = _RATE_RE.match(rate or "")
+    if not match:
+        raise ImproperlyConfigured(
+            f"Invalid rate limit {rate!r}; expected e.g. '5/m' or '20/1h'."
+        )
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * _PERIODS[unit]
+
+
+class LocMemRateLimitBackend:
+    """Process-local limiter guarded by a single lock."""
+
+    # Sweep idle keys every this many checks so the tables cannot grow without bound.
+    sweep_interval = 1000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._windows: dict[str, tuple[int, int]] = {}
+        self._logs: dict[str, deque[float]] = {}
+        self._expiry: dict[str, float] = {}
+        self._checks = 0
+
+    def hit(self, key: str, limit: int, window: int, algorithm: str) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            self._checks += 1
+            if self._checks % self.sweep_interval == 0:
+                self._sweep(now)
+            self._expiry[key] = now + window
+            if algorithm == "fixed":
+                return self._fixed(key, limit, window, now)
+            return self._sliding(key, limit, window, now)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._windows.clear()
+            self._logs.clear()
+            self._expiry.clear()
+
+    def _fixed(self, key: str, limit: int, window: int, now: float) -> RateLimitResult:
+        index = int(now // window)
+        current_index, count = self._windows.get(key, (index, 0))
+        if current_index != index:
+            count = 0
+        retry_after = max(int((index + 1) * window - now), 1)
+        if count >= limit:
+            self._windows[key] = (index, count)
+            return RateLimitResult(False, 0, retry_after)
+        self._windows[key] = (index, count + 1)
+        return RateLimitResult(True, limit - count - 1, 0)
+
+    def _sliding(
+        self, key: str, limit: int, window: int, now: float
+    ) -> RateLimitResult:
+        log = self._logs.setdefault(key, deque())
+        while log and log[0] <= now - window:
+            log.popleft()
+        if len(log) >= limit:
+            return RateLimitResult(False, 0, max(int(log[0] + window - now + 1), 1))
+        log.append(now)
+        return RateLimitResult(True, limit - len(log), 0)
+
+    def _sweep(self, now: float) -> None:
+        for key in [
+            key for key, expires_at in self._expiry.items() if expires_at <= now
+        ]:
+            self._expiry.pop(key, None)
+            self._windows.pop(key, None)
+            self._logs.pop(key, None)
+
+
+class RedisRateLimitBackend:
+    """Limiter shared across processes; one atomic script call per check."""
+
+    FIXED_SCRIPT = """
+        local count = redis.call('INCR', KEYS[1])
+        if count == 1 then
+            redis.call('PEXPIRE', KEYS[1], ARGV[1])
+        end
+        return {count, redis.call('PTTL', KEYS[1])}
+    """
+    SLIDING_SCRIPT = """
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+        local window = tonumber(ARGV[1])
+        local limit = tonumber(ARGV[2])
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+        local count = redis.call('ZCARD', KEYS[1])
+        if count < limit then
+            redis.call('ZADD', KEYS[1], now, ARGV[3])
+            redis.call('PEXPIRE', KEYS[1], window)
+            return {1, count + 1, 0}
+        end
+        local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+        return {0, count, tonumber(oldest[2]) + window - now}
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit") -> None:
+        import redis
+
+        self.client = redis.Redis.from_url(
+            url, socket_timeout=0.25, socket_connect_timeout=0.25
+        )
+        self.prefix = prefix
+        self._fixed = self.client.register_script(self.FIXED_SCRIPT)
+        self._sliding = self.client.register_script(self.SLIDING_SCRIPT)
+
+    def hit(self, key: str, limit: int, window: int, algorithm: str) -> RateLimitResult:
+        window_ms = window * 1000
+        if algorithm == "fixed":
+            index = int(time.time() // window)
+            count, ttl_ms = self._fixed(
+                keys=[f"{self.prefix}:f:{key}:{index}"], args=[window_ms]
+            )
+            if int(count) > limit:
+                return RateLimitResult(False, 0, max(int(ttl_ms) // 1000 + 1, 1))
+            return RateLimitResult(True, limit - int(count), 0)
+        allowed, count, wait_ms = self._sliding(
+            keys=[f"{self.prefix}:s:{key}"],
+            args=[window_ms, limit, uuid.uuid4().hex],
+        )
+        if not int(allowed):
+            return RateLimitResult(False, 0, max(int(wait_ms) // 1000 + 1, 1))
+        return RateLimitResult(True, limit - int(count), 0)
+
+    def reset(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+
+@lru_cache(maxsize=None)
+def _build_backend(name: str, url: str) -> Any:
+    if name == "locmem":
+        return LocMemRateLimitBackend()
+    if name == "redis":
+        return RedisRateLimitBackend(url)
+    raise ImproperlyConfigured(
+        f"Unknown RATE_LIMIT_BACKEND {name!r}; use 'locmem' or 'redis'."
+    )
+
+
+def get_backend() -> Any:
+    name = getattr(settings, "RATE_LIMIT_BACKEND", "locmem")
+    url = getattr(settings, "REDIS_URL", "") if name == "redis" else ""
+    return _build_backend(name, url)
+
+
+def hit(
+    scope: str, identity: Any, *, limit: int, window: int, algorithm: str = "sliding"
+) -> RateLimitResult:
+    """Record one attempt for ``identity`` within ``scope`` and report whether it is allowed.
+
+    Counting and checking happen in one atomic step. A non-positive ``limit``
+    disables the check.
+    """
+
+    if limit <= 0 or window <= 0:
+        return RateLimitResult(True, max(limit, 0), 0)
+    if algorithm not in ALGORITHMS:
+        raise ImproperlyConfigured(f"Unknown rate limit algorithm {algorithm!r}.")
+    key = f"{scope}:{identity}"
+    try:
+        return get_backend().hit(key, limit, window, algorithm)
+    except ImproperlyConfigured:
+        raise
+    except Exception as exc:  # pragma: no cover - backend availability differs per env
+        logger.warning(
+            "Rate limit backend unavailable; allowing %s", scope, exc_info=exc
+        )
+        return RateLimitResult(True, limit, 0)
+
+
+def hit_rate(
+    scope: str, identity: Any, rate: str, *, algorithm: str = "sliding"
+) -> RateLimitResult:
+    """``hit`` with the limit and window given as a rate string such as ``"20/1h"``."""
+
+    limit, window = parse_rate(rate)
+    return hit(scope, identity, limit=limit, window=window, algorithm=algorithm)
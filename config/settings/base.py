@@ -86,7 +86,9 @@ DATABASES = {
 }
 
 AUTH_PASSWORD_VALIDATORS = [
-    {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"
+    },
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
     {"NAME": "django.contrib.auth.password_validation.CommonPasswordValidator"},
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
@@ -107,6 +109,9 @@ AWS_ACCESS_KEY_ID = env("AWS_ACCESS_KEY_ID", default="")
 AWS_SECRET_ACCESS_KEY = env("AWS_SECRET_ACCESS_KEY", default="")
 AWS_SESSION_TOKEN = env("AWS_SESSION_TOKEN", default="")
 AWS_DEFAULT_REGION = env("AWS_DEFAULT_REGION", default="")
+# Shared boto3 clients (config.aws) are rebuilt after this many seconds to pick up rotated credentials.
+AWS_CLIENT_MAX_AGE = env.int("AWS_CLIENT_MAX_AGE", default=3600)
+AWS_MAX_POOL_CONNECTIONS = env.int("AWS_MAX_POOL_CONNECTIONS", default=10)
 AWS_STORAGE_BUCKET_NAME = env("AWS_STORAGE_BUCKET_NAME", default="")
 AWS_S3_CUSTOM_DOMAIN = env("AWS_S3_CUSTOM_DOMAIN", default="")
 AWS_S3_SIGNATURE_VERSION = env("AWS_S3_SIGNATURE_VERSION", default="s3v4")
@@ -133,7 +138,9 @@ if USE_S3_MEDIA:
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "accounts.User"
 
-DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default="EV Marketplace <no-reply@example.com>")
+DEFAULT_FROM_EMAIL = env(
+    "DEFAULT_FROM_EMAIL", default="EV Marketplace <no-reply@example.com>"
+)
 SERVER_EMAIL = env("SERVER_EMAIL", default=DEFAULT_FROM_EMAIL)
 EMAIL_BACKEND = env(
     "DJANGO_EMAIL_BACKEND",
@@ -141,15 +148,94 @@ EMAIL_BACKEND = env(
 )
 
 SITE_BASE_URL = env("SITE_BASE_URL", default="")
+# Identifies the deployed build; mixed into page ETags so a release with new templates revalidates.
+RELEASE_VERSION = env("RELEASE_VERSION", default="")
+# Guides: pre-rendered by `manage.py collectguides`; with auto-reload off each file is stat()ed once per process.
+GUIDES_PRECOMPILED_PATH = env(
+    "GUIDES_PRECOMPILED_PATH", default=str(BASE_DIR / "var" / "guides.json")
+)
+GUIDES_AUTO_RELOAD = env.bool("GUIDES_AUTO_RELOAD", default=False)
 FEATURE_SAVED_SEARCHES = env.bool("FEATURE_SAVED_SEARCHES", default=False)
 FEATURE_WATCHLISTS = env.bool("FEATURE_WATCHLISTS", default=False)
 SES_ENABLED = env.bool("SES_ENABLED", default=False)
 SES_VERIFIED_FROM_EMAIL = env("SES_VERIFIED_FROM_EMAIL", default="")
+# Rate limits (config.ratelimit): "locmem" counts per process, "redis" shares counters through REDIS_URL.
+RATE_LIMIT_BACKEND = env("RATE_LIMIT_BACKEND", default="locmem")
 INQUIRY_RATE_LIMIT_PER_MINUTE = env.int("INQUIRY_RATE_LIMIT_PER_MINUTE", default=5)
+SAVED_SEARCH_RATE_LIMIT = env("SAVED_SEARCH_RATE_LIMIT", default="20/1h")
+PHOTO_UPLOAD_RATE_LIMIT = env("PHOTO_UPLOAD_RATE_LIMIT", default="60/1h")
+# Saved-search alerts: at most one digest per user per window, sent in batches of users.
+SAVED_SEARCH_DIGEST_WINDOW = env.int("SAVED_SEARCH_DIGEST_WINDOW", default=3600)
+SAVED_SEARCH_DIGEST_BATCH_SIZE = env.int("SAVED_SEARCH_DIGEST_BATCH_SIZE", default=100)
+# Inquiry emails go through an outbox; failed sends retry with exponential backoff from this delay.
+INQUIRY_DELIVERY_MAX_ATTEMPTS = env.int("INQUIRY_DELIVERY_MAX_ATTEMPTS", default=5)
+INQUIRY_DELIVERY_RETRY_DELAY = env.int("INQUIRY_DELIVERY_RETRY_DELAY", default=30)
+INQUIRY_DELIVERY_LEASE_SECONDS = env.int("INQUIRY_DELIVERY_LEASE_SECONDS", default=300)
 CAPTCHA_PROVIDER = env("CAPTCHA_PROVIDER", default="none")
 CAPTCHA_SITE_KEY = env("CAPTCHA_SITE_KEY", default="")
 CAPTCHA_SECRET_KEY = env("CAPTCHA_SECRET_KEY", default="")
 ENABLE_ANALYTICS = env.bool("ENABLE_ANALYTICS", default=False)
+# "auto" picks Postgres tsvector or SQLite FTS5 from the database vendor; or a dotted backend path.
+LISTING_SEARCH_BACKEND = env("LISTING_SEARCH_BACKEND", default="auto")
+# "page" keeps Django's Paginator; "cursor" switches the catalogue to keyset pagination.
+LISTING_PAGINATION = env("LISTING_PAGINATION", default="page")
+# In cursor mode, pages 1..N stay reachable as ?page=N (0 = only the first page).
+LISTING_CLASSIC_PAGE_LIMIT = env.int("LISTING_CLASSIC_PAGE_LIMIT", default=0)
+LISTING_APPROXIMATE_COUNT_LIMIT = env.int(
+    "LISTING_APPROXIMATE_COUNT_LIMIT", default=1000
+)
+# Responsive photo derivatives: each width is rendered in every format (plus a JPEG fallback).
+LISTING_PHOTO_WIDTHS = env.list(
+    "LISTING_PHOTO_WIDTHS", cast=int, default=[320, 640, 960, 1280]
+)
+LISTING_PHOTO_FORMATS = env.list(
+    "LISTING_PHOTO_FORMATS", default=["avif", "webp", "jpeg"]
+)
+# Photos whose perceptual hashes differ in at most this many of 64 bits (capped at 16) are reported as near-duplicates.
+PHOTO_DUPLICATE_DISTANCE = env.int("PHOTO_DUPLICATE_DISTANCE", default=6)
+LISTING_FACET_CACHE_TIMEOUT = env.int("LISTING_FACET_CACHE_TIMEOUT", default=300)
+# Detail-page fragments are invalidated on change; keep this below any signed media URL expiry.
+LISTING_DETAIL_CACHE_TIMEOUT = env.int("LISTING_DETAIL_CACHE_TIMEOUT", default=3600)
+# Sitemap shards hold at most this many listing URLs (protocol limit 50,000); lastmod may lag by the timeout.
+SITEMAP_SHARD_SIZE = env.int("SITEMAP_SHARD_SIZE", default=50000)
+SITEMAP_CACHE_TIMEOUT = env.int("SITEMAP_CACHE_TIMEOUT", default=3600)
+# Expired listings stay public until the archive beat task's next run moves them to ARCHIVED.
+LISTING_EXPIRY_BATCH_SIZE = env.int("LISTING_EXPIRY_BATCH_SIZE", default=500)
+# Dealer inventory feeds are applied this many rows per bulk write; URL sources time out after DEALER_FEED_TIMEOUT seconds.
+DEALER_FEED_CHUNK_SIZE = env.int("DEALER_FEED_CHUNK_SIZE", default=500)
+DEALER_FEED_TIMEOUT = env.int("DEALER_FEED_TIMEOUT", default=30)
+# Feed photos: fetched by this many threads, written (and queued for processing) in batches, capped per listing.
+DEALER_FEED_PHOTO_WORKERS = env.int("DEALER_FEED_PHOTO_WORKERS", default=8)
+DEALER_FEED_PHOTO_BATCH_SIZE = env.int("DEALER_FEED_PHOTO_BATCH_SIZE", default=200)
+DEALER_FEED_MAX_PHOTOS = env.int("DEALER_FEED_MAX_PHOTOS", default=40)
+DEALER_FEED_PHOTO_MAX_BYTES = env.int(
+    "DEALER_FEED_PHOTO_MAX_BYTES", default=20 * 1024 * 1024
+)
+
+REDIS_URL = env("REDIS_URL", default="redis://localhost:6379/0")
+CELERY_BROKER_URL = env("CELERY_BROKER_URL", default=REDIS_URL)
+CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default=REDIS_URL)
+# Run tasks in-process (no broker needed); handy for local development.
+CELERY_TASK_ALWAYS_EAGER = env.bool("CELERY_TASK_ALWAYS_EAGER", default=False)
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_BEAT_SCHEDULE = {
+    "drain-inquiry-outbox": {
+        "task": "listings.drain_inquiry_outbox",
+        "schedule": env.int("INQUIRY_OUTBOX_DRAIN_SECONDS", default=60),
+    },
+    "send-saved-search-digests": {
+        "task": "listings.send_saved_search_digests",
+        "schedule": env.int("SAVED_SEARCH_DIGEST_INTERVAL_SECONDS", default=900),
+    },
+    "archive-expired-listings": {
+        "task": "listings.archive_expired_listings",
+        "schedule": env.int("LISTING_EXPIRY_INTERVAL_SECONDS", default=300),
+    },
+    "reconcile-unread-counters": {
+        "task": "listings.reconcile_unread_counters",
+        "schedule": env.int("UNREAD_COUNTER_RECONCILE_SECONDS", default=3600),
+    },
+}
 
 LOGIN_REDIRECT_URL = env("DJANGO_LOGIN_REDIRECT_URL", default="/")
 LOGOUT_REDIRECT_URL = env("DJANGO_LOGOUT_REDIRECT_URL", default="/")
@@ -161,7 +247,9 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 ACCOUNT_EMAIL_VERIFICATION = env("ACCOUNT_EMAIL_VERIFICATION", default="optional")
-ACCOUNT_ADAPTER = env("DJANGO_ACCOUNT_ADAPTER", default="allauth.account.adapter.DefaultAccountAdapter")
+ACCOUNT_ADAPTER = env(
+    "DJANGO_ACCOUNT_ADAPTER", default="allauth.account.adapter.DefaultAccountAdapter"
+)
 SOCIALACCOUNT_ADAPTER = env(
     "DJANGO_SOCIALACCOUNT_ADAPTER",
     default="allauth.socialaccount.adapter.DefaultSocialAccountAdapter",
@@ -195,8 +283,3 @@ SOCIALACCOUNT_PROVIDERS = {
         "AUTH_PARAMS": {"access_type": "offline"},
     }
 }
-
-
-
-
-
@@ -4,8 +4,7 @@ from .base import *  # noqa: F401,F403
 
 DEBUG = True
 ALLOWED_HOSTS = env.list(
-    "DJANGO_ALLOWED_HOSTS",
-    default=["localhost", "127.0.0.1", "[::1]"]
+    "DJANGO_ALLOWED_HOSTS", default=["localhost", "127.0.0.1", "[::1]"]
 )
 CSRF_TRUSTED_ORIGINS = env.list(
     "DJANGO_CSRF_TRUSTED_ORIGINS",
@@ -22,6 +21,9 @@ EMAIL_BACKEND = env(
 
 INTERNAL_IPS = ["127.0.0.1"]
 
+# Pick up guide edits without restarting the dev server.
+GUIDES_AUTO_RELOAD = env.bool("GUIDES_AUTO_RELOAD", default=True)
+
 if SECRET_KEY == "insecure-secret-key":
     SECRET_KEY = "dev-secret-key"
 
@@ -18,7 +18,9 @@ CSRF_TRUSTED_ORIGINS = env.list("DJANGO_CSRF_TRUSTED_ORIGINS", default=[])
 try:
     DATABASES["default"] = env.db("DATABASE_URL")
 except Exception as exc:  # pragma: no cover - fail fast in prod
-    raise ImproperlyConfigured("DATABASE_URL must be configured for production") from exc
+    raise ImproperlyConfigured(
+        "DATABASE_URL must be configured for production"
+    ) from exc
 
 CACHES = {
     "default": env.cache(
@@ -27,12 +29,17 @@ CACHES = {
     )
 }
 
+# Per-process counters would multiply every limit by the number of workers.
+RATE_LIMIT_BACKEND = env("RATE_LIMIT_BACKEND", default="redis")
+
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 SECURE_SSL_REDIRECT = env.bool("DJANGO_SECURE_SSL_REDIRECT", default=True)
 SESSION_COOKIE_SECURE = env.bool("DJANGO_SESSION_COOKIE_SECURE", default=True)
 CSRF_COOKIE_SECURE = env.bool("DJANGO_CSRF_COOKIE_SECURE", default=True)
 SECURE_HSTS_SECONDS = env.int("DJANGO_SECURE_HSTS_SECONDS", default=3600)
-SECURE_HSTS_INCLUDE_SUBDOMAINS = env.bool("DJANGO_SECURE_HSTS_INCLUDE_SUBDOMAINS", default=True)
+SECURE_HSTS_INCLUDE_SUBDOMAINS = env.bool(
+    "DJANGO_SECURE_HSTS_INCLUDE_SUBDOMAINS", default=True
+)
 SECURE_HSTS_PRELOAD = env.bool("DJANGO_SECURE_HSTS_PRELOAD", default=True)
 
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default=DEFAULT_FROM_EMAIL)
@@ -0,0 +1,124 @@
+"""Sitemap index and shards.
+
+``/sitemap.xml`` is a sitemap index pointing at ``/sitemap-guides.xml`` and one
+``/sitemap-listings-<n>.xml`` per shard of at most 50,000 listings. Each file
+is streamed to the client while it is generated and then cached (compressed)
+under the listing sitemap version, so repeat crawls cost one cache read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import zlib
+from datetime import datetime
+from typing import Callable, Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from guides.sitemaps import guide_entries
+from listings.sitemaps import get_shards, shard_entries, sitemap_version
+
+from .views import site_base_url
+
+CONTENT_TYPE = "application/xml; charset=utf-8"
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def _lastmod(value: datetime | None) -> str:
+    return f"<lastmod>{value.date().isoformat()}</lastmod>" if value else ""
+
+
+def render_urlset(
+    base: str,
+    entries: Iterable[tuple[str, datetime | None]],
+    *,
+    changefreq: str,
+    priority: str,
+) -> Iterator[str]:
+    yield f'{XML_HEADER}<urlset xmlns="{NAMESPACE}">\n'
+    for path, lastmod in entries:
+        yield (
+            f"<url><loc>{escape(base + path)}</loc>{_lastmod(lastmod)}"
+            f"<changefreq>{changefreq}</changefreq><priority>{priority}</priority></url>\n"
+        )
+    yield "</urlset>\n"
+
+
+def render_index(
+    base: str, sitemaps: Iterable[tuple[str, datetime | None]]
+) -> Iterator[str]:
+    yield f'{XML_HEADER}<sitemapindex xmlns="{NAMESPACE}">\n'
+    for path, lastmod in sitemaps:
+        yield f"<sitemap><loc>{escape(base + path)}</loc>{_lastmod(lastmod)}</sitemap>\n"
+    yield "</sitemapindex>\n"
+
+
+def _cached_xml(
+    request: HttpRequest, name: str, render: Callable[[str], Iterator[str]]
+) -> HttpResponse:
+    base = site_base_url(request)
+    # The release is part of the key so guide edits shipped in a deploy are picked up.
+    digest = hashlib.sha1(
+        f"{base}\0{getattr(settings, 'RELEASE_VERSION', '')}".encode("utf-8")
+    ).hexdigest()[:12]
+    key = f"sitemap:{sitemap_version()}:{digest}:{name}"
+    cached = cache.get(key)
+    if cached is not None:
+        return HttpResponse(zlib.decompress(cached), content_type=CONTENT_TYPE)
+
+    def stream() -> Iterator[bytes]:
+        compressor = zlib.compressobj()
+        compressed: list[bytes] = []
+        for chunk in render(base):
+            data = chunk.encode("utf-8")
+            compressed.append(compressor.compress(data))
+            yield data
+        compressed.append(compressor.flush())
+        cache.set(
+            key,
+            b"".join(compressed),
+            int(getattr(settings, "SITEMAP_CACHE_TIMEOUT", 3600)),
+        )
+
+    return StreamingHttpResponse(stream(), content_type=CONTENT_TYPE)
+
+
+def sitemap_index(request: HttpRequest) -> HttpResponse:
+    def render(base: str) -> Iterator[str]:
+        guide_lastmod = max((lastmod for _, lastmod in guide_entries()), default=None)
+        sitemaps = [(reverse("sitemap-guides"), guide_lastmod)]
+        sitemaps += [
+            (reverse("sitemap-listings", args=[index]), shard.lastmod)
+            for index, shard in enumerate(get_shards())
+        ]
+        return render_index(base, sitemaps)
+
+    return _cached_xml(request, "index", render)
+
+
+def sitemap_guides(request: HttpRequest) -> HttpResponse:
+    return _cached_xml(
+        request,
+        "guides",
+        lambda base: render_urlset(
+            base, guide_entries(), changefreq="weekly", priority="0.6"
+        ),
+    )
+
+
+def sitemap_listings(request: HttpRequest, shard: int) -> HttpResponse:
+    shards = get_shards()
+    if shard >= len(shards):
+        raise Http404("No such sitemap shard")
+    return _cached_xml(
+        request,
+        f"listings-{shard}",
+        lambda base: render_urlset(
+            base, shard_entries(shards, shard), changefreq="daily", priority="0.8"
+        ),
+    )
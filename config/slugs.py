@@ -0,0 +1,120 @@
+"""Unique slug allocation shared by listings, model specs and dealers.
+
+A slug is ``<base>`` or ``<base>-<n>``. Instead of probing ``<base>-2``,
+``<base>-3``, ... one query at a time, the allocator reads every taken
+``<base>`` / ``<base>-<n>`` in one prefix query and picks the smallest free
+suffix, which is the slug the probe would have found. A title ending in a
+number ("... 2022") takes a high suffix without pushing later slugs past it.
+Nothing is reserved, so two concurrent saves can pick the same slug: the
+unique constraint decides, and ``save_with_slug`` allocates again when its
+INSERT loses, falling back to a short random suffix on the last attempt.
+``allocate_slugs`` does the same for a whole ``bulk_create`` batch.
+"""
+
+from __future__ import annotations
+
+import re
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Iterable, Iterator
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+SAVE_ATTEMPTS = 3
+# Room kept for "-<n>" or "-<hash>" within the field's max_length.
+SUFFIX_ROOM = 12
+# Bases per prefix query in bulk mode.
+BULK_CHUNK_SIZE = 100
+
+
+def slug_base(value: str, *, max_length: int = 255, fallback_length: int = 10) -> str:
+    base = slugify(value)[: max(max_length - SUFFIX_ROOM, 1)].strip("-")
+    return base or uuid.uuid4().hex[:fallback_length]
+
+
+def _suffix_pattern(base: str) -> re.Pattern[str]:
+    return re.compile(rf"^{re.escape(base)}(?:-(\d+))?$")
+
+
+def _taken(
+    model: type[models.Model], bases: Iterable[str], exclude_pk: Any = None
+) -> dict[str, set[int]]:
+    """Return ``{base: {taken suffixes}}``; a bare ``base`` counts as suffix 1."""
+
+    bases = list(dict.fromkeys(bases))
+    taken: dict[str, set[int]] = defaultdict(set)
+    for start in range(0, len(bases), BULK_CHUNK_SIZE):
+        chunk = bases[start : start + BULK_CHUNK_SIZE]
+        condition = Q(slug__in=chunk)
+        for base in chunk:
+            condition |= Q(slug__startswith=f"{base}-")
+        queryset = model._default_manager.filter(condition)
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+        patterns = {base: _suffix_pattern(base) for base in chunk}
+        for slug in queryset.values_list("slug", flat=True):
+            for base, pattern in patterns.items():
+                match = pattern.match(slug)
+                if match:
+                    taken[base].add(int(match.group(1) or 1))
+    return taken
+
+
+def _free_suffixes(taken: set[int]) -> Iterator[int]:
+    suffix = 1
+    while True:
+        if suffix not in taken:
+            yield suffix
+        suffix += 1
+
+
+def _with_suffix(base: str, suffix: int) -> str:
+    return base if suffix == 1 else f"{base}-{suffix}"
+
+
+def allocate_slug(
+    model: type[models.Model],
+    base: str,
+    *,
+    exclude_pk: Any = None,
+    hashed: bool = False,
+) -> str:
+    """Return the first free ``base``/``base-<n>`` with one query (or a random suffix if ``hashed``)."""
+
+    if hashed:
+        return f"{base}-{uuid.uuid4().hex[:8]}"
+    taken = _taken(model, [base], exclude_pk).get(base, set())
+    return _with_suffix(base, next(_free_suffixes(taken)))
+
+
+def allocate_slugs(model: type[models.Model], bases: Iterable[str]) -> list[str]:
+    """Return one free slug per base for a ``bulk_create`` batch, duplicates within the batch included."""
+
+    bases = list(bases)
+    taken = _taken(model, bases)
+    free = {base: _free_suffixes(taken.get(base, set())) for base in bases}
+    return [_with_suffix(base, next(free[base])) for base in bases]
+
+
+def save_with_slug(instance: models.Model, base: str, save: Callable[[], None]) -> None:
+    """Allocate ``instance.slug`` from ``base`` and run ``save``, re-allocating if another save took the slug."""
+
+    model = type(instance)
+    for attempt in range(SAVE_ATTEMPTS):
+        instance.slug = allocate_slug(
+            model, base, exclude_pk=instance.pk, hashed=attempt == SAVE_ATTEMPTS - 1
+        )
+        try:
+            with transaction.atomic():
+                save()
+            return
+        except IntegrityError:
+            collided = (
+                model._default_manager.filter(slug=instance.slug)
+                .exclude(pk=instance.pk)
+                .exists()
+            )
+            if not collided or attempt == SAVE_ATTEMPTS - 1:
+                raise
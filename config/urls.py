@@ -4,22 +4,17 @@ URL configuration for config project.
 The `urlpatterns` list routes URLs to views. For more information please see:
     https://docs.djangoproject.com/en/5.0/topics/http/urls/
 """
+
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.contrib.sitemaps.views import sitemap
 from django.urls import include, path
 
 from dashboard.views import ListingCreateView
-from guides.sitemaps import GuidesSitemap
-from listings.sitemaps import ListingSitemap
 from listings.views import ListingListView
-from .views import robots_txt
 
-sitemaps = {
-    "listings": ListingSitemap,
-    "guides": GuidesSitemap,
-}
+from .sitemaps import sitemap_guides, sitemap_index, sitemap_listings
+from .views import robots_txt
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -28,7 +23,9 @@ urlpatterns = [
     path("dealers/", include("dealers.urls")),
     path("guides/", include("guides.urls")),
     path("listings/", include("listings.urls")),
-    path("sitemap.xml", sitemap, {"sitemaps": sitemaps}, name="sitemap"),
+    path("sitemap.xml", sitemap_index, name="sitemap"),
+    path("sitemap-guides.xml", sitemap_guides, name="sitemap-guides"),
+    path("sitemap-listings-<int:shard>.xml", sitemap_listings, name="sitemap-listings"),
     path("robots.txt", robots_txt, name="robots"),
     path("sell/", ListingCreateView.as_view(), name="sell"),
     path("", ListingListView.as_view(), name="home"),
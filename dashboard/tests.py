@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from listings.models import Inquiry, InquiryDeliveryStatus, Listing, ListingStatus
+from config import ratelimit
+from dashboard.views import SellerNotificationsView
+from listings.inbox import get_unread_count, recount
+from listings.models import (
+    Inquiry,
+    InquiryDeliveryStatus,
+    Listing,
+    ListingStatus,
+    SellerInboxCounter,
+)
+from listings.tasks import reconcile_unread_counters
 
 User = get_user_model()
 
@@ -46,7 +60,9 @@ class ListingCrudTests(TestCase):
         )
         self.client.login(email="seller@example.com", password="password123")
 
-    def _listing_form_payload(self, overrides: dict[str, str] | None = None) -> dict[str, str]:
+    def _listing_form_payload(
+        self, overrides: dict[str, str] | None = None
+    ) -> dict[str, str]:
         payload = {
             "title": "2022 Hyundai Kona Preferred",
             "description": "Well maintained EV.",
@@ -78,7 +94,9 @@ class ListingCrudTests(TestCase):
         return payload
 
     def test_create_listing(self) -> None:
-        response = self.client.post(reverse("dashboard:create"), data=self._listing_form_payload())
+        response = self.client.post(
+            reverse("dashboard:create"), data=self._listing_form_payload()
+        )
         self.assertEqual(response.status_code, 302)
         listing = Listing.objects.get()
         self.assertEqual(listing.seller, self.seller)
@@ -140,6 +158,25 @@ class ListingCrudTests(TestCase):
         listing.refresh_from_db()
         self.assertEqual(listing.status, ListingStatus.ARCHIVED)
 
+    @override_settings(PHOTO_UPLOAD_RATE_LIMIT="1/h", AWS_STORAGE_BUCKET_NAME="")
+    def test_photo_upload_url_is_rate_limited(self) -> None:
+        ratelimit.get_backend().reset()
+        self.addCleanup(ratelimit.get_backend().reset)
+        listing = Listing.objects.create(
+            seller=self.seller,
+            title="Rate Limited",
+            year=2022,
+            make="Kia",
+            model="Niro",
+            price=30000,
+        )
+        url = reverse("dashboard:photo-upload", kwargs={"pk": listing.pk})
+        payload = {"filename": "car.jpg", "content_type": "image/jpeg"}
+        self.assertEqual(self.client.post(url, payload).status_code, 503)
+        limited = self.client.post(url, payload)
+        self.assertEqual(limited.status_code, 429)
+        self.assertGreater(int(limited["Retry-After"]), 0)
+
 
 class NotificationsViewTests(TestCase):
     def setUp(self) -> None:
@@ -187,3 +224,149 @@ class NotificationsViewTests(TestCase):
         self.client.get(reverse("dashboard:notifications"))
         self.inquiry.refresh_from_db()
         self.assertIsNotNone(self.inquiry.seller_notified_at)
+
+    def test_unread_badge_reads_denormalized_counter(self) -> None:
+        second = Inquiry.objects.create(
+            listing=self.listing,
+            name="Buyer Two",
+            email="two@example.com",
+            message="Hi",
+        )
+        response = self.client.get(reverse("dashboard:index"))
+        self.assertEqual(response.context["inquiry_unread_count"], 2)
+        self.assertEqual(SellerInboxCounter.objects.get(seller=self.seller).unread, 2)
+
+        Inquiry.objects.create(
+            listing=self.listing,
+            name="Buyer Three",
+            email="three@example.com",
+            message="Hi",
+        )
+        self.assertEqual(get_unread_count(self.seller.pk), 3)
+        second.delete()
+        self.assertEqual(get_unread_count(self.seller.pk), 2)
+
+        self.client.get(reverse("dashboard:notifications"))
+        self.assertEqual(get_unread_count(self.seller.pk), 0)
+        response = self.client.get(reverse("dashboard:index"))
+        self.assertEqual(response.context["inquiry_unread_count"], 0)
+
+        # Drift from an update that bypassed the hooks is repaired by the beat task.
+        Inquiry.objects.update(seller_notified_at=None)
+        self.assertEqual(reconcile_unread_counters(), 1)
+        self.assertEqual(get_unread_count(self.seller.pk), 2)
+        self.assertEqual(reconcile_unread_counters(), 0)
+
+    def test_deleting_a_listing_uncounts_its_inquiries_once(self) -> None:
+        other = Listing.objects.create(
+            seller=self.seller,
+            title="Other",
+            year=2022,
+            make="Kia",
+            model="EV6",
+            price=40000,
+            province="BC",
+            city="Victoria",
+        )
+        Inquiry.objects.create(
+            listing=other, name="Buyer Two", email="two@example.com", message="Hi"
+        )
+        Inquiry.objects.bulk_create(
+            Inquiry(
+                listing=self.listing,
+                name=f"Buyer {index}",
+                email=f"b{index}@example.com",
+                message="Hi",
+            )
+            for index in range(20)
+        )
+        recount([self.seller.pk])
+        self.assertEqual(get_unread_count(self.seller.pk), 22)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.listing.delete()
+        # One decrement for the listing, not a lookup and an UPDATE per inquiry.
+        counter_writes = [
+            query
+            for query in queries.captured_queries
+            if "listings_sellerinboxcounter" in query["sql"]
+        ]
+        self.assertEqual(len(counter_writes), 1)
+        self.assertLess(len(queries), 21)
+        self.assertEqual(get_unread_count(self.seller.pk), 1)
+        self.assertEqual(reconcile_unread_counters(), 0)
+
+    def test_inbox_pages_by_cursor_and_marks_only_what_it_covers(self) -> None:
+        other = Listing.objects.create(
+            seller=self.seller,
+            title="Other Listing",
+            year=2022,
+            make="Kia",
+            model="Niro",
+            price=40000,
+            mileage_km=1000,
+            province="ON",
+            city="Ottawa",
+            status=ListingStatus.APPROVED,
+        )
+        for n in range(4):
+            Inquiry.objects.create(
+                listing=other,
+                name=f"Niro buyer {n}",
+                email=f"niro{n}@example.com",
+                message="Hi",
+            )
+        url = reverse("dashboard:notifications")
+
+        with mock.patch.object(SellerNotificationsView, "page_size", 2):
+            response = self.client.get(url)
+            first = [inquiry.name for inquiry in response.context["inquiries"]]
+            self.assertEqual(first, ["Niro buyer 3", "Niro buyer 2"])
+            self.assertEqual(response.context["inquiry_unread_count"], 0)
+            self.assertFalse(
+                Inquiry.objects.filter(seller_notified_at__isnull=True).exists()
+            )
+            self.assertContains(response, 'hx-trigger="revealed"')
+
+            # The lazy page is an HTMX partial of the next, older rows.
+            response = self.client.get(
+                f"{url}?{response.context['next_page_query']}", HTTP_HX_REQUEST="true"
+            )
+            self.assertTemplateUsed(
+                response, "dashboard/notifications/partials/rows.html"
+            )
+            self.assertNotContains(response, "<form")
+            self.assertEqual(
+                [inquiry.name for inquiry in response.context["inquiries"]],
+                ["Niro buyer 1", "Niro buyer 0"],
+            )
+            response = self.client.get(
+                f"{url}?{response.context['next_page_query']}", HTTP_HX_REQUEST="true"
+            )
+            self.assertEqual(
+                [inquiry.name for inquiry in response.context["inquiries"]],
+                ["Buyer One"],
+            )
+            self.assertEqual(response.context["next_page_query"], "")
+
+            # Filtered views only mark the inquiries they match.
+            Inquiry.objects.update(seller_notified_at=None)
+            reconcile_unread_counters()
+            response = self.client.get(
+                url, {"listing": str(self.listing.pk), "status": "new"}
+            )
+            self.assertEqual(
+                [inquiry.name for inquiry in response.context["inquiries"]],
+                ["Buyer One"],
+            )
+            self.assertEqual(response.context["inquiry_unread_count"], 4)
+            self.assertEqual(
+                Inquiry.objects.filter(
+                    seller_notified_at__isnull=True, listing=other
+                ).count(),
+                4,
+            )
+
+        self.assertEqual(
+            self.client.get(url, {"cursor": "not-a-cursor"}).status_code, 404
+        )
@@ -2,58 +2,51 @@ from __future__ import annotations
 
 import json
 import logging
+import uuid
 from pathlib import Path
-
 from typing import Any
 
-import boto3
-
 from botocore.exceptions import BotoCoreError, NoCredentialsError
-
 from django.conf import settings
-
 from django.contrib import messages
-
 from django.contrib.auth.mixins import LoginRequiredMixin
-
-from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse
-
+from django.db.models import Q
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
-
 from django.urls import reverse, reverse_lazy
-
 from django.utils import timezone
-
+from django.utils.dateparse import parse_datetime
 from django.utils.decorators import method_decorator
-
+from django.utils.functional import cached_property
 from django.views import View
-
-from django.views.generic import TemplateView
-
 from django.views.decorators.csrf import csrf_exempt
+from django.views.generic import TemplateView
 
 from accounts.models import User
-
+from config import ratelimit
+from config.aws import get_client
 from listings.forms import ListingForm, PhotoFormSet
-
-from listings.models import Inquiry, Listing, ListingStatus
-
+from listings.inbox import adjust_unread, get_unread_count
+from listings.models import Inquiry, InquiryStatus, Listing, ListingStatus
+from listings.pagination import InvalidCursor, decode_cursor, encode_cursor
 from listings.tasks import process_listing_photo
 
 logger = logging.getLogger(__name__)
 
-class SellerRequiredMixin(LoginRequiredMixin):
 
+class SellerRequiredMixin(LoginRequiredMixin):
     """Ensure only seller/dealer/admin roles can access dashboard."""
 
     allowed_roles = {
-
         User.Role.SELLER,
-
         User.Role.DEALER,
-
         User.Role.ADMIN,
-
     }
 
     def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
@@ -74,7 +67,7 @@ class SellerDashboardMixin(SellerRequiredMixin):
         user = self.request.user
         if not user.is_authenticated:
             return 0
-        return Inquiry.objects.filter(listing__seller=user, seller_notified_at__isnull=True).count()
+        return get_unread_count(user.pk)
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
@@ -108,40 +101,133 @@ class DashboardIndexView(SellerDashboardMixin, TemplateView):
 
         return ctx
 
-    def render_to_response(self, context: dict[str, Any], **response_kwargs: Any) -> HttpResponse:
+    def render_to_response(
+        self, context: dict[str, Any], **response_kwargs: Any
+    ) -> HttpResponse:
 
         if self.request.headers.get("HX-Request"):
 
-            return render(self.request, "dashboard/listings/partials/list_table.html", context=context)
+            return render(
+                self.request,
+                "dashboard/listings/partials/list_table.html",
+                context=context,
+            )
 
         return super().render_to_response(context, **response_kwargs)
 
 
 class SellerNotificationsView(SellerDashboardMixin, TemplateView):
+    """Seller inquiry inbox, newest first, paged by a ``(created_at, id)`` cursor.
+
+    Opening the first page marks everything it covers as read with one UPDATE
+    bounded by the newest inquiry shown; later pages (fetched lazily over HTMX)
+    are older, so they were covered by that UPDATE already.
+    """
+
     template_name = "dashboard/notifications/index.html"
+    partial_template_name = "dashboard/notifications/partials/rows.html"
     page_size = 50
 
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
-        self._unread_ids = list(
-            Inquiry.objects.filter(listing__seller=request.user, seller_notified_at__isnull=True).values_list("id", flat=True)
-        )
-        response = super().get(request, *args, **kwargs)
-        if self._unread_ids:
-            now = timezone.now()
-            Inquiry.objects.filter(pk__in=self._unread_ids).update(seller_notified_at=now, updated_at=now)
-        return response
+    @cached_property
+    def filters(self) -> dict[str, str]:
+        listing = self.request.GET.get("listing", "")
+        try:
+            listing = str(uuid.UUID(listing)) if listing else ""
+        except ValueError:
+            listing = ""
+        status = self.request.GET.get("status", "")
+        return {
+            "listing": listing,
+            "status": status if status in InquiryStatus.values else "",
+        }
+
+    @cached_property
+    def cursor(self) -> tuple[Any, int] | None:
+        token = self.request.GET.get("cursor")
+        if not token:
+            return None
+        try:
+            payload = decode_cursor(token)
+            created_at = parse_datetime(payload.get("c") or "")
+            pk = int(payload.get("i"))
+        except (InvalidCursor, TypeError, ValueError) as exc:
+            raise Http404("Invalid cursor") from exc
+        if created_at is None:
+            raise Http404("Invalid cursor")
+        return created_at, pk
 
     def get_queryset(self) -> Any:
-        return Inquiry.objects.filter(listing__seller=self.request.user).select_related("listing").order_by("-created_at")
+        qs = Inquiry.objects.filter(listing__seller=self.request.user)
+        if self.filters["listing"]:
+            qs = qs.filter(listing_id=self.filters["listing"])
+        if self.filters["status"]:
+            qs = qs.filter(status=self.filters["status"])
+        return qs
+
+    def get_page(self) -> tuple[list[Inquiry], str | None]:
+        qs = (
+            self.get_queryset().select_related("listing").order_by("-created_at", "-id")
+        )
+        if self.cursor:
+            created_at, pk = self.cursor
+            qs = qs.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+        rows = list(qs[: self.page_size + 1])
+        inquiries = rows[: self.page_size]
+        next_cursor = None
+        if len(rows) > self.page_size:
+            last = inquiries[-1]
+            next_cursor = encode_cursor(
+                {"d": "next", "c": last.created_at.isoformat(), "i": last.pk}
+            )
+        return inquiries, next_cursor
+
+    def mark_read(self, newest: Inquiry) -> None:
+        now = timezone.now()
+        marked = (
+            self.get_queryset()
+            .filter(seller_notified_at__isnull=True, created_at__lte=newest.created_at)
+            .update(seller_notified_at=now, updated_at=now)
+        )
+        adjust_unread(self.request.user.pk, -marked)
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        inquiries = list(self.get_queryset()[: self.page_size])
-        context["inquiries"] = inquiries
-        context["unread_ids"] = list(getattr(self, "_unread_ids", []))
-        context["inquiry_unread_count"] = 0
+        inquiries, next_cursor = self.get_page()
+        # Rows keep the state they were loaded with, so this page still highlights what was unread.
+        if inquiries and self.cursor is None:
+            self.mark_read(inquiries[0])
+            context["inquiry_unread_count"] = get_unread_count(self.request.user.pk)
+        params = self.request.GET.copy()
+        params.pop("cursor", None)
+        if next_cursor:
+            params["cursor"] = next_cursor
+        context.update(
+            {
+                "inquiries": inquiries,
+                "unread_ids": [
+                    inquiry.pk
+                    for inquiry in inquiries
+                    if inquiry.seller_notified_at is None
+                ],
+                "next_page_query": params.urlencode() if next_cursor else "",
+                "filters": self.filters,
+                "listing_choices": Listing.objects.filter(seller=self.request.user)
+                .order_by("title")
+                .values_list("pk", "title"),
+                "status_choices": InquiryStatus.choices,
+                "has_inquiries": bool(inquiries)
+                or Inquiry.objects.filter(listing__seller=self.request.user).exists(),
+            }
+        )
         return context
 
+    def get_template_names(self) -> list[str]:
+        if self.request.headers.get("HX-Request"):
+            return [self.partial_template_name]
+        return [self.template_name]
+
 
 class ListingFormMixin(SellerDashboardMixin):
 
@@ -173,30 +259,23 @@ class ListingFormMixin(SellerDashboardMixin):
 
         if self.request.method in {"POST", "PUT"}:
 
-            return PhotoFormSet(self.request.POST, self.request.FILES, instance=instance)
+            return PhotoFormSet(
+                self.request.POST, self.request.FILES, instance=instance
+            )
 
         return PhotoFormSet(instance=instance)
 
     def form_invalid(self, form: ListingForm, photos: PhotoFormSet) -> HttpResponse:
 
         return render(
-
             self.request,
-
             self.template_name,
-
             {
-
                 "form": form,
-
                 "photos": photos,
-
                 "view": self,
-
             },
-
             status=400,
-
         )
 
     def form_valid(self, form: ListingForm, photos: PhotoFormSet) -> HttpResponse:
@@ -219,6 +298,7 @@ class ListingFormMixin(SellerDashboardMixin):
 
         return reverse("dashboard:edit", kwargs={"pk": listing.pk})
 
+
 class ListingCreateView(ListingFormMixin, View):
 
     title = "Create listing"
@@ -233,7 +313,9 @@ class ListingCreateView(ListingFormMixin, View):
 
         photos = self.get_photo_formset()
 
-        return render(request, self.template_name, {"form": form, "photos": photos, "view": self})
+        return render(
+            request, self.template_name, {"form": form, "photos": photos, "view": self}
+        )
 
     def post(self, request: HttpRequest) -> HttpResponse:
 
@@ -247,13 +329,16 @@ class ListingCreateView(ListingFormMixin, View):
 
         return self.form_invalid(form, photos)
 
+
 class ListingUpdateView(ListingFormMixin, View):
 
     title = "Edit listing"
 
     def get_object(self) -> Listing | None:  # type: ignore[override]
 
-        return get_object_or_404(Listing, pk=self.kwargs["pk"], seller=self.request.user)
+        return get_object_or_404(
+            Listing, pk=self.kwargs["pk"], seller=self.request.user
+        )
 
     def get(self, request: HttpRequest, pk: str) -> HttpResponse:
 
@@ -263,7 +348,9 @@ class ListingUpdateView(ListingFormMixin, View):
 
         photos = self.get_photo_formset()
 
-        return render(request, self.template_name, {"form": form, "photos": photos, "view": self})
+        return render(
+            request, self.template_name, {"form": form, "photos": photos, "view": self}
+        )
 
     def post(self, request: HttpRequest, pk: str) -> HttpResponse:
 
@@ -279,13 +366,16 @@ class ListingUpdateView(ListingFormMixin, View):
 
         return self.form_invalid(form, photos)
 
+
 class ListingRowMixin(SellerRequiredMixin):
 
     template_name = "dashboard/listings/partials/listing_row.html"
 
     def get_listing(self) -> Listing:
 
-        return get_object_or_404(Listing, pk=self.kwargs["pk"], seller=self.request.user)
+        return get_object_or_404(
+            Listing, pk=self.kwargs["pk"], seller=self.request.user
+        )
 
     def render_partial(self, listing: Listing) -> HttpResponse:
 
@@ -293,6 +383,7 @@ class ListingRowMixin(SellerRequiredMixin):
 
         return render(self.request, self.template_name, context)
 
+
 class ListingSubmitView(ListingRowMixin, View):
 
     def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
@@ -311,12 +402,21 @@ class ListingSubmitView(ListingRowMixin, View):
 
         listing.rejected_at = None
 
-        listing.save(update_fields=["status", "published_at", "approved_at", "rejected_at", "updated_at"])
+        listing.save(
+            update_fields=[
+                "status",
+                "published_at",
+                "approved_at",
+                "rejected_at",
+                "updated_at",
+            ]
+        )
 
         messages.success(request, "Listing submitted for moderation")
 
         return self.render_partial(listing)
 
+
 class ListingArchiveView(ListingRowMixin, View):
 
     def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
@@ -333,23 +433,45 @@ class ListingArchiveView(ListingRowMixin, View):
 
         return self.render_partial(listing)
 
+
 class PhotoUploadURLView(SellerRequiredMixin, View):
     max_photos = 10
     max_upload_bytes = 10 * 1024 * 1024
     presign_expires_seconds = 300
 
-    def post(self, request: HttpRequest, pk: str, *args: Any, **kwargs: Any) -> HttpResponse:
+    def post(
+        self, request: HttpRequest, pk: str, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        limited = ratelimit.hit_rate(
+            "photo-presign",
+            request.user.pk,
+            getattr(settings, "PHOTO_UPLOAD_RATE_LIMIT", "60/1h"),
+        )
+        if not limited.allowed:
+            response = JsonResponse(
+                {"error": "Too many upload requests. Please try again shortly."},
+                status=429,
+            )
+            response["Retry-After"] = str(limited.retry_after)
+            return response
+
         listing = get_object_or_404(Listing, pk=pk, seller=request.user)
         current_photos = listing.photos.count()
         if current_photos >= self.max_photos:
-            return JsonResponse({"error": "You already have the maximum number of photos."}, status=400)
+            return JsonResponse(
+                {"error": "You already have the maximum number of photos."}, status=400
+            )
 
         raw_filename = request.POST.get("filename")
         content_type = request.POST.get("content_type")
         if not raw_filename or not content_type:
-            return JsonResponse({"error": "filename and content_type required"}, status=400)
+            return JsonResponse(
+                {"error": "filename and content_type required"}, status=400
+            )
         if not content_type.startswith("image/"):
-            return JsonResponse({"error": "Only image uploads are allowed."}, status=400)
+            return JsonResponse(
+                {"error": "Only image uploads are allowed."}, status=400
+            )
 
         filename = Path(raw_filename).name
         if not filename:
@@ -361,49 +483,48 @@ class PhotoUploadURLView(SellerRequiredMixin, View):
 
         photo_model = listing.photos.model
         photo_instance = photo_model(listing=listing)
-        storage_key = photo_instance.image.field.generate_filename(photo_instance, filename)
-
-        session_kwargs: dict[str, str] = {}
-        access_key = getattr(settings, "AWS_ACCESS_KEY_ID", None)
-        secret_key = getattr(settings, "AWS_SECRET_ACCESS_KEY", None)
-        session_token = getattr(settings, "AWS_SESSION_TOKEN", None)
-        region_name = getattr(settings, "AWS_DEFAULT_REGION", None)
-        if access_key and secret_key:
-            session_kwargs["aws_access_key_id"] = access_key
-            session_kwargs["aws_secret_access_key"] = secret_key
-        if session_token:
-            session_kwargs["aws_session_token"] = session_token
+        storage_key = photo_instance.image.field.generate_filename(
+            photo_instance, filename
+        )
 
         try:
-            session = boto3.session.Session(**session_kwargs) if session_kwargs else boto3.session.Session()
-            client = session.client("s3", region_name=region_name)
+            client = get_client(
+                "s3", region_name=getattr(settings, "AWS_DEFAULT_REGION", None)
+            )
             presigned = client.generate_presigned_post(
                 Bucket=bucket,
                 Key=storage_key,
                 Fields={"Content-Type": content_type},
-                Conditions=[["content-length-range", 0, self.max_upload_bytes], {"Content-Type": content_type}],
+                Conditions=[
+                    ["content-length-range", 0, self.max_upload_bytes],
+                    {"Content-Type": content_type},
+                ],
                 ExpiresIn=self.presign_expires_seconds,
             )
         except (NoCredentialsError, BotoCoreError, AttributeError, ValueError) as exc:
-            return JsonResponse({"error": f"Unable to generate upload URL: {exc}"}, status=503)
-
-        return JsonResponse({
-            "upload": {
-                "url": presigned["url"],
-                "fields": presigned["fields"],
-                "expires_in": self.presign_expires_seconds,
-                "max_file_size": self.max_upload_bytes,
-            },
-            "photo": {
-                "storage_key": storage_key,
-                "bucket": bucket,
-                "content_type": content_type,
-                "remaining_slots": self.max_photos - current_photos,
-            },
-        })
+            return JsonResponse(
+                {"error": f"Unable to generate upload URL: {exc}"}, status=503
+            )
+
+        return JsonResponse(
+            {
+                "upload": {
+                    "url": presigned["url"],
+                    "fields": presigned["fields"],
+                    "expires_in": self.presign_expires_seconds,
+                    "max_file_size": self.max_upload_bytes,
+                },
+                "photo": {
+                    "storage_key": storage_key,
+                    "bucket": bucket,
+                    "content_type": content_type,
+                    "remaining_slots": self.max_photos - current_photos,
+                },
+            }
+        )
 
-@method_decorator(csrf_exempt, name="dispatch")
 
+@method_decorator(csrf_exempt, name="dispatch")
 class PhotoCallbackView(SellerRequiredMixin, View):
     def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         try:
@@ -411,14 +532,18 @@ class PhotoCallbackView(SellerRequiredMixin, View):
         except json.JSONDecodeError:
             return JsonResponse({"error": "Invalid JSON"}, status=400)
 
-        listing = get_object_or_404(Listing, pk=payload.get("listing_id"), seller=request.user)
+        listing = get_object_or_404(
+            Listing, pk=payload.get("listing_id"), seller=request.user
+        )
         image_key = payload.get("storage_key")
         if not image_key:
             return JsonResponse({"error": "storage_key missing"}, status=400)
 
         current_count = listing.photos.count()
         if current_count >= PhotoUploadURLView.max_photos:
-            return JsonResponse({"error": "Photo limit reached for this listing."}, status=400)
+            return JsonResponse(
+                {"error": "Photo limit reached for this listing."}, status=400
+            )
 
         Photo = listing.photos.model  # type: ignore[attr-defined]
         photo, created = Photo.objects.get_or_create(
@@ -426,7 +551,9 @@ class PhotoCallbackView(SellerRequiredMixin, View):
             image=image_key,
             defaults={"sort_order": current_count},
         )
-        remaining_slots = max(PhotoUploadURLView.max_photos - (current_count + (1 if created else 0)), 0)
+        remaining_slots = max(
+            PhotoUploadURLView.max_photos - (current_count + (1 if created else 0)), 0
+        )
 
         try:
             image_url = photo.image.url
@@ -435,13 +562,16 @@ class PhotoCallbackView(SellerRequiredMixin, View):
 
         try:
             process_listing_photo.delay(photo.pk)
-        except Exception as exc:  # pragma: no cover - broker availability differs per env
+        except (
+            Exception
+        ) as exc:  # pragma: no cover - broker availability differs per env
             logger.warning("Unable to enqueue photo processing task", exc_info=exc)
 
-        return JsonResponse({
-            "photo_id": photo.pk,
-            "image_url": image_url,
-            "remaining_slots": remaining_slots,
-            "created": created,
-        })
-
+        return JsonResponse(
+            {
+                "photo_id": photo.pk,
+                "image_url": image_url,
+                "remaining_slots": remaining_slots,
+                "created": created,
+            }
+        )
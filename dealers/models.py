@@ -4,6 +4,8 @@ from django.conf import settings
 from django.db import models
 from django.utils.text import slugify
 
+from config.slugs import save_with_slug, slug_base
+
 
 class DealerProfile(models.Model):
     """Additional profile data for dealer accounts."""
@@ -41,12 +43,10 @@ class DealerProfile(models.Model):
         return self.name
 
     def save(self, *args: object, **kwargs: object) -> None:
-        if not self.slug:
-            base_slug = slugify(self.name) or slugify(self.user.email)
-            candidate = base_slug
-            index = 1
-            while DealerProfile.objects.exclude(pk=self.pk).filter(slug=candidate).exists():
-                index += 1
-                candidate = f"{base_slug}-{index}"
-            self.slug = candidate
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+            return
+        base_slug = slug_base(self.name if slugify(self.name) else self.user.email)
+        save_with_slug(
+            self, base_slug, lambda: super(DealerProfile, self).save(*args, **kwargs)
+        )
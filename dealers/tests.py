@@ -48,4 +48,16 @@ class DealerPublicViewsTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, self.dealer.name)
         self.assertContains(response, self.listing.title)
-        self.assertContains(response, reverse("listings:detail", args=[self.listing.slug]))
+        self.assertContains(
+            response, reverse("listings:detail", args=[self.listing.slug])
+        )
+
+    def test_dealer_detail_revalidates_after_inventory_changes(self) -> None:
+        url = reverse("dealers:detail", args=[self.dealer.slug])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.listing.status = ListingStatus.ARCHIVED
+        self.listing.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
@@ -2,14 +2,16 @@ from __future__ import annotations
 
 from typing import Any
 
+from django.db.models import Count, Max
 from django.views.generic import DetailView, ListView
 
+from config.conditional import ConditionalGetMixin, latest
 from listings.models import Listing
 
 from .models import DealerProfile
 
 
-class DealerListView(ListView):
+class DealerListView(ConditionalGetMixin, ListView):
     """Public directory of dealer profiles."""
 
     model = DealerProfile
@@ -19,8 +21,19 @@ class DealerListView(ListView):
     def get_queryset(self) -> Any:
         return DealerProfile.objects.order_by("name")
 
+    def get_validators(self) -> tuple[list[Any], Any]:
+        # The count catches deletions, which leave no newer timestamp behind.
+        stamps = DealerProfile.objects.aggregate(
+            updated=Max("updated_at"), total=Count("pk")
+        )
+        return [
+            stamps["total"],
+            stamps["updated"],
+            self.request.get_full_path(),
+        ], stamps["updated"]
+
 
-class DealerDetailView(DetailView):
+class DealerDetailView(ConditionalGetMixin, DetailView):
     """Public profile page for a dealer including active inventory."""
 
     model = DealerProfile
@@ -29,13 +42,33 @@ class DealerDetailView(DetailView):
     slug_field = "slug"
     slug_url_kwarg = "slug"
 
+    def get_object(self, queryset: Any = None) -> DealerProfile:
+        # Fetched once for both the validators and the render.
+        if not hasattr(self, "_dealer"):
+            self._dealer = super().get_object(queryset)
+        return self._dealer
+
+    def get_validators(self) -> tuple[list[Any], Any]:
+        dealer = self.get_object()
+        # Every status counts: a listing leaving the inventory is saved with a newer timestamp.
+        stamps = (
+            Listing.objects.filter(dealer=dealer)
+            .order_by()
+            .aggregate(
+                updated=Max("updated_at"),
+                total=Count("pk"),
+            )
+        )
+        last_modified = latest(dealer.updated_at, stamps["updated"])
+        return [dealer.pk, stamps["total"], last_modified], last_modified
+
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         dealer: DealerProfile = context["dealer"]
         listings = list(
             Listing.objects.active()
             .filter(dealer=dealer)
-            .select_related("spec", "seller")
+            .select_related("dealer", "spec", "seller")
             .prefetch_related("photos")
             .order_by("-published_at", "-created_at")
         )
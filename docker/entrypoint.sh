@@ -7,6 +7,7 @@ set -euo
 : "${GUNICORN_TIMEOUT:=60}"
 
 python manage.py collectstatic --noinput
+python manage.py collectguides
 python manage.py migrate --noinput
 
 exec gunicorn config.wsgi:application \
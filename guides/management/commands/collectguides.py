@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from guides.registry import get_guides
+from guides.rendering import write_manifest
+
+
+class Command(BaseCommand):
+    help = "Pre-render every guide to HTML so web processes never run Markdown on a request."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--output",
+            default="",
+            help="Manifest path (default: GUIDES_PRECOMPILED_PATH).",
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        verbosity = int(options.get("verbosity", 1))
+        output = options["output"] or getattr(settings, "GUIDES_PRECOMPILED_PATH", "")
+        if not output:
+            raise CommandError("Set GUIDES_PRECOMPILED_PATH or pass --output.")
+        path = Path(output)
+        count = write_manifest(get_guides(), path)
+        if verbosity:
+            self.stdout.write(self.style.SUCCESS(f"Rendered {count} guides to {path}."))
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timezone as dt_timezone
+from datetime import datetime
+from datetime import timezone as dt_timezone
 from pathlib import Path
 from typing import Iterable, List
 
 from django.utils import timezone
 
+from .rendering import file_state, render_guide
+
 BASE_DIR = Path(__file__).resolve().parent
 
 
@@ -19,16 +22,18 @@ class Guide:
 
     @property
     def last_modified(self) -> datetime:
-        try:
-            ts = self.filename.stat().st_mtime
-        except FileNotFoundError:
+        state = file_state(self.filename)
+        if state is None:
             return timezone.now()
-        dt = datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+        dt = datetime.fromtimestamp(state.mtime, tz=dt_timezone.utc)
         return dt.astimezone(timezone.get_default_timezone())
 
     def read(self) -> str:
         return self.filename.read_text(encoding="utf-8")
 
+    def render(self) -> str:
+        return render_guide(self)
+
 
 GUIDES: List[Guide] = [
     Guide(
@@ -52,12 +57,12 @@ GUIDES: List[Guide] = [
 ]
 
 
+GUIDES_BY_SLUG: dict[str, Guide] = {guide.slug: guide for guide in GUIDES}
+
+
 def get_guides() -> List[Guide]:
     return GUIDES
 
 
 def get_guide(slug: str) -> Guide | None:
-    for guide in GUIDES:
-        if guide.slug == slug:
-            return guide
-    return None
+    return GUIDES_BY_SLUG.get(slug)
@@ -0,0 +1,151 @@
+"""Memoized Markdown rendering for guides.
+
+Rendered HTML is kept per process, keyed by the content hash of the source
+file; a guide is re-read only when its mtime or size changes. With
+``GUIDES_AUTO_RELOAD`` off (the production default) each file is stat()ed once
+per process, since guides ship with the code and change only on deploy.
+
+``manage.py collectguides`` pre-renders every guide into
+``GUIDES_PRECOMPILED_PATH`` at deploy time; a process seeds its memo from that
+manifest, so the first request for a guide does not run Markdown either. An
+entry whose hash no longer matches the file is simply ignored.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+import markdown
+from django.conf import settings
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .registry import Guide
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_EXTENSIONS = ["extra", "toc"]
+
+
+@dataclass(frozen=True)
+class FileState:
+    mtime: float
+    size: int
+
+
+@dataclass(frozen=True)
+class _Rendered:
+    state: FileState
+    sha256: str
+    html: str
+
+
+_lock = threading.Lock()
+_states: dict[Path, FileState | None] = {}
+_renders: dict[Path, _Rendered] = {}
+_html_by_hash: dict[str, str] = {}
+_manifest_loaded = False
+
+
+def _auto_reload() -> bool:
+    return bool(getattr(settings, "GUIDES_AUTO_RELOAD", False))
+
+
+def file_state(path: Path) -> FileState | None:
+    """Return the file's mtime and size (``None`` if missing), stat()ing once unless auto-reload is on."""
+
+    if not _auto_reload() and path in _states:
+        return _states[path]
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        state = None
+    else:
+        state = FileState(mtime=stat.st_mtime, size=stat.st_size)
+    _states[path] = state
+    return state
+
+
+def render_markdown(text: str) -> str:
+    return markdown.markdown(
+        text, extensions=MARKDOWN_EXTENSIONS, output_format="html5"
+    )
+
+
+def _manifest_path() -> Path | None:
+    path = getattr(settings, "GUIDES_PRECOMPILED_PATH", "")
+    return Path(path) if path else None
+
+
+def _load_manifest() -> None:
+    global _manifest_loaded
+    if _manifest_loaded:
+        return
+    _manifest_loaded = True
+    path = _manifest_path()
+    if path is None or not path.exists():
+        return
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable guide manifest %s", path, exc_info=exc)
+        return
+    for entry in entries.values():
+        if isinstance(entry, dict) and entry.get("sha256") and "html" in entry:
+            _html_by_hash[entry["sha256"]] = entry["html"]
+
+
+def render_guide(guide: "Guide") -> str:
+    """Return the guide's HTML, rendering Markdown only when its content changed."""
+
+    path = guide.filename
+    state = file_state(path)
+    cached = _renders.get(path)
+    if cached is not None and cached.state == state:
+        return cached.html
+
+    with _lock:
+        _load_manifest()
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        html = _html_by_hash.get(digest)
+        if html is None:
+            html = render_markdown(raw.decode("utf-8"))
+            _html_by_hash[digest] = html
+        if state is not None:
+            _renders[path] = _Rendered(state=state, sha256=digest, html=html)
+    return html
+
+
+def write_manifest(guides: Iterable["Guide"], path: Path) -> int:
+    """Render ``guides`` and write them to ``path`` atomically; return the number written."""
+
+    entries = {}
+    for guide in guides:
+        raw = guide.filename.read_bytes()
+        entries[guide.slug] = {
+            "sha256": hashlib.sha256(raw).hexdigest(),
+            "html": render_markdown(raw.decode("utf-8")),
+        }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(entries, sort_keys=True), encoding="utf-8")
+    temporary.replace(path)
+    return len(entries)
+
+
+def reset() -> None:
+    """Forget every memoized stat, render and manifest entry."""
+
+    global _manifest_loaded
+    with _lock:
+        _states.clear()
+        _renders.clear()
+        _html_by_hash.clear()
+        _manifest_loaded = False
@@ -1,18 +1,15 @@
-from django.contrib.sitemaps import Sitemap
-from django.urls import reverse
+from __future__ import annotations
 
-from .registry import Guide, get_guides
+from datetime import datetime
+from typing import Iterator
 
+from django.urls import reverse
 
-class GuidesSitemap(Sitemap):
-    changefreq = "weekly"
-    priority = 0.6
+from .registry import get_guides
 
-    def items(self):
-        return get_guides()
 
-    def lastmod(self, obj: Guide):
-        return obj.last_modified
+def guide_entries() -> Iterator[tuple[str, datetime]]:
+    """Yield ``(path, lastmod)`` for every guide."""
 
-    def location(self, obj: Guide) -> str:
-        return reverse("guides:detail", args=[obj.slug])
+    for guide in get_guides():
+        yield reverse("guides:detail", args=[guide.slug]), guide.last_modified
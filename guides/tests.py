@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from django.test import TestCase
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils.html import escape
 
-from .registry import get_guides
+from . import rendering
+from .registry import Guide, get_guide, get_guides
 
 
 class GuideViewTests(TestCase):
@@ -27,3 +33,66 @@ class GuideViewTests(TestCase):
     def test_unknown_slug_returns_404(self) -> None:
         response = self.client.get(reverse("guides:detail", args=["does-not-exist"]))
         self.assertEqual(response.status_code, 404)
+
+    def test_guide_detail_answers_conditional_get(self) -> None:
+        guide = get_guides()[0]
+        url = reverse("guides:detail", args=[guide.slug])
+        response = self.client.get(url)
+        self.assertIn("ETag", response)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304
+        )
+        not_modified = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+
+
+class GuideRenderingTests(TestCase):
+    def setUp(self) -> None:
+        rendering.reset()
+        self.addCleanup(rendering.reset)
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.source = Path(self.tmp.name) / "guide.md"
+        self.source.write_text("# First\n\nBody", encoding="utf-8")
+        self.guide = Guide(
+            slug="tmp", title="Tmp", description="", filename=self.source
+        )
+
+    def test_slug_lookup(self) -> None:
+        self.assertIs(get_guide(get_guides()[1].slug), get_guides()[1])
+        self.assertIsNone(get_guide("missing"))
+
+    @override_settings(GUIDES_AUTO_RELOAD=True)
+    def test_render_is_memoized_until_the_file_changes(self) -> None:
+        with mock.patch.object(
+            rendering, "render_markdown", wraps=rendering.render_markdown
+        ) as render:
+            self.assertIn("<h1", self.guide.render())
+            self.guide.render()
+            self.assertEqual(render.call_count, 1)
+            self.source.write_text("# Second edition\n\nLonger body", encoding="utf-8")
+            self.assertIn("Second edition", self.guide.render())
+            self.assertEqual(render.call_count, 2)
+
+    @override_settings(GUIDES_AUTO_RELOAD=False)
+    def test_without_auto_reload_files_are_stat_once(self) -> None:
+        first = self.guide.last_modified
+        html = self.guide.render()
+        with mock.patch.object(Path, "stat", side_effect=AssertionError("stat again")):
+            self.assertEqual(self.guide.last_modified, first)
+            self.assertEqual(self.guide.render(), html)
+
+    def test_collectguides_manifest_skips_markdown_at_request_time(self) -> None:
+        manifest = Path(self.tmp.name) / "out" / "guides.json"
+        call_command("collectguides", output=str(manifest), verbosity=0)
+        self.assertTrue(manifest.exists())
+        rendering.reset()
+        guide = get_guides()[0]
+        with override_settings(
+            GUIDES_PRECOMPILED_PATH=str(manifest)
+        ), mock.patch.object(rendering, "render_markdown") as render:
+            self.assertIn("<h1", guide.render())
+        render.assert_not_called()
@@ -3,12 +3,13 @@ from __future__ import annotations
 from dataclasses import asdict
 from typing import Any
 
-import markdown
 from django.conf import settings
 from django.http import Http404
 from django.urls import reverse
 from django.views.generic import TemplateView
 
+from config.conditional import ConditionalGetMixin, latest
+
 from .registry import Guide, get_guide, get_guides
 
 
@@ -19,24 +20,35 @@ def build_canonical_url(request, path: str) -> str:
     return request.build_absolute_uri(path)
 
 
-class GuideListView(TemplateView):
+class GuideListView(ConditionalGetMixin, TemplateView):
     template_name = "guides/list.html"
 
+    def get_validators(self) -> tuple[list[Any], Any]:
+        guides = get_guides()
+        last_modified = latest(*(guide.last_modified for guide in guides))
+        return [*(guide.slug for guide in guides), last_modified], last_modified
+
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         guides = get_guides()
         context.update(
             {
                 "guides": guides,
-                "canonical_url": build_canonical_url(self.request, reverse("guides:list")),
+                "canonical_url": build_canonical_url(
+                    self.request, reverse("guides:list")
+                ),
             }
         )
         return context
 
 
-class GuideDetailView(TemplateView):
+class GuideDetailView(ConditionalGetMixin, TemplateView):
     template_name = "guides/detail.html"
 
+    def get_validators(self) -> tuple[list[Any], Any]:
+        guide = self.get_guide()
+        return [guide.slug, guide.last_modified], guide.last_modified
+
     def get_guide(self) -> Guide:
         slug = self.kwargs.get("slug")
         guide = get_guide(slug)
@@ -47,16 +59,10 @@ class GuideDetailView(TemplateView):
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         guide = self.get_guide()
-        raw_markdown = guide.read()
-        guide_html = markdown.markdown(
-            raw_markdown,
-            extensions=["extra", "toc"],
-            output_format="html5",
-        )
         context.update(
             {
                 "guide": guide,
-                "guide_html": guide_html,
+                "guide_html": guide.render(),
                 "canonical_url": build_canonical_url(
                     self.request, reverse("guides:detail", args=[guide.slug])
                 ),
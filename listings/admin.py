@@ -1,8 +1,17 @@
 from __future__ import annotations
 
+from typing import Any
+
+from django.conf import settings
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpRequest, HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
 
-from .models import Inquiry, InquiryEvent, Listing, ModelSpec, Photo
+from .duplicates import MAX_DISTANCE, find_duplicate_groups
+from .inbox import recount
+from .models import Inquiry, InquiryDelivery, InquiryEvent, Listing, ModelSpec, Photo
 
 
 class PhotoInline(admin.TabularInline):
@@ -43,28 +52,47 @@ class ListingAdmin(admin.ModelAdmin):
     autocomplete_fields = ("seller", "dealer", "spec")
     list_editable = ("status",)
     fieldsets = (
-        (None, {"fields": ("seller", "dealer", "spec", "title", "slug", "description")}),
-        ("Vehicle", {
-            "fields": (
-                "year",
-                "make",
-                "model",
-                "trim",
-                "price",
-                "mileage_km",
-                "drivetrain",
-                "dc_fast_charge_type",
-                "range_km",
-                "battery_capacity_kwh",
-                "battery_warranty_years",
-                "battery_warranty_km",
-                "has_heat_pump",
-                "vin",
-                "tags",
-            )
-        }),
+        (
+            None,
+            {"fields": ("seller", "dealer", "spec", "title", "slug", "description")},
+        ),
+        (
+            "Vehicle",
+            {
+                "fields": (
+                    "year",
+                    "make",
+                    "model",
+                    "trim",
+                    "price",
+                    "mileage_km",
+                    "drivetrain",
+                    "dc_fast_charge_type",
+                    "range_km",
+                    "battery_capacity_kwh",
+                    "battery_warranty_years",
+                    "battery_warranty_km",
+                    "has_heat_pump",
+                    "vin",
+                    "tags",
+                )
+            },
+        ),
         ("Location", {"fields": ("province", "city")}),
-        ("Status", {"fields": ("status", "is_promoted", "featured_until", "expires_at", "approved_at", "rejected_at", "published_at")}),
+        (
+            "Status",
+            {
+                "fields": (
+                    "status",
+                    "is_promoted",
+                    "featured_until",
+                    "expires_at",
+                    "approved_at",
+                    "rejected_at",
+                    "published_at",
+                )
+            },
+        ),
         ("Timestamps", {"fields": ("created_at", "updated_at")}),
     )
 
@@ -73,7 +101,43 @@ class ListingAdmin(admin.ModelAdmin):
 class PhotoAdmin(admin.ModelAdmin):
     list_display = ("listing", "sort_order", "is_primary")
     list_editable = ("sort_order", "is_primary")
-    search_fields = ("listing__title", "listing__seller__email")
+    search_fields = ("listing__title", "listing__seller__email", "sha256")
+
+    def get_urls(self):
+        urls = [
+            path(
+                "duplicates/",
+                self.admin_site.admin_view(self.duplicates_view),
+                name="listings_photo_duplicates",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def duplicates_view(self, request: HttpRequest) -> HttpResponse:
+        """Look-alike photos on listings of different sellers (re-uploaded or copied images)."""
+
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            distance = int(
+                request.GET.get("distance")
+                or getattr(settings, "PHOTO_DUPLICATE_DISTANCE", 6)
+            )
+        except ValueError:
+            distance = int(getattr(settings, "PHOTO_DUPLICATE_DISTANCE", 6))
+        distance = min(max(distance, 0), MAX_DISTANCE)
+        groups = find_duplicate_groups(distance)
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Near-duplicate photos across sellers",
+            "groups": groups,
+            "distance": distance,
+            "max_distance": MAX_DISTANCE,
+        }
+        return TemplateResponse(
+            request, "admin/listings/photo/duplicates.html", context
+        )
 
 
 class InquiryEventInline(admin.TabularInline):
@@ -84,21 +148,72 @@ class InquiryEventInline(admin.TabularInline):
     ordering = ("-created_at",)
 
 
+class InquiryDeliveryInline(admin.StackedInline):
+    model = InquiryDelivery
+    extra = 0
+    readonly_fields = (
+        "status",
+        "attempts",
+        "available_at",
+        "last_error",
+        "created_at",
+        "updated_at",
+    )
+    can_delete = False
+
 
 @admin.register(Inquiry)
 class InquiryAdmin(admin.ModelAdmin):
-    list_display = ("listing", "email", "status", "delivery_status", "created_at", "responded_at")
+    list_display = (
+        "listing",
+        "email",
+        "status",
+        "delivery_status",
+        "created_at",
+        "responded_at",
+    )
     list_filter = ("status", "delivery_status", "created_at")
     search_fields = ("email", "name", "listing__title")
-    readonly_fields = ("created_at", "updated_at", "responded_at", "delivery_status", "delivery_reference", "delivery_error", "delivered_at", "last_attempted_at", "seller_notified_at")
-    inlines = (InquiryEventInline,)
+    readonly_fields = (
+        "created_at",
+        "updated_at",
+        "responded_at",
+        "delivery_status",
+        "delivery_reference",
+        "delivery_error",
+        "delivered_at",
+        "last_attempted_at",
+        "seller_notified_at",
+    )
+    inlines = (InquiryDeliveryInline, InquiryEventInline)
     fieldsets = (
         (None, {"fields": ("listing", "name", "email", "phone_number", "message")}),
-        ("Status", {"fields": ("status", "delivery_status", "delivery_reference", "delivery_error", "delivered_at", "last_attempted_at", "seller_notified_at", "responded_at")}),
+        (
+            "Status",
+            {
+                "fields": (
+                    "status",
+                    "delivery_status",
+                    "delivery_reference",
+                    "delivery_error",
+                    "delivered_at",
+                    "last_attempted_at",
+                    "seller_notified_at",
+                    "responded_at",
+                )
+            },
+        ),
         ("Metadata", {"fields": ("metadata", "internal_notes")}),
         ("Timestamps", {"fields": ("created_at", "updated_at")}),
     )
 
+    def delete_queryset(self, request: HttpRequest, queryset: Any) -> None:
+        # Bulk deletes skip ``Inquiry.delete``; recount the affected badges instead.
+        seller_ids = set(queryset.values_list("listing__seller_id", flat=True))
+        super().delete_queryset(request, queryset)
+        recount(seller_ids)
+
+
 __all__ = [
     "ModelSpecAdmin",
     "ListingAdmin",
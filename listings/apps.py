@@ -2,5 +2,16 @@ from django.apps import AppConfig
 
 
 class ListingsConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'listings'
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "listings"
+
+    def ready(self) -> None:
+        # Connect catalogue and cache invalidation signal receivers.
+        from . import (  # noqa: F401
+            facets,
+            fragments,
+            inbox,
+            percolator,
+            signals,
+            sitemaps,
+        )
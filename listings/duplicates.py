@@ -0,0 +1,118 @@
+"""Near-duplicate photos across sellers.
+
+``Photo.perceptual_hash`` is a 64-bit dHash, so two photos look alike when
+their hashes differ in at most ``PHOTO_DUPLICATE_DISTANCE`` bits. Each hash is
+cut into ``distance + 1`` bands: two hashes within the distance must agree on
+at least one whole band, so candidate pairs come from per-band buckets instead
+of comparing every pair. Photos with equal hashes are collapsed first, so a
+stock image on hundreds of units is compared once. Matching hashes are joined
+into groups, and a group is reported when its photos belong to more than one
+seller.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Any
+
+from django.conf import settings
+
+from .models import Photo
+
+HASH_BITS = 64
+# Each band narrows as the distance grows; past this, buckets hold a large share of all hashes.
+MAX_DISTANCE = 16
+
+
+@dataclass
+class DuplicateGroup:
+    photos: list[Photo] = field(default_factory=list)
+    seller_ids: set[Any] = field(default_factory=set)
+
+    @property
+    def exact(self) -> bool:
+        """True when every photo has the same original bytes."""
+
+        digests = {photo.sha256 for photo in self.photos}
+        return len(digests) == 1 and "" not in digests
+
+
+def hamming(left: int, right: int) -> int:
+    return bin(left ^ right).count("1")
+
+
+def _bands(value: int, count: int) -> list[int]:
+    widths = [
+        HASH_BITS // count + (1 if index < HASH_BITS % count else 0)
+        for index in range(count)
+    ]
+    bands, shift = [], 0
+    for width in widths:
+        bands.append((value >> shift) & ((1 << width) - 1))
+        shift += width
+    return bands
+
+
+def find_duplicate_groups(
+    distance: int | None = None, limit: int = 200
+) -> list[DuplicateGroup]:
+    """Return groups of look-alike photos that span several sellers, the widest first."""
+
+    if distance is None:
+        distance = int(getattr(settings, "PHOTO_DUPLICATE_DISTANCE", 6))
+    distance = min(max(distance, 0), MAX_DISTANCE)
+
+    photos_by_hash: dict[str, list[tuple[Any, Any]]] = defaultdict(list)
+    rows = Photo.objects.exclude(perceptual_hash="").values_list(
+        "pk", "perceptual_hash", "listing__seller_id"
+    )
+    for pk, value, seller_id in rows.iterator():
+        photos_by_hash[value].append((pk, seller_id))
+    hashes = list(photos_by_hash)
+    values = [int(value, 16) for value in hashes]
+
+    parent = list(range(len(hashes)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    bands = [_bands(value, distance + 1) for value in values]
+    for band in range(distance + 1):
+        buckets: dict[int, list[int]] = defaultdict(list)
+        for index, value_bands in enumerate(bands):
+            buckets[value_bands[band]].append(index)
+        for members in buckets.values():
+            for left, right in combinations(members, 2):
+                if hamming(values[left], values[right]) <= distance:
+                    parent[find(left)] = find(right)
+
+    members_by_root: dict[int, list[tuple[Any, Any]]] = defaultdict(list)
+    for index, value in enumerate(hashes):
+        members_by_root[find(index)].extend(photos_by_hash[value])
+    candidates = [
+        members
+        for members in members_by_root.values()
+        if len({seller for _, seller in members}) > 1
+    ]
+    candidates.sort(
+        key=lambda members: (-len({seller for _, seller in members}), -len(members))
+    )
+    candidates = candidates[:limit]
+
+    photos = Photo.objects.select_related("listing__seller").in_bulk(
+        [pk for members in candidates for pk, _ in members]
+    )
+    groups = []
+    for members in candidates:
+        group = DuplicateGroup(seller_ids={seller for _, seller in members})
+        group.photos = sorted(
+            (photos[pk] for pk, _ in members if pk in photos),
+            key=lambda photo: photo.pk,
+        )
+        groups.append(group)
+    return groups
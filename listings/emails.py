@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
-import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.urls import reverse
+
+from config.aws import get_client
 
 if TYPE_CHECKING:  # pragma: no cover - typing only
-    from .models import Inquiry
+    from .models import Inquiry, Listing, SavedSearch
+
+# Listings shown per saved search in a digest; the rest are summarised as a count.
+DIGEST_LISTINGS_PER_SEARCH = 10
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +54,78 @@ def send_inquiry_notification(inquiry: "Inquiry") -> tuple[bool, dict[str, Any]]
     return _send_with_backend(subject, message, recipients)
 
 
-def _send_with_backend(subject: str, message: str, recipients: list[str]) -> tuple[bool, dict[str, Any]]:
+def build_saved_search_digest(
+    email: str, groups: list[tuple["SavedSearch", list["Listing"]]]
+) -> tuple[str, str, list[str]]:
+    total = sum(len(listings) for _, listings in groups)
+    site_url = getattr(settings, "SITE_BASE_URL", "").rstrip("/")
+    subject = (
+        f"{total} new listing{'s' if total != 1 else ''} match your saved searches"
+    )
+    message_lines = ["New listings on EV Marketplace match your saved searches.", ""]
+    for saved_search, listings in groups:
+        message_lines.append(f"{saved_search.name or saved_search.summary()}:")
+        for listing in listings[:DIGEST_LISTINGS_PER_SEARCH]:
+            url = site_url + reverse("listings:detail", args=[listing.slug])
+            message_lines.append(
+                f"- {listing.title or listing}, ${listing.price:,.0f} ({listing.city or listing.province}) {url}"
+            )
+        if len(listings) > DIGEST_LISTINGS_PER_SEARCH:
+            message_lines.append(
+                f"- and {len(listings) - DIGEST_LISTINGS_PER_SEARCH} more"
+            )
+        message_lines.append("")
+    message_lines.append(
+        f"Manage your saved searches at {site_url}{reverse('listings:list')}"
+    )
+    return subject, "\n".join(message_lines), [email] if email else []
+
+
+def send_bulk_notifications(
+    messages: list[tuple[str, str, list[str]]],
+) -> list[tuple[bool, dict[str, Any]]]:
+    """Send several notifications over one backend connection (or the shared SES client)."""
+
+    if getattr(settings, "SES_ENABLED", False):
+        return [
+            _send_with_ses(subject, message, recipients)
+            for subject, message, recipients in messages
+        ]
+    try:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+    except Exception as exc:  # pragma: no cover - backend specific
+        logger.warning("Unable to open email connection", exc_info=exc)
+        return [(False, {"error": str(exc), "backend": settings.EMAIL_BACKEND})] * len(
+            messages
+        )
+    results: list[tuple[bool, dict[str, Any]]] = []
+    try:
+        for subject, message, recipients in messages:
+            email = EmailMessage(
+                subject,
+                message,
+                settings.DEFAULT_FROM_EMAIL,
+                recipients,
+                connection=connection,
+            )
+            try:
+                email.send(fail_silently=False)
+            except Exception as exc:  # pragma: no cover - backend specific
+                logger.warning("Error sending email via Django backend", exc_info=exc)
+                results.append(
+                    (False, {"error": str(exc), "backend": settings.EMAIL_BACKEND})
+                )
+            else:
+                results.append((True, {"backend": settings.EMAIL_BACKEND}))
+    finally:
+        connection.close()
+    return results
+
+
+def _send_with_backend(
+    subject: str, message: str, recipients: list[str]
+) -> tuple[bool, dict[str, Any]]:
     try:
         send_mail(
             subject,
@@ -64,12 +140,15 @@ def _send_with_backend(subject: str, message: str, recipients: list[str]) -> tup
     return True, {"backend": settings.EMAIL_BACKEND}
 
 
-def _send_with_ses(subject: str, message: str, recipients: list[str]) -> tuple[bool, dict[str, Any]]:
+def _send_with_ses(
+    subject: str, message: str, recipients: list[str]
+) -> tuple[bool, dict[str, Any]]:
     region = getattr(settings, "AWS_DEFAULT_REGION", "us-east-1") or "us-east-1"
-    source = getattr(settings, "SES_VERIFIED_FROM_EMAIL", "") or settings.DEFAULT_FROM_EMAIL
-    session = boto3.session.Session()
-    client = session.client("ses", region_name=region)
+    source = (
+        getattr(settings, "SES_VERIFIED_FROM_EMAIL", "") or settings.DEFAULT_FROM_EMAIL
+    )
     try:
+        client = get_client("ses", region_name=region)
         response = client.send_email(
             Source=source,
             Destination={"ToAddresses": recipients},
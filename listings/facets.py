@@ -0,0 +1,171 @@
+"""Cached facet counts for the catalogue sidebar.
+
+Counts are disjunctive: each facet is counted with every active filter
+except its own, so picking one make still shows how many listings the other
+makes would add. Results are cached per filter context under a version token
+that is replaced whenever a listing enters, leaves or changes inside the
+active set (see ``listings.signals.catalogue_changed``). A warm sidebar
+costs no queries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from typing import Any, Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, QuerySet
+from django.dispatch import receiver
+
+from .filters import CHOICE_FILTERS, apply_listing_filters
+from .signals import catalogue_changed
+
+VERSION_KEY = "listing-facets:version"
+
+# (label, lowest year, highest year), inclusive.
+YEAR_BUCKETS: tuple[tuple[str, int | None, int | None], ...] = (
+    ("2017 and older", None, 2017),
+    ("2018–2019", 2018, 2019),
+    ("2020–2021", 2020, 2021),
+    ("2022–2023", 2022, 2023),
+    ("2024 and newer", 2024, None),
+)
+# (label, lowest price inclusive, highest price exclusive).
+PRICE_BUCKETS: tuple[tuple[str, int | None, int | None], ...] = (
+    ("Under $30k", None, 30000),
+    ("$30k–$45k", 30000, 45000),
+    ("$45k–$60k", 45000, 60000),
+    ("$60k–$80k", 60000, 80000),
+    ("$80k and up", 80000, None),
+)
+
+
+def _timeout() -> int:
+    return int(getattr(settings, "LISTING_FACET_CACHE_TIMEOUT", 300))
+
+
+def facet_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return str(version)
+
+
+def invalidate_facets() -> None:
+    """Retire every cached facet result by replacing the version token."""
+
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+@receiver(catalogue_changed, dispatch_uid="listings.facets.invalidate")
+def invalidate_on_catalogue_change(sender: Any, **kwargs: Any) -> None:
+    invalidate_facets()
+    # Bump again after commit so a reader that recomputed mid-transaction
+    # cannot keep pre-commit counts alive until the timeout.
+    transaction.on_commit(invalidate_facets)
+
+
+def _active_listings() -> QuerySet:
+    from .models import Listing
+
+    return Listing.objects.active().order_by()
+
+
+def _bucket_counts(
+    queryset: QuerySet, field: str, buckets: tuple, *, upper_inclusive: bool
+) -> list[dict[str, Any]]:
+    aggregates = {}
+    for index, (_, low, high) in enumerate(buckets):
+        condition = Q()
+        if low is not None:
+            condition &= Q(**{f"{field}__gte": low})
+        if high is not None:
+            condition &= Q(
+                **{f"{field}__lte" if upper_inclusive else f"{field}__lt": high}
+            )
+        aggregates[f"bucket_{index}"] = Count("pk", filter=condition)
+    counts = queryset.aggregate(**aggregates)
+    return [
+        {"label": label, "min": low, "max": high, "count": counts[f"bucket_{index}"]}
+        for index, (label, low, high) in enumerate(buckets)
+    ]
+
+
+def compute_facets(filters: Mapping[str, Any]) -> dict[str, Any]:
+    """Run the facet queries for ``filters`` (one per facet, uncached)."""
+
+    base = _active_listings()
+    facets: dict[str, Any] = {}
+    for key, field in CHOICE_FILTERS.items():
+        rows = (
+            apply_listing_filters(base, filters, skip=(key,))
+            .exclude(**{field: ""})
+            .values(field)
+            .annotate(count=Count("pk"))
+        )
+        facets[key] = {row[field]: row["count"] for row in rows}
+    facets["years"] = _bucket_counts(
+        apply_listing_filters(base, filters, skip=("year_min", "year_max")),
+        "year",
+        YEAR_BUCKETS,
+        upper_inclusive=True,
+    )
+    facets["prices"] = _bucket_counts(
+        apply_listing_filters(base, filters, skip=("price_min", "price_max")),
+        "price",
+        PRICE_BUCKETS,
+        upper_inclusive=False,
+    )
+    return facets
+
+
+def _filters_digest(filters: Mapping[str, Any]) -> str:
+    normalized = {
+        key: sorted(value) if isinstance(value, list) else value
+        for key, value in filters.items()
+        if value not in (None, "", [])
+    }
+    raw = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_facets(filters: Mapping[str, Any]) -> dict[str, Any]:
+    """Return facet counts for the current filter context, from cache when possible."""
+
+    key = f"listing-facets:{facet_version()}:{_filters_digest(filters)}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filters)
+        cache.set(key, facets, _timeout())
+    return facets
+
+
+def get_catalogue_options() -> dict[str, Any]:
+    """Return the unfiltered makes, model years and price range for the sidebar."""
+
+    key = f"listing-options:{facet_version()}"
+    options = cache.get(key)
+    if options is None:
+        base = _active_listings()
+        options = {
+            "makes": list(
+                base.exclude(make="")
+                .values_list("make", flat=True)
+                .order_by("make")
+                .distinct()
+            ),
+            "years": list(
+                base.exclude(year__isnull=True)
+                .values_list("year", flat=True)
+                .order_by("-year")
+                .distinct()
+            ),
+            "prices": base.aggregate(min=Min("price"), max=Max("price")),
+        }
+        cache.set(key, options, _timeout())
+    return options
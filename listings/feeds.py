@@ -0,0 +1,662 @@
+"""Dealer inventory feed import.
+
+A feed is a CSV, JSON-lines or XML file (one ``<vehicle>`` element per unit)
+read from disk or a URL as a stream. Rows are matched to the dealer's
+existing listings by VIN, then by stock number, and applied in chunks:
+unmatched rows become listings through ``bulk_create`` (slugs from
+``config.slugs.allocate_slugs``), matched rows are written with
+``bulk_update``, and feed-managed listings missing from the feed are
+archived. Because the bulk operations skip ``Listing.save``, each chunk
+refreshes the search index, the detail fragments and the catalogue signal
+itself.
+
+Each listing stores a fingerprint of its feed-owned fields and photo URLs.
+A row whose fingerprint matches is skipped without a write, so an unchanged
+unit keeps its ``updated_at`` and fires no invalidation; a changed row writes
+only the columns that differ. Photo URLs of new and changed rows are handed
+to ``listings.photos`` after each chunk commits.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import hashlib
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator
+from urllib.parse import urlparse
+
+import requests
+from defusedxml import DefusedXmlException, ElementTree
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from config.slugs import allocate_slugs, slug_base
+
+from .fragments import invalidate_listings
+from .models import ChargePort, Drivetrain, Listing, ListingStatus, Province
+from .photos import PhotoIngester
+from .search import SEARCH_DOCUMENT_FIELDS, build_search_document, get_search_backend
+from .signals import notify_catalogue_changed
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl", "xml")
+# Listing fields the feed owns; everything else (status, tags, spec, promotion) stays with the site.
+FEED_FIELDS = (
+    "title",
+    "description",
+    "year",
+    "make",
+    "model",
+    "trim",
+    "price",
+    "mileage_km",
+    "exterior_color",
+    "interior_color",
+    "province",
+    "city",
+    "drivetrain",
+    "dc_fast_charge_type",
+    "range_km",
+    "battery_capacity_kwh",
+    "vin",
+    "stock_number",
+)
+FIELD_ALIASES = {
+    "stock": "stock_number",
+    "stock_no": "stock_number",
+    "stocknumber": "stock_number",
+    "mileage": "mileage_km",
+    "odometer": "mileage_km",
+    "odometer_km": "mileage_km",
+    "color": "exterior_color",
+    "charge_type": "dc_fast_charge_type",
+    "range": "range_km",
+    "battery_kwh": "battery_capacity_kwh",
+    "photo": "photos",
+    "photo_urls": "photos",
+    "images": "photos",
+    "image_urls": "photos",
+}
+XML_ROW_TAG = "vehicle"
+MAX_REPORTED_ERRORS = 20
+
+
+class FeedError(Exception):
+    """Raised when a feed cannot be read at all."""
+
+
+@dataclass
+class FeedImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    archived: int = 0
+    skipped: int = 0
+    photos: int = 0
+    elapsed: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "rows_per_second": round(self.rows_per_second, 1)}
+
+
+def detect_format(source: str, fmt: str | None = None) -> str:
+    if fmt:
+        if fmt not in FORMATS:
+            raise FeedError(f"Unknown feed format {fmt!r}")
+        return fmt
+    suffix = Path(urlparse(source).path).suffix.lower().lstrip(".")
+    detected = {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl", "xml": "xml"}.get(
+        suffix
+    )
+    if detected is None:
+        raise FeedError(f"Cannot tell the format of {source!r}; pass it explicitly")
+    return detected
+
+
+@contextmanager
+def open_feed(source: str) -> Iterator[IO[bytes]]:
+    """Yield a binary stream over a local path, ``file://`` URL or HTTP(S) URL."""
+
+    parsed = urlparse(source)
+    if parsed.scheme in ("http", "https"):
+        timeout = int(getattr(settings, "DEALER_FEED_TIMEOUT", 30))
+        try:
+            response = requests.get(source, stream=True, timeout=timeout)
+            response.raise_for_status()
+        except requests.RequestException as exc:
+            raise FeedError(f"Could not fetch {source}: {exc}") from exc
+        response.raw.decode_content = True
+        try:
+            yield response.raw
+        finally:
+            response.close()
+        return
+    path = Path(parsed.path if parsed.scheme == "file" else source)
+    try:
+        stream = path.open("rb")
+    except OSError as exc:
+        raise FeedError(f"Could not open {path}: {exc}") from exc
+    with stream:
+        yield stream
+
+
+def read_rows(stream: IO[bytes], fmt: str) -> Iterator[dict[str, Any]]:
+    """Yield raw rows (field name -> value) from a feed stream without loading it whole."""
+
+    if fmt == "xml":
+        # Only child elements of <vehicle> are read; defusedxml rejects entity declarations and external references.
+        for _, element in ElementTree.iterparse(stream, events=("end",)):
+            if element.tag == XML_ROW_TAG:
+                row: dict[str, Any] = {}
+                for child in element:
+                    # <photos><photo>..</photo></photos> and repeated elements become lists.
+                    value = (
+                        [(item.text or "").strip() for item in child]
+                        if len(child)
+                        else (child.text or "").strip()
+                    )
+                    if child.tag in row:
+                        previous = row[child.tag]
+                        value = (
+                            previous if isinstance(previous, list) else [previous]
+                        ) + (value if isinstance(value, list) else [value])
+                    row[child.tag] = value
+                yield row
+                element.clear()
+        return
+    text = codecs.getreader("utf-8-sig")(stream)
+    if fmt == "csv":
+        yield from csv.DictReader(text)
+        return
+    for number, line in enumerate(text, start=1):
+        if line.strip():
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield {"__error__": f"line {number}: invalid JSON ({exc})"}
+                continue
+            yield (
+                row
+                if isinstance(row, dict)
+                else {"__error__": f"line {number}: not an object"}
+            )
+
+
+def _text(value: Any, max_length: int) -> str:
+    return " ".join(str(value or "").split())[:max_length]
+
+
+def _int(value: Any, name: str, *, required: bool = False) -> int | None:
+    if value in (None, ""):
+        if required:
+            raise ValueError(f"{name} is required")
+        return None
+    try:
+        number = int(Decimal(str(value).replace(",", "")))
+    except (InvalidOperation, ValueError) as exc:
+        raise ValueError(f"{name} is not a number: {value!r}") from exc
+    if number < 0:
+        raise ValueError(f"{name} is negative")
+    return number
+
+
+def _decimal(value: Any, name: str, *, required: bool = False) -> Decimal | None:
+    if value in (None, ""):
+        if required:
+            raise ValueError(f"{name} is required")
+        return None
+    try:
+        number = Decimal(str(value).replace(",", "").replace("$", "").strip()).quantize(
+            Decimal("0.01")
+        )
+    except InvalidOperation as exc:
+        raise ValueError(f"{name} is not a number: {value!r}") from exc
+    if number < 0:
+        raise ValueError(f"{name} is negative")
+    return number
+
+
+def _choice(value: Any, choices: Any, name: str) -> str:
+    raw = str(value or "").strip()
+    if not raw:
+        return ""
+    for choice_value, label in choices.choices:
+        if raw.lower() in (str(choice_value).lower(), str(label).lower()):
+            return choice_value
+    raise ValueError(f"{name} {raw!r} is not one of {', '.join(choices.values)}")
+
+
+def row_keys(raw: dict[str, Any]) -> tuple[str, str]:
+    """Return the normalized ``(vin, stock_number)`` of a raw row."""
+
+    row = {
+        FIELD_ALIASES.get(str(key).strip().lower(), str(key).strip().lower()): value
+        for key, value in raw.items()
+    }
+    return _text(row.get("vin"), 17).upper(), _text(row.get("stock_number"), 64)
+
+
+def normalize_row(raw: dict[str, Any], dealer: Any) -> dict[str, Any]:
+    """Return the feed-owned Listing fields of one row, raising ``ValueError`` for unusable rows."""
+
+    if "__error__" in raw:
+        raise ValueError(raw["__error__"])
+    row = {
+        FIELD_ALIASES.get(str(key).strip().lower(), str(key).strip().lower()): value
+        for key, value in raw.items()
+    }
+    vin, stock_number = row_keys(raw)
+    if not vin and not stock_number:
+        raise ValueError("row has neither a VIN nor a stock number")
+    make = _text(row.get("make"), 120)
+    model = _text(row.get("model"), 120)
+    if not make or not model:
+        raise ValueError("make and model are required")
+    year = _int(row.get("year"), "year", required=True)
+    trim = _text(row.get("trim"), 120)
+    province = _choice(row.get("province") or dealer.province, Province, "province")
+    if not province:
+        raise ValueError("province is required")
+    return {
+        "title": _text(row.get("title"), 255)
+        or " ".join(str(part) for part in (year, make, model, trim) if part),
+        "description": str(row.get("description") or "").strip(),
+        "year": year,
+        "make": make,
+        "model": model,
+        "trim": trim,
+        "price": _decimal(row.get("price"), "price", required=True),
+        "mileage_km": _int(row.get("mileage_km"), "mileage_km") or 0,
+        "exterior_color": _text(row.get("exterior_color"), 120),
+        "interior_color": _text(row.get("interior_color"), 120),
+        "province": province,
+        "city": _text(row.get("city") or dealer.city, 120),
+        "drivetrain": _choice(row.get("drivetrain"), Drivetrain, "drivetrain"),
+        "dc_fast_charge_type": _choice(
+            row.get("dc_fast_charge_type"), ChargePort, "dc_fast_charge_type"
+        ),
+        "range_km": _int(row.get("range_km"), "range_km"),
+        "battery_capacity_kwh": _decimal(
+            row.get("battery_capacity_kwh"), "battery_capacity_kwh"
+        ),
+        "vin": vin,
+        "stock_number": stock_number,
+    }
+
+
+def row_photos(raw: dict[str, Any]) -> list[str]:
+    """Return the photo URLs of a raw row in feed order (a list, or ``|``/whitespace separated text)."""
+
+    row = {
+        FIELD_ALIASES.get(str(key).strip().lower(), str(key).strip().lower()): value
+        for key, value in raw.items()
+    }
+    value = row.get("photos") or []
+    items = value if isinstance(value, list) else re.split(r"[|\s]+", str(value))
+    return list(
+        dict.fromkeys(str(item).strip() for item in items if item and str(item).strip())
+    )
+
+
+def row_fingerprint(row: dict[str, Any], photos: list[str] | None = None) -> str:
+    """Hash the feed-owned fields of a normalized row; equal hashes mean there is nothing to write."""
+
+    owned: dict[str, Any] = {name: row[name] for name in FEED_FIELDS}
+    if photos:
+        owned["photos"] = photos
+    payload = json.dumps(owned, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    chunk: list[Any] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class FeedImporter:
+    """Apply one dealer's feed rows to its listings in chunks of bulk writes."""
+
+    def __init__(
+        self,
+        dealer: Any,
+        *,
+        chunk_size: int | None = None,
+        status: str = ListingStatus.PENDING_REVIEW,
+        archive_missing: bool = True,
+        photos: PhotoIngester | None = None,
+    ) -> None:
+        self.dealer = dealer
+        self.chunk_size = max(
+            int(chunk_size or getattr(settings, "DEALER_FEED_CHUNK_SIZE", 500)), 1
+        )
+        self.status = status
+        self.archive_missing = archive_missing
+        self.photos = photos
+        self.result = FeedImportResult()
+        # Listings a row of this run was applied to, including ones created by it.
+        self.seen_ids: set[Any] = set()
+        # Keys of rows that could not be applied; their listings are never archived.
+        self.kept_keys: set[str] = set()
+
+    def run(self, rows: Iterable[dict[str, Any]]) -> FeedImportResult:
+        started = time.perf_counter()
+        for chunk in _chunks(rows, self.chunk_size):
+            self.apply_chunk(chunk)
+        # A feed in which no row could be applied is treated as broken rather than as an empty lot.
+        if self.archive_missing and self.seen_ids:
+            self.archive_unseen()
+        self.result.elapsed = time.perf_counter() - started
+        logger.info(
+            "Dealer feed %s: %d rows (%d created, %d updated, %d unchanged, %d archived, %d skipped, %d photos) "
+            "at %.0f rows/s",
+            self.dealer.slug,
+            self.result.rows,
+            self.result.created,
+            self.result.updated,
+            self.result.unchanged,
+            self.result.archived,
+            self.result.skipped,
+            self.result.photos,
+            self.result.rows_per_second,
+        )
+        return self.result
+
+    def skip(self, number: int, message: str, raw: dict[str, Any]) -> None:
+        self.result.skipped += 1
+        self.kept_keys.update(key for key in row_keys(raw) if key)
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(f"row {number}: {message}")
+
+    def apply_chunk(self, raw_rows: list[dict[str, Any]]) -> None:
+        rows: list[tuple[int, dict[str, Any], dict[str, Any]]] = []
+        for raw in raw_rows:
+            self.result.rows += 1
+            try:
+                rows.append((self.result.rows, raw, normalize_row(raw, self.dealer)))
+            except ValueError as exc:
+                self.skip(self.result.rows, str(exc), raw)
+        if not rows:
+            return
+
+        with transaction.atomic():
+            existing = self.match([row for _, _, row in rows])
+            now = timezone.now()
+            creates: list[Listing] = []
+            updates: list[Listing] = []
+            changed: set[str] = set()
+            reindex: list[Listing] = []
+            # Rows whose content matches but whose stored fingerprint was missing or stale.
+            stamps: list[Listing] = []
+            # Photos are only looked at for rows that are new or changed (the fingerprint covers their URLs).
+            with_photos: list[tuple[Listing, list[str]]] = []
+            for number, raw, row in rows:
+                keys = [
+                    key
+                    for key in (("vin", row["vin"]), ("stock", row["stock_number"]))
+                    if key[1]
+                ]
+                listing = next((existing[key] for key in keys if key in existing), None)
+                if listing is not None and listing.pk in self.seen_ids:
+                    # Another row of this run already resolved to the same unit.
+                    self.skip(number, "duplicate of an earlier row", raw)
+                    continue
+                sources = (
+                    row_photos(raw)[: self.photos.max_photos] if self.photos else []
+                )
+                digest = row_fingerprint(row, sources)
+                if listing is None:
+                    listing = self.build(row, digest, now)
+                    self.seen_ids.add(listing.pk)
+                    # Later rows of the chunk with the same VIN or stock number resolve to the new unit.
+                    existing.update((key, listing) for key in keys)
+                    creates.append(listing)
+                    with_photos.append((listing, sources))
+                    continue
+                self.seen_ids.add(listing.pk)
+                if listing.feed_fingerprint == digest and not self.returning(listing):
+                    self.result.unchanged += 1
+                    continue
+                listing_changed = self.assign(listing, row, digest, now)
+                with_photos.append((listing, sources))
+                if not listing_changed:
+                    self.result.unchanged += 1
+                    stamps.append(listing)
+                    continue
+                if "search_document" in listing_changed:
+                    reindex.append(listing)
+                changed |= listing_changed
+                updates.append(listing)
+            if stamps:
+                Listing.objects.bulk_update(stamps, ["feed_fingerprint"])
+            self.write(creates, updates, changed, reindex)
+        # Fetched outside the chunk's transaction so slow downloads hold no locks.
+        wanted = {listing.pk: sources for listing, sources in with_photos if sources}
+        if wanted:
+            self.ingest_photos(wanted)
+
+    def ingest_photos(self, wanted: dict[Any, list[str]]) -> None:
+        photos = self.photos.ingest(wanted)
+        self.result.photos += photos.created
+        for error in photos.errors[
+            : max(MAX_REPORTED_ERRORS - len(self.result.errors), 0)
+        ]:
+            self.result.errors.append(error)
+        if photos.failed_listing_ids:
+            # Forget the fingerprint so the next import retries the photos that could not be fetched.
+            Listing.objects.filter(pk__in=photos.failed_listing_ids).update(
+                feed_fingerprint=""
+            )
+
+    def match(self, rows: list[dict[str, Any]]) -> dict[tuple[str, str], Listing]:
+        vins = [row["vin"] for row in rows if row["vin"]]
+        stock_numbers = [row["stock_number"] for row in rows if row["stock_number"]]
+        matched: dict[tuple[str, str], Listing] = {}
+        # Feed VINs are upper-cased; a unit entered by hand may not be.
+        for listing in (
+            Listing.objects.filter(dealer=self.dealer)
+            .alias(vin_key=Upper("vin"))
+            .filter(Q(vin_key__in=vins) | Q(stock_number__in=stock_numbers))
+        ):
+            listing._loaded_active = listing.is_active
+            if listing.vin:
+                matched.setdefault(("vin", listing.vin.upper()), listing)
+            if listing.stock_number:
+                matched.setdefault(("stock", listing.stock_number), listing)
+        return matched
+
+    def build(self, row: dict[str, Any], digest: str, now: Any) -> Listing:
+        listing = Listing(
+            seller_id=self.dealer.user_id,
+            dealer=self.dealer,
+            status=self.status,
+            feed_fingerprint=digest,
+            **row,
+        )
+        listing._loaded_active = False
+        self._publish(listing, now)
+        listing.search_document = build_search_document(listing)
+        listing.feed_imported_at = now
+        return listing
+
+    def returning(self, listing: Listing) -> bool:
+        # Only a unit the feed itself archived comes back; a seller's or the expiry sweep's archive sticks.
+        return (
+            listing.status == ListingStatus.ARCHIVED
+            and listing.feed_archived_at is not None
+        )
+
+    def assign(
+        self, listing: Listing, row: dict[str, Any], digest: str, now: Any
+    ) -> set[str]:
+        """Apply ``row`` to ``listing`` and return the names of the fields that really changed."""
+
+        changed = {
+            name for name, value in row.items() if getattr(listing, name) != value
+        }
+        for name in changed:
+            setattr(listing, name, row[name])
+        if self.returning(listing):
+            listing.status = self.status
+            listing.feed_archived_at = None
+            self._publish(listing, now)
+            changed |= {"status", "feed_archived_at", "approved_at", "published_at"}
+            if listing.expires_at and listing.expires_at <= now:
+                # Otherwise the expiry sweep would archive it again on its next run.
+                listing.expires_at = None
+                changed.add("expires_at")
+        if changed & set(SEARCH_DOCUMENT_FIELDS):
+            listing.search_document = build_search_document(listing)
+            changed.add("search_document")
+        listing.feed_fingerprint = digest
+        if changed:
+            listing.feed_imported_at = now
+            listing.updated_at = now
+        return changed
+
+    def _publish(self, listing: Listing, now: Any) -> None:
+        if listing.status == ListingStatus.APPROVED:
+            listing.approved_at = listing.approved_at or now
+            listing.published_at = listing.published_at or now
+
+    def write(
+        self,
+        creates: list[Listing],
+        updates: list[Listing],
+        changed: set[str],
+        reindex: list[Listing],
+    ) -> None:
+        if creates:
+            self.create(creates)
+        if updates:
+            # Only columns that changed somewhere in the chunk; each one costs a CASE over every row.
+            Listing.objects.bulk_update(
+                updates,
+                sorted(
+                    changed | {"feed_fingerprint", "feed_imported_at", "updated_at"}
+                ),
+            )
+        self.result.created += len(creates)
+        self.result.updated += len(updates)
+
+        touched = creates + updates
+        if not touched:
+            return
+        get_search_backend().index(creates + reindex)
+        invalidate_listings([listing.pk for listing in updates])
+        activated = [
+            listing.pk
+            for listing in touched
+            if listing.is_active and not listing._loaded_active
+        ]
+        notify_catalogue_changed(
+            [
+                listing.pk
+                for listing in touched
+                if listing.is_active or listing._loaded_active
+            ],
+            activated=activated,
+        )
+        for listing in touched:
+            listing._loaded_active = listing.is_active
+
+    def create(self, listings: list[Listing]) -> None:
+        bases = [
+            slug_base(listing.title or f"{listing.make}-{listing.model}-{listing.year}")
+            for listing in listings
+        ]
+        for attempt in range(2):
+            for listing, slug in zip(listings, allocate_slugs(Listing, bases)):
+                listing.slug = slug
+            try:
+                with transaction.atomic():
+                    Listing.objects.bulk_create(listings)
+                return
+            except IntegrityError:
+                # Another writer took one of the slugs between allocation and insert.
+                if attempt:
+                    raise
+
+    def archive_unseen(self) -> None:
+        candidates = (
+            Listing.objects.filter(dealer=self.dealer, feed_imported_at__isnull=False)
+            .exclude(status__in=(ListingStatus.ARCHIVED, ListingStatus.REJECTED))
+            .values_list("pk", "status", "vin", "stock_number")
+        )
+        missing = [
+            (pk, status)
+            for pk, status, vin, stock_number in candidates
+            if pk not in self.seen_ids
+            and not ({vin.upper(), stock_number} & self.kept_keys)
+        ]
+        for chunk in _chunks(missing, self.chunk_size):
+            ids = [pk for pk, _ in chunk]
+            with transaction.atomic():
+                now = timezone.now()
+                self.result.archived += Listing.objects.filter(pk__in=ids).update(
+                    status=ListingStatus.ARCHIVED,
+                    published_at=None,
+                    is_promoted=False,
+                    feed_archived_at=now,
+                    updated_at=now,
+                )
+                deactivated = [
+                    pk for pk, status in chunk if status == ListingStatus.APPROVED
+                ]
+                notify_catalogue_changed(deactivated, deactivated=deactivated)
+                invalidate_listings(ids)
+
+
+def import_feed(
+    dealer: Any,
+    source: str,
+    *,
+    fmt: str | None = None,
+    chunk_size: int | None = None,
+    status: str = ListingStatus.PENDING_REVIEW,
+    archive_missing: bool = True,
+    photos: bool = True,
+) -> FeedImportResult:
+    """Stream ``source`` into ``dealer``'s listings and return the import counts."""
+
+    fmt = detect_format(source, fmt)
+    importer = FeedImporter(
+        dealer,
+        chunk_size=chunk_size,
+        status=status,
+        archive_missing=archive_missing,
+        photos=PhotoIngester(base=source) if photos else None,
+    )
+    with open_feed(source) as stream:
+        try:
+            return importer.run(read_rows(stream, fmt))
+        except (
+            ElementTree.ParseError,
+            DefusedXmlException,
+            csv.Error,
+            UnicodeDecodeError,
+        ) as exc:
+            raise FeedError(f"Could not parse {source} as {fmt}: {exc}") from exc
@@ -0,0 +1,106 @@
+"""Catalogue filter parsing and application shared by views, facets and saved searches."""
+
+from __future__ import annotations
+
+from decimal import Decimal, InvalidOperation
+from typing import Any, Iterable, Mapping
+
+from django.db.models import QuerySet
+from django.http import QueryDict
+
+from .search import get_search_backend
+
+# Filter key -> model field for the multi-value ("IN") filters.
+CHOICE_FILTERS = {
+    "makes": "make",
+    "provinces": "province",
+    "drivetrains": "drivetrain",
+    "charge_types": "dc_fast_charge_type",
+}
+# Filter key -> query-string parameter for the multi-value filters.
+CHOICE_PARAMS = {
+    "makes": "make",
+    "provinces": "province",
+    "drivetrains": "drivetrain",
+    "charge_types": "charge_type",
+}
+RANGE_FILTERS = {
+    "year": ("year_min", "year_max"),
+    "price": ("price_min", "price_max"),
+}
+
+
+def _as_int(value: Any) -> int | None:
+    if not value:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_decimal(value: Any) -> Decimal | None:
+    if not value:
+        return None
+    try:
+        return Decimal(value)
+    except (TypeError, ValueError, InvalidOperation):
+        return None
+
+
+def parse_listing_filters(params: QueryDict | Mapping[str, Any]) -> dict[str, Any]:
+    """Return normalized filter values from a query string (or saved-search params)."""
+
+    def getlist(name: str) -> list[str]:
+        if isinstance(params, QueryDict):
+            raw = params.getlist(name)
+        else:
+            value = params.get(name)
+            raw = value if isinstance(value, (list, tuple)) else [value]
+        return [
+            str(value).strip()
+            for value in raw
+            if value not in (None, "") and str(value).strip()
+        ]
+
+    def get(name: str) -> str:
+        values = getlist(name)
+        return values[-1] if values else ""
+
+    return {
+        "query": get("q"),
+        "dealer": get("dealer"),
+        "makes": getlist("make"),
+        "provinces": getlist("province"),
+        "drivetrains": getlist("drivetrain"),
+        "charge_types": getlist("charge_type"),
+        "year_min": _as_int(get("year_min")),
+        "year_max": _as_int(get("year_max")),
+        "price_min": _as_decimal(get("price_min")),
+        "price_max": _as_decimal(get("price_max")),
+    }
+
+
+def apply_listing_filters(
+    queryset: QuerySet, filters: Mapping[str, Any], *, skip: Iterable[str] = ()
+) -> QuerySet:
+    """Apply catalogue filters to ``queryset``, leaving out the keys named in ``skip``.
+
+    Keyword search is applied as a filter only; callers that need relevance
+    ordering annotate the rank themselves.
+    """
+
+    skipped = set(skip)
+    if filters.get("dealer") and "dealer" not in skipped:
+        queryset = queryset.filter(dealer__slug=filters["dealer"])
+    for key, field in CHOICE_FILTERS.items():
+        if filters.get(key) and key not in skipped:
+            queryset = queryset.filter(**{f"{field}__in": filters[key]})
+    for field, (min_key, max_key) in RANGE_FILTERS.items():
+        if filters.get(min_key) and min_key not in skipped:
+            queryset = queryset.filter(**{f"{field}__gte": filters[min_key]})
+        if filters.get(max_key) and max_key not in skipped:
+            queryset = queryset.filter(**{f"{field}__lte": filters[max_key]})
+    if filters.get("query") and "query" not in skipped:
+        queryset = get_search_backend().filter(queryset, filters["query"])
+    return queryset
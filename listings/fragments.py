@@ -0,0 +1,140 @@
+"""Cached fragments of the public listing detail page.
+
+The JSON-LD, photo carousel, spec cards and dealer card are identical for every
+visitor, so they are rendered once and cached together. The key combines
+``Listing.updated_at`` with two version tokens: one per listing, replaced when
+the listing or any of its photos is saved or deleted, and one per dealer,
+replaced when the dealer profile is saved. The inquiry form (CSRF token,
+prefilled contact details) and the rest of the page stay per-request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import uuid
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+
+from .schema import dumps_vehicle_schema
+
+LISTING_VERSION_KEY = "listing-detail:{}:version"
+DEALER_VERSION_KEY = "dealer-detail:{}:version"
+
+
+def _timeout() -> int:
+    return int(getattr(settings, "LISTING_DETAIL_CACHE_TIMEOUT", 3600))
+
+
+def _versions(*keys: str) -> list[str]:
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, None)
+        found.update(cache.get_many(list(missing)))
+    return [str(found.get(key, "")) for key in keys]
+
+
+def _bump(key: str) -> None:
+    cache.set(key, uuid.uuid4().hex, None)
+    # Bump again after commit so a reader that rendered mid-transaction
+    # cannot keep pre-commit content alive until the timeout.
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+
+
+def invalidate_listing(listing_id: Any) -> None:
+    _bump(LISTING_VERSION_KEY.format(listing_id))
+
+
+def invalidate_listings(listing_ids: Iterable[Any]) -> None:
+    """Bump the detail versions of many listings in one cache round trip (bulk updates skip ``post_save``)."""
+
+    keys = [LISTING_VERSION_KEY.format(listing_id) for listing_id in listing_ids]
+    if not keys:
+        return
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+    transaction.on_commit(
+        lambda: cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+    )
+
+
+def invalidate_dealer(dealer_id: Any) -> None:
+    _bump(DEALER_VERSION_KEY.format(dealer_id))
+
+
+def detail_cache_key(listing: Any, request: HttpRequest) -> str:
+    keys = [LISTING_VERSION_KEY.format(listing.pk)]
+    if listing.dealer_id:
+        keys.append(DEALER_VERSION_KEY.format(listing.dealer_id))
+    parts = [
+        str(listing.pk),
+        listing.updated_at.isoformat() if listing.updated_at else "",
+        *_versions(*keys),
+    ]
+    # Absolute URLs in the JSON-LD depend on the scheme and host of the request.
+    parts.append(request.build_absolute_uri("/"))
+    return "listing-detail:" + hashlib.sha1(":".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_detail_fragments(listing: Any, request: HttpRequest) -> dict[str, str]:
+    """Return ``vehicle_schema_json``, ``detail_main_html`` and ``dealer_card_html`` for ``listing``."""
+
+    key = detail_cache_key(listing, request)
+    fragments = cache.get(key)
+    if fragments is None:
+        prefetch_related_objects([listing], "photos")
+        context = {"listing": listing}
+        fragments = {
+            "vehicle_schema_json": dumps_vehicle_schema(listing, request),
+            "detail_main_html": render_to_string(
+                "listings/partials/detail_main.html", context
+            ),
+            "dealer_card_html": render_to_string(
+                "listings/partials/dealer_card.html", context
+            ),
+        }
+        cache.set(key, fragments, _timeout())
+    return fragments
+
+
+@receiver(
+    post_save,
+    sender="listings.Listing",
+    dispatch_uid="listings.fragments.listing_saved",
+)
+@receiver(
+    post_delete,
+    sender="listings.Listing",
+    dispatch_uid="listings.fragments.listing_deleted",
+)
+def invalidate_on_listing_change(sender: Any, instance: Any, **kwargs: Any) -> None:
+    invalidate_listing(instance.pk)
+
+
+@receiver(
+    post_save, sender="listings.Photo", dispatch_uid="listings.fragments.photo_saved"
+)
+@receiver(
+    post_delete,
+    sender="listings.Photo",
+    dispatch_uid="listings.fragments.photo_deleted",
+)
+def invalidate_on_photo_change(sender: Any, instance: Any, **kwargs: Any) -> None:
+    invalidate_listing(instance.listing_id)
+
+
+@receiver(
+    post_save,
+    sender="dealers.DealerProfile",
+    dispatch_uid="listings.fragments.dealer_saved",
+)
+def invalidate_on_dealer_change(sender: Any, instance: Any, **kwargs: Any) -> None:
+    invalidate_dealer(instance.pk)
@@ -0,0 +1,118 @@
+"""Per-seller unread inquiry counters for the dashboard badge.
+
+``SellerInboxCounter.unread`` is adjusted with ``F()`` updates when an unread
+inquiry is created or deleted and when inquiries are marked read, so reading
+the badge is a primary-key lookup. A deleted listing takes its inquiries with
+it, so its unread ones are subtracted in one step before the cascade. A
+missing row is created from an exact count on first read, and the
+``listings.reconcile_unread_counters`` beat task recounts any seller whose
+counter drifted (e.g. after a queryset ``update()`` that bypassed these
+hooks).
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterable
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Inquiry, Listing, SellerInboxCounter
+
+logger = logging.getLogger(__name__)
+
+
+def unread_inquiries() -> Any:
+    return Inquiry.objects.filter(seller_notified_at__isnull=True)
+
+
+def recount(seller_ids: Iterable[Any]) -> None:
+    """Set the counters of ``seller_ids`` to their exact unread count, creating missing rows."""
+
+    ids = list(seller_ids)
+    if not ids:
+        return
+    SellerInboxCounter.objects.bulk_create(
+        [SellerInboxCounter(seller_id=seller_id) for seller_id in ids],
+        ignore_conflicts=True,
+    )
+    # Counted inside the UPDATE so an inquiry created meanwhile cannot be lost.
+    exact = (
+        unread_inquiries()
+        .filter(listing__seller_id=OuterRef("seller_id"))
+        .order_by()
+        .values("listing__seller_id")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    SellerInboxCounter.objects.filter(seller_id__in=ids).update(
+        unread=Coalesce(Subquery(exact), 0), updated_at=timezone.now()
+    )
+
+
+def adjust_unread(seller_id: Any, delta: int) -> None:
+    # A seller without a row yet is counted exactly on first read, so there is nothing to adjust.
+    if delta and seller_id is not None:
+        SellerInboxCounter.objects.filter(seller_id=seller_id).update(
+            unread=Greatest(F("unread") + delta, 0), updated_at=timezone.now()
+        )
+
+
+def get_unread_count(seller_id: Any) -> int:
+    unread = (
+        SellerInboxCounter.objects.filter(seller_id=seller_id)
+        .values_list("unread", flat=True)
+        .first()
+    )
+    if unread is None:
+        recount([seller_id])
+        unread = (
+            SellerInboxCounter.objects.filter(seller_id=seller_id)
+            .values_list("unread", flat=True)
+            .first()
+        )
+    return int(unread or 0)
+
+
+def reconcile_counters() -> int:
+    """Recount every seller whose counter disagrees with the inquiries table; return how many were fixed."""
+
+    actual = dict(
+        unread_inquiries()
+        .order_by()
+        .values_list("listing__seller_id")
+        .annotate(total=Count("pk"))
+        .values_list("listing__seller_id", "total")
+    )
+    drifted = []
+    for seller_id, unread in SellerInboxCounter.objects.values_list(
+        "seller_id", "unread"
+    ).iterator():
+        if unread != actual.pop(seller_id, 0):
+            drifted.append(seller_id)
+    # Sellers with unread inquiries but no row yet are counted now rather than on their next page view.
+    drifted.extend(actual)
+    for start in range(0, len(drifted), 500):
+        recount(drifted[start : start + 500])
+    if drifted:
+        logger.info("Reconciled %d unread inquiry counters", len(drifted))
+    return len(drifted)
+
+
+@receiver(post_save, sender=Inquiry, dispatch_uid="listings.inbox.inquiry_saved")
+def count_new_inquiry(
+    sender: Any, instance: Inquiry, created: bool, raw: bool = False, **kwargs: Any
+) -> None:
+    if created and not raw and instance.seller_notified_at is None:
+        adjust_unread(instance.listing.seller_id, 1)
+
+
+@receiver(pre_delete, sender=Listing, dispatch_uid="listings.inbox.listing_deleted")
+def uncount_deleted_listing(sender: Any, instance: Listing, **kwargs: Any) -> None:
+    adjust_unread(
+        instance.seller_id, -unread_inquiries().filter(listing=instance).count()
+    )
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+import boto3
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from config.aws import get_client, reset_clients
+
+SES_RESPONSE = (
+    b'<SendEmailResponse xmlns="http://ses.amazonaws.com/doc/2010-12-01/">'
+    b"<SendEmailResult><MessageId>benchmark</MessageId></SendEmailResult>"
+    b"<ResponseMetadata><RequestId>benchmark</RequestId></ResponseMetadata>"
+    b"</SendEmailResponse>"
+)
+
+
+class _StubSESHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(SES_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(SES_RESPONSE)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class Command(BaseCommand):
+    help = "Compare per-call SES latency with a fresh boto3 session per call versus the shared client registry."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args: object, **options: object) -> None:
+        iterations = max(int(options["iterations"]), 1)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubSESHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+        credentials = {
+            "aws_access_key_id": "benchmark",
+            "aws_secret_access_key": "benchmark",
+        }
+
+        def send(client: Any) -> None:
+            client.send_email(
+                Source="bench@example.com",
+                Destination={"ToAddresses": ["seller@example.com"]},
+                Message={
+                    "Subject": {"Data": "Benchmark"},
+                    "Body": {"Text": {"Data": "Benchmark"}},
+                },
+            )
+
+        def per_call_session() -> None:
+            session = boto3.session.Session(**credentials)
+            send(session.client("ses", region_name="us-east-1", endpoint_url=endpoint))
+
+        def shared_client() -> None:
+            send(get_client("ses", region_name="us-east-1", endpoint_url=endpoint))
+
+        try:
+            with override_settings(
+                AWS_ACCESS_KEY_ID="benchmark",
+                AWS_SECRET_ACCESS_KEY="benchmark",
+                AWS_SESSION_TOKEN="",
+            ):
+                reset_clients()
+                before = self._measure(per_call_session, iterations)
+                after = self._measure(shared_client, iterations)
+        finally:
+            reset_clients()
+            server.shutdown()
+            server.server_close()
+
+        for label, timings in (("per-call session", before), ("shared client", after)):
+            self.stdout.write(
+                f"{label:>16}: mean {statistics.fmean(timings):7.2f} ms  "
+                f"p50 {statistics.median(timings):7.2f} ms  "
+                f"p95 {self._percentile(timings, 0.95):7.2f} ms"
+            )
+        speedup = statistics.fmean(before) / max(statistics.fmean(after), 1e-9)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Shared client is {speedup:.1f}x faster per call over {iterations} calls."
+            )
+        )
+
+    def _measure(self, call: Callable[[], None], iterations: int) -> list[float]:
+        call()  # warm imports and the service model loader
+        timings: list[float] = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    @staticmethod
+    def _percentile(values: list[float], fraction: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
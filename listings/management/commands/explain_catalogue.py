@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from listings.filters import apply_listing_filters, parse_listing_filters
+from listings.models import Listing
+from listings.pagination import KEYSET_ORDERING
+
+# Representative catalogue requests (query-string filters); keyword search is planned by the search backend.
+QUERY_SHAPES: dict[str, dict[str, Any]] = {
+    "all": {},
+    "make": {"make": ["Kia"]},
+    "makes": {"make": ["Hyundai", "Kia", "Tesla"]},
+    "province": {"province": ["ON"]},
+    "price-range": {"price_min": "30000", "price_max": "45000"},
+    "price-max": {"price_max": "40000"},
+    "year-range": {"year_min": "2021", "year_max": "2023"},
+    "drivetrain": {"drivetrain": ["AWD"]},
+    "charge-type": {"charge_type": ["CCS", "NACS"]},
+    "make-year-price": {"make": ["Kia"], "year_min": "2022", "price_max": "55000"},
+    "province-price": {"province": ["BC"], "price_max": "50000"},
+    "dealer": {"dealer": "example-motors"},
+}
+
+# Full-table scans as reported by each vendor's EXPLAIN.
+SEQ_SCAN_PATTERNS = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    "sqlite": re.compile(r"\bSCAN (\w+)\b(?! USING)"),
+}
+
+
+def catalogue_queryset(params: dict[str, Any]) -> Any:
+    queryset = apply_listing_filters(
+        Listing.objects.active(), parse_listing_filters(params), skip=("query",)
+    )
+    return queryset.order_by(*KEYSET_ORDERING)
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN representative catalogue queries and fail if any plan scans a whole table."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--shape",
+            action="append",
+            choices=sorted(QUERY_SHAPES),
+            help="Only explain these shapes.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:
+        verbosity = int(options.get("verbosity", 1))
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f"Don't know how to read {connection.vendor} query plans."
+            )
+
+        failures: list[str] = []
+        names = options.get("shape") or list(QUERY_SHAPES)
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Small or unanalyzed tables make a scan the cheapest plan; ask whether an index *can* serve the shape.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for name in names:
+                plan = catalogue_queryset(QUERY_SHAPES[name]).explain()
+                scanned = sorted(set(pattern.findall(plan)))
+                if scanned:
+                    failures.append(f"{name}: sequential scan on {', '.join(scanned)}")
+                if verbosity >= 2 or (scanned and verbosity):
+                    self.stdout.write(f"-- {name}\n{plan}\n")
+
+        if failures:
+            raise CommandError(
+                "Catalogue queries without a usable index:\n" + "\n".join(failures)
+            )
+        if verbosity:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Explained {len(names)} catalogue queries; no sequential scans."
+                )
+            )
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dealers.models import DealerProfile
+from listings.feeds import FORMATS, FeedError, import_feed
+from listings.models import ListingStatus
+from listings.tasks import import_dealer_feed
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a dealer's inventory feed (CSV, JSON lines or XML) from a path or URL."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("dealer", help="Dealer profile slug.")
+        parser.add_argument("source", help="Feed path, file:// or http(s):// URL.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Feed format (default: from the file extension).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=None)
+        parser.add_argument(
+            "--approve",
+            action="store_true",
+            help="Publish new units directly instead of queueing them for review.",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Keep feed listings that are missing from this feed.",
+        )
+        parser.add_argument(
+            "--no-photos",
+            action="store_true",
+            help="Do not fetch the photos listed in the feed.",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="run_async",
+            help="Queue the import on Celery instead.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:
+        verbosity = int(options.get("verbosity", 1))
+        try:
+            dealer = DealerProfile.objects.select_related("user").get(
+                slug=options["dealer"]
+            )
+        except DealerProfile.DoesNotExist as exc:
+            raise CommandError(f"No dealer with slug {options['dealer']!r}") from exc
+        status = (
+            ListingStatus.APPROVED
+            if options["approve"]
+            else ListingStatus.PENDING_REVIEW
+        )
+        kwargs = {
+            "fmt": options["format"],
+            "chunk_size": options["chunk_size"],
+            "status": status,
+            "archive_missing": not options["no_archive"],
+            "photos": not options["no_photos"],
+        }
+
+        if options["run_async"]:
+            import_dealer_feed.delay(dealer.pk, str(options["source"]), **kwargs)
+            if verbosity:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Queued feed import for {dealer.slug}.")
+                )
+            return
+
+        try:
+            result = import_feed(dealer, str(options["source"]), **kwargs)
+        except FeedError as exc:
+            raise CommandError(str(exc)) from exc
+        if verbosity:
+            for error in result.errors:
+                self.stdout.write(self.style.WARNING(error))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Imported {result.rows} rows for {dealer.slug} in {result.elapsed:.2f}s "
+                    f"({result.rows_per_second:.0f} rows/s): {result.created} created, {result.updated} updated, "
+                    f"{result.unchanged} unchanged, {result.archived} archived, {result.skipped} skipped, "
+                    f"{result.photos} photos added."
+                )
+            )
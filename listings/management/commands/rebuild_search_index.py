@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from listings.models import Listing
+from listings.search import (
+    SEARCH_DOCUMENT_FIELDS,
+    build_search_document,
+    get_search_backend,
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute listing search documents and rebuild the keyword search index."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args: object, **options: object) -> None:
+        verbosity = int(options.get("verbosity", 1))
+        batch_size = int(options["batch_size"])
+        backend = get_search_backend()
+
+        updated = 0
+        batch: list[Listing] = []
+        with transaction.atomic():
+            for listing in Listing.objects.only(
+                *SEARCH_DOCUMENT_FIELDS, "search_document"
+            ).iterator(chunk_size=batch_size):
+                document = build_search_document(listing)
+                if document != listing.search_document:
+                    listing.search_document = document
+                    batch.append(listing)
+                if len(batch) >= batch_size:
+                    Listing.objects.bulk_update(batch, ["search_document"])
+                    updated += len(batch)
+                    batch = []
+            if batch:
+                Listing.objects.bulk_update(batch, ["search_document"])
+                updated += len(batch)
+            indexed = backend.rebuild()
+
+        if verbosity:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Refreshed {updated} search documents; indexed {indexed} listings with {type(backend).__name__}."
+                )
+            )
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Iterator
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q, QuerySet
+
+from listings.models import Photo
+from listings.tasks import derivative_spec_fingerprint, process_listing_photo
+
+logger = logging.getLogger(__name__)
+
+
+def _process_photo(photo_id: int) -> dict[str, Any]:
+    try:
+        return process_listing_photo(photo_id)
+    except Exception:
+        logger.exception("Reprocessing photo %s failed", photo_id)
+        return {"status": "error", "photo_id": photo_id}
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate derivatives for photos that were never processed or were rendered with an older "
+        "LISTING_PHOTO_WIDTHS/LISTING_PHOTO_FORMATS matrix."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Reprocess every photo, not only stale ones.",
+        )
+        parser.add_argument(
+            "--backend",
+            choices=("process", "celery"),
+            default="process",
+            help="Run in a local process pool (default) or fan out to Celery workers.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Concurrent photos (1 processes inline).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=0,
+            help="Photos per batch (default: 4 x workers).",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=0, help="Stop after this many photos."
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default="",
+            help="File recording the last completed photo id; an interrupted run resumes after it.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=600,
+            help="Seconds to wait for a Celery batch.",
+        )
+
+    def handle(self, *args: object, **options: Any) -> None:
+        verbosity = int(options.get("verbosity", 1))
+        workers = max(int(options["workers"]), 1)
+        batch_size = max(int(options["batch_size"]) or workers * 4, 1)
+        limit = max(int(options["limit"]), 0)
+        checkpoint = Path(options["checkpoint"]) if options["checkpoint"] else None
+
+        queryset = Photo.objects.exclude(image="")
+        if not options["all"]:
+            fingerprint = derivative_spec_fingerprint()
+            queryset = queryset.filter(
+                Q(processed_at__isnull=True)
+                | ~Q(derivatives__has_key="spec")
+                | ~Q(derivatives__spec=fingerprint)
+            )
+        last_id = self._read_checkpoint(checkpoint)
+        if last_id is not None:
+            queryset = queryset.filter(pk__gt=last_id)
+            if verbosity:
+                self.stdout.write(f"Resuming after photo {last_id}.")
+
+        pool = None
+        if options["backend"] == "celery":
+            run_batch = self._celery_runner(options["timeout"])
+        elif workers > 1:
+            # Spawned (not forked) workers so no database socket or boto3 pool is shared with this process.
+            # The initializer must be importable before Django is set up in the child.
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("spawn"),
+                initializer=django.setup,
+            )
+
+            def run_batch(batch: list[int]) -> list[dict[str, Any]]:
+                return list(pool.map(_process_photo, batch))
+
+        else:
+
+            def run_batch(batch: list[int]) -> list[dict[str, Any]]:
+                return [_process_photo(photo_id) for photo_id in batch]
+
+        counts = {"processed": 0, "missing": 0, "error": 0}
+        started = time.perf_counter()
+        try:
+            for batch in self._batches(queryset, batch_size, limit):
+                for result in run_batch(batch):
+                    status = (
+                        result.get("status") if isinstance(result, dict) else "error"
+                    )
+                    counts[status if status in counts else "error"] += 1
+                self._write_checkpoint(checkpoint, batch[-1])
+                if verbosity >= 2:
+                    done = sum(counts.values())
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"{done} photos, {done / elapsed:.1f} photos/sec (through id {batch[-1]})"
+                    )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        total = sum(counts.values())
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        if checkpoint and checkpoint.exists() and not (limit and total >= limit):
+            # A complete run leaves nothing to resume.
+            checkpoint.unlink()
+        if verbosity:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Reprocessed {counts['processed']} photos ({counts['missing']} missing, {counts['error']} failed) "
+                    f"in {elapsed:.1f}s: {total / elapsed:.1f} photos/sec."
+                )
+            )
+
+    def _batches(
+        self, queryset: QuerySet, batch_size: int, limit: int
+    ) -> Iterator[list[int]]:
+        """Yield ascending id batches by keyset, so no cursor stays open while workers write."""
+
+        last_id = 0
+        seen = 0
+        while not limit or seen < limit:
+            size = min(batch_size, limit - seen) if limit else batch_size
+            batch = list(
+                queryset.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:size]
+                .iterator()
+            )
+            if not batch:
+                return
+            seen += len(batch)
+            last_id = batch[-1]
+            yield batch
+
+    def _celery_runner(self, timeout: int):
+        from celery import group
+
+        def run(batch: list[int]) -> list[dict[str, Any]]:
+            result = group(
+                process_listing_photo.s(photo_id).set(ignore_result=False)
+                for photo_id in batch
+            ).apply_async()
+            return result.get(timeout=timeout, propagate=False)
+
+        return run
+
+    def _read_checkpoint(self, checkpoint: Path | None) -> int | None:
+        if checkpoint is None or not checkpoint.exists():
+            return None
+        raw = checkpoint.read_text().strip()
+        try:
+            return int(raw) if raw else None
+        except ValueError as exc:
+            raise CommandError(
+                f"Checkpoint {checkpoint} does not contain a photo id: {raw!r}"
+            ) from exc
+
+    def _write_checkpoint(self, checkpoint: Path | None, photo_id: int) -> None:
+        if checkpoint is None:
+            return
+        temporary = checkpoint.with_name(f"{checkpoint.name}.tmp")
+        temporary.write_text(str(photo_id))
+        temporary.replace(checkpoint)
@@ -0,0 +1,109 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:44
+
+from django.db import migrations, models
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE listings_listing ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(make, '') || ' ' || coalesce(model, '') || ' ' || coalesce(trim, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(search_document, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX listings_listing_search_vector_gin ON listings_listing USING gin (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS listings_listing_search_vector_gin",
+    "ALTER TABLE listings_listing DROP COLUMN IF EXISTS search_vector",
+]
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS listings_listing_fts USING fts5(
+        listing_id UNINDEXED, title, vehicle, body,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+]
+SQLITE_REVERSE = ["DROP TABLE IF EXISTS listings_listing_fts"]
+
+PROVINCES = {
+    "AB": "Alberta",
+    "BC": "British Columbia",
+    "MB": "Manitoba",
+    "NB": "New Brunswick",
+    "NL": "Newfoundland and Labrador",
+    "NS": "Nova Scotia",
+    "NT": "Northwest Territories",
+    "NU": "Nunavut",
+    "ON": "Ontario",
+    "PE": "Prince Edward Island",
+    "QC": "Quebec",
+    "SK": "Saskatchewan",
+    "YT": "Yukon",
+}
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_FORWARD)
+
+    Listing = apps.get_model("listings", "Listing")
+    for listing in Listing.objects.iterator(chunk_size=500):
+        parts = [
+            listing.title,
+            str(listing.year or ""),
+            listing.make,
+            listing.model,
+            listing.trim,
+            listing.city,
+            listing.province,
+            PROVINCES.get(listing.province, ""),
+            (listing.tags or "").replace(",", " "),
+        ]
+        document = " ".join(
+            " ".join(str(part or "").split()) for part in parts if part
+        ).strip()
+        Listing.objects.filter(pk=listing.pk).update(search_document=document)
+        if vendor == "sqlite":
+            vehicle = " ".join(
+                str(part)
+                for part in (listing.year, listing.make, listing.model, listing.trim)
+                if part
+            )
+            schema_editor.execute(
+                "INSERT INTO listings_listing_fts (listing_id, title, vehicle, body) VALUES (%s, %s, %s, %s)",
+                [listing.pk.hex, listing.title or "", vehicle, document],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == "sqlite":
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0004_inquiry_delivered_at_inquiry_delivery_error_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="search_document",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
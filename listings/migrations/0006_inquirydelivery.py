@@ -0,0 +1,66 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0005_listing_search_document"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InquiryDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "inquiry",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="delivery",
+                        to="listings.inquiry",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("available_at",),
+                "indexes": [
+                    models.Index(
+                        fields=["status", "available_at"],
+                        name="listings_delivery_due_idx",
+                    )
+                ],
+            },
+        ),
+    ]
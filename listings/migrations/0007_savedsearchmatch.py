@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0006_inquirydelivery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SavedSearchMatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "listing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="saved_search_matches",
+                        to="listings.listing",
+                    ),
+                ),
+                (
+                    "saved_search",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matches",
+                        to="listings.savedsearch",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+                "unique_together": {("saved_search", "listing")},
+            },
+        ),
+    ]
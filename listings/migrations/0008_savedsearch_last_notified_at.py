@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0007_savedsearchmatch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="savedsearch",
+            name="last_notified_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
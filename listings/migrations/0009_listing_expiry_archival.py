@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:20
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def archive_expired(apps, schema_editor):
+    # These rows were already hidden by the old active() filter, so no catalogue cache changes.
+    Listing = apps.get_model("listings", "Listing")
+    now = timezone.now()
+    Listing.objects.filter(status="approved", expires_at__lte=now).update(
+        status="archived", published_at=None, is_promoted=False, updated_at=now
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0008_savedsearch_last_notified_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                condition=models.Q(("status", "approved")),
+                fields=["-published_at", "-created_at"],
+                name="listing_active_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                condition=models.Q(("status", "approved")),
+                fields=["expires_at"],
+                name="listing_expiry_idx",
+            ),
+        ),
+        migrations.RunPython(archive_expired, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dealers", "0001_initial"),
+        ("listings", "0009_listing_expiry_archival"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="listing",
+            name="listing_active_recent_idx",
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                condition=models.Q(("status", "approved")),
+                fields=["-published_at", "-created_at", "-id"],
+                name="listing_active_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                condition=models.Q(("status", "approved")),
+                fields=["make", "-published_at", "-created_at"],
+                name="listing_active_make_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                condition=models.Q(("status", "approved")),
+                fields=["province", "-published_at", "-created_at"],
+                name="listing_active_province_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                condition=models.Q(("status", "approved")),
+                fields=["price", "published_at", "created_at", "id"],
+                name="listing_active_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                condition=models.Q(("status", "approved")),
+                fields=["year", "published_at", "created_at", "id"],
+                name="listing_active_year_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0011_sellerinboxcounter"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inquiry",
+            index=models.Index(
+                fields=["listing", "-created_at", "-id"],
+                name="inquiry_listing_recent_idx",
+            ),
+        ),
+    ]
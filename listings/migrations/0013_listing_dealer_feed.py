@@ -0,0 +1,41 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dealers", "0001_initial"),
+        ("listings", "0012_inquiry_listing_recent_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="feed_imported_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="Set while the listing is managed by its dealer's inventory feed",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="stock_number",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["dealer", "vin"], name="listing_dealer_vin_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["dealer", "stock_number"], name="listing_dealer_stock_idx"
+            ),
+        ),
+    ]
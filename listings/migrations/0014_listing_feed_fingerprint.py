@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0013_listing_dealer_feed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="feed_fingerprint",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
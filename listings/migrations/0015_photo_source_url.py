@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0014_listing_feed_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="photo",
+            name="source_url",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Feed URL or path the original was fetched from",
+                max_length=1000,
+            ),
+        ),
+    ]
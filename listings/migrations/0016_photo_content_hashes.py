@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0015_photo_source_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="photo",
+            name="perceptual_hash",
+            field=models.CharField(
+                blank=True, editable=False, help_text="64-bit dHash, hex", max_length=16
+            ),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="sha256",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name="photo",
+            index=models.Index(fields=["sha256"], name="photo_sha256_idx"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0016_photo_content_hashes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="feed_archived_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="Set when the feed archived the unit; it is relisted if it returns",
+                null=True,
+            ),
+        ),
+    ]
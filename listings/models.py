@@ -7,7 +7,11 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
-from django.utils.text import slugify
+
+from config.slugs import save_with_slug, slug_base
+
+from .search import SEARCH_DOCUMENT_FIELDS, build_search_document, get_search_backend
+from .signals import notify_catalogue_changed
 
 
 class Province(models.TextChoices):
@@ -65,10 +69,14 @@ class ListingQuerySet(models.QuerySet):
         return self.filter(status=ListingStatus.APPROVED)
 
     def active(self) -> "ListingQuerySet":
-        now = timezone.now()
+        # Expired listings are archived by the ``listings.archive_expired_listings`` beat task,
+        # so the public catalogue is exactly the approved rows.
+        return self.filter(status=ListingStatus.APPROVED)
+
+    def expired(self) -> "ListingQuerySet":
         return self.filter(
-            status=ListingStatus.APPROVED,
-        ).filter(models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=now))
+            status=ListingStatus.APPROVED, expires_at__lte=timezone.now()
+        )
 
     def pending(self) -> "ListingQuerySet":
         return self.filter(status=ListingStatus.PENDING_REVIEW)
@@ -79,13 +87,21 @@ class ModelSpec(models.Model):
     model = models.CharField(max_length=120)
     trim = models.CharField(max_length=120, blank=True)
     year = models.PositiveSmallIntegerField()
-    battery_capacity_kwh = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
-    usable_battery_capacity_kwh = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    battery_capacity_kwh = models.DecimalField(
+        max_digits=6, decimal_places=2, blank=True, null=True
+    )
+    usable_battery_capacity_kwh = models.DecimalField(
+        max_digits=6, decimal_places=2, blank=True, null=True
+    )
     range_km = models.PositiveIntegerField(blank=True, null=True)
     drivetrain = models.CharField(max_length=10, choices=Drivetrain.choices, blank=True)
-    dc_fast_charge_type = models.CharField(max_length=12, choices=ChargePort.choices, blank=True)
+    dc_fast_charge_type = models.CharField(
+        max_length=12, choices=ChargePort.choices, blank=True
+    )
     heat_pump_standard = models.BooleanField(default=False)
-    onboard_charger_kw = models.DecimalField(max_digits=4, decimal_places=1, blank=True, null=True)
+    onboard_charger_kw = models.DecimalField(
+        max_digits=4, decimal_places=1, blank=True, null=True
+    )
     seating_capacity = models.PositiveSmallIntegerField(blank=True, null=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     notes = models.TextField(blank=True)
@@ -100,17 +116,15 @@ class ModelSpec(models.Model):
         return f"{self.year} {self.make} {self.model} {self.trim}".strip()
 
     def save(self, *args: object, **kwargs: object) -> None:
-        if not self.slug:
-            base_slug = slugify(f"{self.year}-{self.make}-{self.model}-{self.trim}")
-            if not base_slug:
-                base_slug = uuid.uuid4().hex[:12]
-            candidate = base_slug
-            index = 1
-            while ModelSpec.objects.exclude(pk=self.pk).filter(slug=candidate).exists():
-                index += 1
-                candidate = f"{base_slug}-{index}"
-            self.slug = candidate
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+            return
+        base_slug = slug_base(
+            f"{self.year}-{self.make}-{self.model}-{self.trim}", fallback_length=12
+        )
+        save_with_slug(
+            self, base_slug, lambda: super(ModelSpec, self).save(*args, **kwargs)
+        )
 
 
 class Listing(models.Model):
@@ -148,21 +162,44 @@ class Listing(models.Model):
     province = models.CharField(max_length=2, choices=Province.choices)
     city = models.CharField(max_length=120)
     drivetrain = models.CharField(max_length=10, choices=Drivetrain.choices, blank=True)
-    dc_fast_charge_type = models.CharField(max_length=12, choices=ChargePort.choices, blank=True)
+    dc_fast_charge_type = models.CharField(
+        max_length=12, choices=ChargePort.choices, blank=True
+    )
     range_km = models.PositiveIntegerField(blank=True, null=True)
-    battery_capacity_kwh = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    battery_capacity_kwh = models.DecimalField(
+        max_digits=6, decimal_places=2, blank=True, null=True
+    )
     battery_warranty_years = models.PositiveIntegerField(blank=True, null=True)
     battery_warranty_km = models.PositiveIntegerField(blank=True, null=True)
     has_heat_pump = models.BooleanField(default=False)
     vin = models.CharField(max_length=17, blank=True)
-    status = models.CharField(max_length=20, choices=ListingStatus.choices, default=ListingStatus.DRAFT)
+    stock_number = models.CharField(max_length=64, blank=True)
+    feed_imported_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Set while the listing is managed by its dealer's inventory feed",
+    )
+    feed_fingerprint = models.CharField(max_length=64, blank=True, editable=False)
+    feed_archived_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Set when the feed archived the unit; it is relisted if it returns",
+    )
+    status = models.CharField(
+        max_length=20, choices=ListingStatus.choices, default=ListingStatus.DRAFT
+    )
     approved_at = models.DateTimeField(blank=True, null=True)
     rejected_at = models.DateTimeField(blank=True, null=True)
     published_at = models.DateTimeField(blank=True, null=True)
     expires_at = models.DateTimeField(blank=True, null=True)
     featured_until = models.DateTimeField(blank=True, null=True)
     is_promoted = models.BooleanField(default=False)
-    tags = models.CharField(max_length=255, blank=True, help_text="Comma separated marketing tags")
+    tags = models.CharField(
+        max_length=255, blank=True, help_text="Comma separated marketing tags"
+    )
+    search_document = models.TextField(blank=True, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -174,11 +211,57 @@ class Listing(models.Model):
             models.Index(fields=("status", "province", "city")),
             models.Index(fields=("make", "model", "year")),
             models.Index(fields=("-created_at",)),
+            # Partial indexes over the public catalogue (``active()``), matched to its query shapes;
+            # ``manage.py explain_catalogue`` checks that none of them falls back to a table scan.
+            models.Index(
+                fields=("-published_at", "-created_at", "-id"),
+                condition=models.Q(status="approved"),
+                name="listing_active_recent_idx",
+            ),
+            models.Index(
+                fields=("make", "-published_at", "-created_at"),
+                condition=models.Q(status="approved"),
+                name="listing_active_make_idx",
+            ),
+            models.Index(
+                fields=("province", "-published_at", "-created_at"),
+                condition=models.Q(status="approved"),
+                name="listing_active_province_idx",
+            ),
+            # Range filters; the trailing sort keys make these covering for the ordered id scan.
+            models.Index(
+                fields=("price", "published_at", "created_at", "id"),
+                condition=models.Q(status="approved"),
+                name="listing_active_price_idx",
+            ),
+            models.Index(
+                fields=("year", "published_at", "created_at", "id"),
+                condition=models.Q(status="approved"),
+                name="listing_active_year_idx",
+            ),
+            models.Index(
+                fields=("expires_at",),
+                condition=models.Q(status="approved"),
+                name="listing_expiry_idx",
+            ),
+            # Dealer feed imports match rows by VIN or stock number within the dealer.
+            models.Index(fields=("dealer", "vin"), name="listing_dealer_vin_idx"),
+            models.Index(
+                fields=("dealer", "stock_number"), name="listing_dealer_stock_idx"
+            ),
         ]
 
     def __str__(self) -> str:  # pragma: no cover - admin readability
         return f"{self.year} {self.make} {self.model}"
 
+    @classmethod
+    def from_db(cls, db: str | None, field_names: Any, values: Any) -> "Listing":
+        instance = super().from_db(db, field_names, values)
+        loaded = "status" in field_names
+        instance._loaded_active = instance.is_active if loaded else None
+        instance._loaded_status = instance.status if loaded else None
+        return instance
+
     def clean(self) -> None:
         if self.status == ListingStatus.APPROVED and not self.published_at:
             self.published_at = timezone.now()
@@ -187,18 +270,9 @@ class Listing(models.Model):
 
     def save(self, *args: object, **kwargs: object) -> None:
         creating = self._state.adding
+        was_active = bool(getattr(self, "_loaded_active", False))
         if not self.dealer and hasattr(self.seller, "dealer_profile"):
             self.dealer = getattr(self.seller, "dealer_profile")
-        if not self.slug:
-            base_slug = slugify(self.title or f"{self.make}-{self.model}-{self.year}")
-            if not base_slug:
-                base_slug = uuid.uuid4().hex[:10]
-            candidate = base_slug
-            index = 1
-            while Listing.objects.exclude(pk=self.pk).filter(slug=candidate).exists():
-                index += 1
-                candidate = f"{base_slug}-{index}"
-            self.slug = candidate
         if self.status == ListingStatus.APPROVED and not self.approved_at:
             self.approved_at = timezone.now()
         if self.status != ListingStatus.APPROVED:
@@ -211,7 +285,42 @@ class Listing(models.Model):
             self.published_at = timezone.now()
         if self.status != ListingStatus.APPROVED:
             self.published_at = None
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        reindex = update_fields is None or bool(
+            set(update_fields) & set(SEARCH_DOCUMENT_FIELDS)
+        )
+        if reindex:
+            self.search_document = build_search_document(self)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "search_document"}
+        status_saved = update_fields is None or "status" in update_fields
+        if (
+            status_saved
+            and self.feed_archived_at
+            and self.status != getattr(self, "_loaded_status", None)
+        ):
+            # A seller's or moderator's status change overrides the feed's own archiving.
+            self.feed_archived_at = None
+            if update_fields is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "feed_archived_at"}
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            base_slug = slug_base(self.title or f"{self.make}-{self.model}-{self.year}")
+            save_with_slug(
+                self, base_slug, lambda: super(Listing, self).save(*args, **kwargs)
+            )
+        if reindex:
+            get_search_backend().index([self])
+        is_active = self.is_active
+        self._loaded_active = is_active
+        self._loaded_status = self.status
+        if was_active or is_active:
+            notify_catalogue_changed(
+                [self.pk],
+                activated=[self.pk] if is_active and not was_active else [],
+                deactivated=[self.pk] if was_active and not is_active else [],
+            )
         if creating and self.photos.filter(is_primary=True).count() == 0:
             primary = self.photos.order_by("sort_order", "id").first()
             if primary:
@@ -222,14 +331,30 @@ class Listing(models.Model):
     def is_published(self) -> bool:
         return self.status == ListingStatus.APPROVED
 
+    @property
+    def is_active(self) -> bool:
+        """Mirror ``ListingQuerySet.active()`` for a single instance."""
+
+        return self.status == ListingStatus.APPROVED
+
     @property
     def primary_photo(self) -> "Photo | None":
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("photos")
+        if prefetched is not None:
+            # Resolve from ``prefetch_related("photos")`` instead of querying per card.
+            photos = list(prefetched)
+            return next(
+                (photo for photo in photos if photo.is_primary),
+                photos[0] if photos else None,
+            )
         primary = self.photos.filter(is_primary=True).first()
         if primary:
             return primary
         return self.photos.first()
 
-    def transition(self, new_status: str, *, moderator: settings.AUTH_USER_MODEL | None = None) -> None:
+    def transition(
+        self, new_status: str, *, moderator: settings.AUTH_USER_MODEL | None = None
+    ) -> None:
         if new_status not in ListingStatus.values:
             raise ValidationError("Invalid status transition")
         self.status = new_status
@@ -248,22 +373,42 @@ class Listing(models.Model):
         self.save()
 
 
+# Formats offered as <picture> sources ahead of the JPEG fallback, in preference order.
+PICTURE_SOURCE_FORMATS = (("avif", "image/avif"), ("webp", "image/webp"))
+
+
 class Photo(models.Model):
-    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="photos")
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="photos"
+    )
     image = models.ImageField(upload_to="listings/photos/%Y/%m/")
     caption = models.CharField(max_length=255, blank=True)
     alt_text = models.CharField(max_length=255, blank=True)
     sort_order = models.PositiveSmallIntegerField(default=0)
     is_primary = models.BooleanField(default=False)
+    source_url = models.CharField(
+        max_length=1000,
+        blank=True,
+        editable=False,
+        help_text="Feed URL or path the original was fetched from",
+    )
     original_width = models.PositiveIntegerField(blank=True, null=True)
     original_height = models.PositiveIntegerField(blank=True, null=True)
     processed_at = models.DateTimeField(blank=True, null=True)
     derivatives = models.JSONField(blank=True, default=dict)
+    # Set while processing: identical originals share derivatives, near-identical ones are reported.
+    sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    perceptual_hash = models.CharField(
+        max_length=16, blank=True, editable=False, help_text="64-bit dHash, hex"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("sort_order", "id")
+        indexes = [
+            models.Index(fields=("sha256",), name="photo_sha256_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - admin readability
         return f"Photo for {self.listing} ({self.pk})"
@@ -324,22 +469,69 @@ class Photo(models.Model):
     def display_url(self) -> Optional[str]:
         return self._derivative_url("display")
 
+    def _variant_srcset(self, fmt: str) -> str:
+        variants = [
+            self.get_derivative_info(key)
+            for key, value in (self.derivatives or {}).items()
+            if isinstance(value, dict) and value.get("format") == fmt
+        ]
+        variants = sorted(
+            (info for info in variants if info and info.get("url")),
+            key=lambda info: info.get("width") or 0,
+        )
+        return ", ".join(f"{info['url']} {info['width']}w" for info in variants)
+
+    @property
+    def srcset(self) -> str:
+        """JPEG ``srcset`` for the ``<img>`` fallback (empty until processed)."""
+
+        return self._variant_srcset("jpeg")
+
+    @property
+    def picture_sources(self) -> list[dict[str, str]]:
+        """``<source>`` entries for modern formats, most efficient first."""
+
+        sources = []
+        for fmt, mime_type in PICTURE_SOURCE_FORMATS:
+            srcset = self._variant_srcset(fmt)
+            if srcset:
+                sources.append({"type": mime_type, "srcset": srcset})
+        return sources
+
     def save(self, *args: object, **kwargs: object) -> None:
         super().save(*args, **kwargs)
         if self.is_primary:
-            Photo.objects.filter(listing=self.listing).exclude(pk=self.pk).update(is_primary=False)
-        elif not self.listing.photos.exclude(pk=self.pk).filter(is_primary=True).exists():
+            Photo.objects.filter(listing=self.listing).exclude(pk=self.pk).update(
+                is_primary=False
+            )
+        elif (
+            not self.listing.photos.exclude(pk=self.pk).filter(is_primary=True).exists()
+        ):
             # Ensure there is always a primary photo when photos exist.
             Photo.objects.filter(pk=self.pk).update(is_primary=True)
+        self._touch_listing()
+
+    def delete(self, *args: Any, **kwargs: Any) -> Any:
+        result = super().delete(*args, **kwargs)
+        self._touch_listing()
+        return result
+
+    def _touch_listing(self) -> None:
+        # Photos are part of the listing's content: keep its Last-Modified and cache keys honest.
+        Listing.objects.filter(pk=self.listing_id).update(updated_at=timezone.now())
 
 
 class Inquiry(models.Model):
-    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="inquiries")
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="inquiries"
+    )
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone_number = models.CharField(max_length=32, blank=True)
     message = models.TextField()
-    status = models.CharField(max_length=20, choices=InquiryStatus.choices, default=InquiryStatus.NEW)
+    status = models.CharField(
+        max_length=20, choices=InquiryStatus.choices, default=InquiryStatus.NEW
+    )
     delivery_status = models.CharField(
         max_length=20,
         choices=InquiryDeliveryStatus.choices,
@@ -358,6 +550,13 @@ class Inquiry(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            # Seller inbox: keyset pages per listing and the bounded mark-as-read UPDATE.
+            models.Index(
+                fields=("listing", "-created_at", "-id"),
+                name="inquiry_listing_recent_idx",
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - admin readability
         return f"Inquiry for {self.listing} from {self.email}"
@@ -371,13 +570,74 @@ class Inquiry(models.Model):
         self.status = InquiryStatus.CLOSED
         self.save(update_fields=["status"])
 
-
     def mark_viewed(self) -> None:
+        from .inbox import adjust_unread
+
         if not self.seller_notified_at:
             self.seller_notified_at = timezone.now()
             self.save(update_fields=["seller_notified_at", "updated_at"])
+            adjust_unread(self.listing.seller_id, -1)
+
+    def delete(self, *args: Any, **kwargs: Any) -> Any:
+        from .inbox import adjust_unread
+
+        # A method rather than a post_delete receiver, which would disable fast deletes of inquiries.
+        # Cascades from a listing are counted per listing in ``listings.inbox``.
+        unread = self.seller_notified_at is None
+        result = super().delete(*args, **kwargs)
+        if unread:
+            adjust_unread(self.listing.seller_id, -1)
+        return result
+
+
+class SellerInboxCounter(models.Model):
+    """Denormalized number of a seller's unread inquiries, kept by ``listings.inbox``."""
+
+    seller = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="inbox_counter",
+    )
+    unread = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:  # pragma: no cover - admin readability
+        return f"{self.seller} ({self.unread} unread)"
 
 
+class InquiryDelivery(models.Model):
+    """Outbox row for the seller notification of an inquiry.
+
+    Written in the same transaction as the inquiry and drained by the
+    ``listings.deliver_inquiry`` / ``listings.drain_inquiry_outbox`` tasks.
+    """
+
+    inquiry = models.OneToOneField(
+        Inquiry, on_delete=models.CASCADE, related_name="delivery"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=InquiryDeliveryStatus.choices,
+        default=InquiryDeliveryStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("available_at",)
+        indexes = [
+            models.Index(
+                fields=("status", "available_at"), name="listings_delivery_due_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - admin readability
+        return f"Delivery for inquiry {self.inquiry_id} ({self.get_status_display()})"
+
 
 class InquiryEvent(models.Model):
     class EventType(models.TextChoices):
@@ -387,7 +647,9 @@ class InquiryEvent(models.Model):
         EMAIL_FAILED = "email_failed", "Email failed"
         DASHBOARD_VIEWED = "dashboard_viewed", "Dashboard viewed"
 
-    inquiry = models.ForeignKey(Inquiry, on_delete=models.CASCADE, related_name="events")
+    inquiry = models.ForeignKey(
+        Inquiry, on_delete=models.CASCADE, related_name="events"
+    )
     event_type = models.CharField(max_length=50, choices=EventType.choices)
     message = models.CharField(max_length=255, blank=True)
     metadata = models.JSONField(blank=True, default=dict)
@@ -409,6 +671,8 @@ class SavedSearch(models.Model):
     name = models.CharField(max_length=255, blank=True)
     querystring = models.TextField()
     query_params = models.JSONField(default=dict, blank=True)
+    # Matches created up to this moment have been included in an alert digest.
+    last_notified_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -432,3 +696,21 @@ class SavedSearch(models.Model):
             pieces.append(f"{key}={joined}")
         return ", ".join(pieces) if pieces else "All listings"
 
+
+class SavedSearchMatch(models.Model):
+    """A listing that entered the catalogue matching a saved search; queued for alerts."""
+
+    saved_search = models.ForeignKey(
+        SavedSearch, on_delete=models.CASCADE, related_name="matches"
+    )
+    listing = models.ForeignKey(
+        Listing, on_delete=models.CASCADE, related_name="saved_search_matches"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        unique_together = ("saved_search", "listing")
+
+    def __str__(self) -> str:  # pragma: no cover - admin readability
+        return f"{self.saved_search} ↔ {self.listing}"
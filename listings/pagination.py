@@ -0,0 +1,283 @@
+"""Keyset (cursor) pagination for the public catalogue.
+
+Deep ``OFFSET`` pages and a full ``COUNT(*)`` get more expensive the further a
+crawler walks. ``KeysetPaginator`` instead seeks past the last row it served,
+keyed on ``(published_at, created_at, id)`` in descending order. Totals come
+from a bounded count, or from the Postgres planner estimate once the bound is
+reached.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+import math
+from datetime import datetime
+from typing import Any, Sequence
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+KEYSET_FIELDS = ("published_at", "created_at", "id")
+KEYSET_ORDERING = tuple(f"-{field}" for field in KEYSET_FIELDS)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded."""
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> dict[str, Any]:
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(payload, dict) or payload.get("d") not in {"next", "prev"}:
+        raise InvalidCursor("Malformed cursor")
+    return payload
+
+
+def approximate_count(queryset: QuerySet, limit: int) -> tuple[int, bool]:
+    """Return ``(count, is_approximate)`` without counting past ``limit`` rows.
+
+    Below the limit the count is exact. Past it, Postgres contributes its
+    planner estimate for the filtered query; other databases report the limit.
+    """
+
+    bounded = queryset.order_by()[: limit + 1].count()
+    if bounded <= limit:
+        return bounded, False
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        try:
+            sql, params = queryset.order_by().query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+            return max(estimate, limit), True
+        except Exception:  # pragma: no cover - planner output differs per version
+            logger.debug(
+                "Falling back to bounded count for catalogue pagination", exc_info=True
+            )
+    return limit, True
+
+
+class KeysetPage(Sequence):
+    """A page of results addressed by cursor, shaped like Django's ``Page``."""
+
+    is_keyset = True
+
+    def __init__(
+        self,
+        object_list: list[Any],
+        number: int,
+        paginator: "KeysetPaginator",
+        *,
+        has_next: bool,
+        has_previous: bool,
+    ) -> None:
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self) -> str:
+        return f"<KeysetPage {self.number}>"
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    def next_page_number(self) -> int:
+        return self.number + 1
+
+    def previous_page_number(self) -> int:
+        return self.number - 1
+
+    @property
+    def next_cursor(self) -> str | None:
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[-1], "next", self.number + 1)
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[0], "prev", self.number - 1)
+
+    def page_param(self, number: int) -> str | None:
+        """Return the query-string fragment that reaches page ``number`` from here."""
+
+        if number == self.number:
+            return None
+        if self.paginator.is_addressable(number):
+            return f"page={number}"
+        if number == self.number + 1 and self.next_cursor:
+            return f"cursor={self.next_cursor}"
+        if number == self.number - 1 and self.previous_cursor:
+            return f"cursor={self.previous_cursor}"
+        return None
+
+
+class KeysetPaginator:
+    """Paginate a queryset ordered by ``KEYSET_ORDERING`` without OFFSET scans.
+
+    Pages ``1..classic_pages`` can still be addressed with ``?page=N`` (an
+    OFFSET query over a short prefix); everything deeper is reached by cursor.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int,
+        *,
+        classic_pages: int = 0,
+        count_limit: int = 1000,
+    ) -> None:
+        self.queryset = queryset.order_by(*KEYSET_ORDERING)
+        self.per_page = int(per_page)
+        self.classic_pages = max(int(classic_pages), 0)
+        self.count_limit = max(int(count_limit), self.per_page)
+
+    @cached_property
+    def _count(self) -> tuple[int, bool]:
+        return approximate_count(self.queryset, self.count_limit)
+
+    @property
+    def count(self) -> int:
+        return self._count[0]
+
+    @property
+    def count_is_approximate(self) -> bool:
+        return self._count[1]
+
+    @property
+    def num_pages(self) -> int:
+        if self.count == 0:
+            return 1
+        return math.ceil(self.count / self.per_page)
+
+    def is_addressable(self, number: int) -> bool:
+        return number == 1 or 1 <= number <= self.classic_pages
+
+    def cursor_for(self, obj: Any, direction: str, number: int) -> str:
+        return encode_cursor(
+            {
+                "d": direction,
+                "n": number,
+                "p": obj.published_at.isoformat() if obj.published_at else None,
+                "c": obj.created_at.isoformat(),
+                "i": str(obj.pk),
+            }
+        )
+
+    def page(self, number: int) -> KeysetPage:
+        """Return a classic, OFFSET-addressed page within the allowed prefix."""
+
+        if not self.is_addressable(number):
+            raise InvalidCursor(f"Page {number} is only reachable by cursor")
+        offset = (number - 1) * self.per_page
+        rows = list(self.queryset[offset : offset + self.per_page + 1])
+        if number > 1 and not rows:
+            raise InvalidCursor(f"Page {number} is past the end of the results")
+        return KeysetPage(
+            rows[: self.per_page],
+            number,
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=number > 1,
+        )
+
+    def page_from_cursor(self, token: str) -> KeysetPage:
+        payload = decode_cursor(token)
+        published_at = self._parse_datetime(payload.get("p"), allow_null=True)
+        created_at = self._parse_datetime(payload.get("c"))
+        try:
+            number = max(int(payload.get("n") or 1), 1)
+        except (TypeError, ValueError) as exc:
+            raise InvalidCursor("Malformed cursor") from exc
+        pk = payload.get("i")
+        if not pk:
+            raise InvalidCursor("Malformed cursor")
+
+        if payload["d"] == "next":
+            predicate = self._seek(published_at, created_at, pk, after=True)
+            rows = list(self.queryset.filter(predicate)[: self.per_page + 1])
+            return KeysetPage(
+                rows[: self.per_page],
+                number,
+                self,
+                has_next=len(rows) > self.per_page,
+                has_previous=True,
+            )
+
+        predicate = self._seek(published_at, created_at, pk, after=False)
+        reverse_ordering = tuple(field.lstrip("-") for field in KEYSET_ORDERING)
+        rows = list(
+            self.queryset.filter(predicate).order_by(*reverse_ordering)[
+                : self.per_page + 1
+            ]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = list(reversed(rows[: self.per_page]))
+        return KeysetPage(
+            rows, number, self, has_next=True, has_previous=has_previous and number > 1
+        )
+
+    def _parse_datetime(
+        self, value: Any, *, allow_null: bool = False
+    ) -> datetime | None:
+        if value is None and allow_null:
+            return None
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            raise InvalidCursor("Malformed cursor")
+        return parsed
+
+    def _seek(
+        self,
+        published_at: datetime | None,
+        created_at: datetime,
+        pk: str,
+        *,
+        after: bool,
+    ) -> Q:
+        """Build the row-value comparison for rows after (or before) the cursor row."""
+
+        op = "lt" if after else "gt"
+        tail = Q(**{f"created_at__{op}": created_at}) | Q(
+            created_at=created_at, **{f"id__{op}": pk}
+        )
+        if published_at is None:
+            # Approved listings always carry published_at; treat a null key as the tail.
+            return Q(published_at__isnull=True) & tail
+        return Q(**{f"published_at__{op}": published_at}) | (
+            Q(published_at=published_at) & tail
+        )
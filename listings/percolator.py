@@ -0,0 +1,247 @@
+"""Match newly active listings against saved searches.
+
+Re-running every saved search as a query on each approval costs
+O(searches × approvals). Instead the searches are inverted into an in-memory
+index keyed by their discrete constraints (dealer, make, province, charge type,
+drivetrain): searches constraining the same set of attributes share a table
+keyed by the tuple of accepted values. Matching a listing probes each table
+once with its own values (at most 32 lookups), then checks only those
+candidates' year and price ranges and keywords — no queries.
+
+The index is built once per process and rebuilt when a saved search changes
+(tracked by a cache version token, like the facet cache). Matches are written
+to ``SavedSearchMatch``, the queue the alert digests read from.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import partial
+from typing import Any, Iterable, Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .filters import parse_listing_filters
+from .search import parse_terms
+from .signals import catalogue_changed
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "saved-search-percolator:version"
+
+# Filter key -> Listing attribute for the exact-match constraints.
+DISCRETE_FIELDS = (
+    ("dealer", "dealer_slug"),
+    ("makes", "make"),
+    ("provinces", "province"),
+    ("charge_types", "dc_fast_charge_type"),
+    ("drivetrains", "drivetrain"),
+)
+
+
+@dataclass(frozen=True)
+class IndexedSearch:
+    id: int
+    user_id: int
+    constraints: tuple[tuple[str, frozenset[str]], ...]
+    year_min: int | None
+    year_max: int | None
+    price_min: Decimal | None
+    price_max: Decimal | None
+    terms: tuple[str, ...]
+
+    def matches(
+        self, values: Mapping[str, Any], document_terms: frozenset[str]
+    ) -> bool:
+        """Check the range and keyword constraints; the index has already matched the discrete ones."""
+
+        year = values["year"]
+        if self.year_min is not None and (year is None or year < self.year_min):
+            return False
+        if self.year_max is not None and (year is None or year > self.year_max):
+            return False
+        price = values["price"]
+        if self.price_min is not None and (price is None or price < self.price_min):
+            return False
+        if self.price_max is not None and (price is None or price > self.price_max):
+            return False
+        # Keyword search matches terms by prefix, as the search backends do.
+        return all(
+            any(word.startswith(term) for word in document_terms) for term in self.terms
+        )
+
+
+def index_search(
+    search_id: int, user_id: int, query_params: Mapping[str, Any]
+) -> IndexedSearch:
+    filters = parse_listing_filters(query_params or {})
+    constraints = []
+    for key, attribute in DISCRETE_FIELDS:
+        value = filters.get(key)
+        if value:
+            constraints.append(
+                (attribute, frozenset(value if isinstance(value, list) else [value]))
+            )
+    return IndexedSearch(
+        id=search_id,
+        user_id=user_id,
+        constraints=tuple(constraints),
+        year_min=filters["year_min"],
+        year_max=filters["year_max"],
+        price_min=filters["price_min"],
+        price_max=filters["price_max"],
+        terms=tuple(parse_terms(filters["query"])),
+    )
+
+
+def listing_values(listing: Any) -> dict[str, Any]:
+    dealer = listing.dealer if listing.dealer_id else None
+    return {
+        "dealer_slug": dealer.slug if dealer else "",
+        "make": listing.make or "",
+        "province": listing.province or "",
+        "dc_fast_charge_type": listing.dc_fast_charge_type or "",
+        "drivetrain": listing.drivetrain or "",
+        "year": listing.year,
+        "price": listing.price,
+        "seller_id": listing.seller_id,
+    }
+
+
+class Percolator:
+    """Reverse index from listing attribute values to the saved searches they could satisfy."""
+
+    def __init__(self, searches: Iterable[IndexedSearch] = ()) -> None:
+        # Constrained attributes -> accepted value tuple -> searches.
+        self._postings: dict[
+            tuple[str, ...], dict[tuple[str, ...], list[IndexedSearch]]
+        ] = {}
+        self.size = 0
+        for search in searches:
+            self.add(search)
+
+    def add(self, search: IndexedSearch) -> None:
+        self.size += 1
+        attributes = tuple(attribute for attribute, _ in search.constraints)
+        postings = self._postings.setdefault(attributes, {})
+        # A search accepting several makes (say) is filed under each combination.
+        for key in itertools.product(
+            *(sorted(values) for _, values in search.constraints)
+        ):
+            postings.setdefault(key, []).append(search)
+
+    def match(
+        self, values: Mapping[str, Any], document: str = ""
+    ) -> list[IndexedSearch]:
+        """Return the searches ``values`` (see ``listing_values``) satisfies, excluding the seller's own."""
+
+        document_terms = frozenset(parse_terms(document, limit=None))
+        matched = []
+        for attributes, postings in self._postings.items():
+            for search in postings.get(
+                tuple(values[attribute] for attribute in attributes), ()
+            ):
+                if search.user_id != values.get("seller_id") and search.matches(
+                    values, document_terms
+                ):
+                    matched.append(search)
+        return matched
+
+
+_index: tuple[str, Percolator] | None = None
+
+
+def index_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return str(version)
+
+
+def invalidate_index() -> None:
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_percolator() -> Percolator:
+    """Return this process's index, rebuilding it if a saved search changed since it was built."""
+
+    global _index
+    from .models import SavedSearch
+
+    version = index_version()
+    if _index is None or _index[0] != version:
+        rows = (
+            SavedSearch.objects.order_by()
+            .values_list("pk", "user_id", "query_params")
+            .iterator(chunk_size=2000)
+        )
+        _index = (
+            version,
+            Percolator(
+                index_search(pk, user_id, params) for pk, user_id, params in rows
+            ),
+        )
+    return _index[1]
+
+
+def percolate_listings(listing_ids: Iterable[Any]) -> int:
+    """Record a ``SavedSearchMatch`` for each saved search the given active listings satisfy."""
+
+    from .models import Listing, SavedSearchMatch
+
+    percolator = get_percolator()
+    if not percolator.size:
+        return 0
+    matches = []
+    for listing in (
+        Listing.objects.active()
+        .filter(pk__in=list(listing_ids))
+        .select_related("dealer")
+    ):
+        for search in percolator.match(
+            listing_values(listing), listing.search_document
+        ):
+            matches.append(SavedSearchMatch(saved_search_id=search.id, listing=listing))
+    # Re-activated listings keep their earlier matches rather than alerting twice.
+    SavedSearchMatch.objects.bulk_create(matches, ignore_conflicts=True, batch_size=500)
+    return len(matches)
+
+
+def _percolate_after_commit(listing_ids: list[Any]) -> None:
+    try:
+        percolate_listings(listing_ids)
+    except Exception:  # pragma: no cover - alerts must never break moderation
+        logger.exception("Saved-search percolation failed for %s", listing_ids)
+
+
+@receiver(catalogue_changed, dispatch_uid="listings.percolator.percolate")
+def percolate_on_activation(
+    sender: Any, activated: Iterable[Any] = (), **kwargs: Any
+) -> None:
+    activated = list(activated)
+    if activated and getattr(settings, "FEATURE_SAVED_SEARCHES", False):
+        transaction.on_commit(partial(_percolate_after_commit, activated))
+
+
+@receiver(
+    post_save,
+    sender="listings.SavedSearch",
+    dispatch_uid="listings.percolator.search_saved",
+)
+@receiver(
+    post_delete,
+    sender="listings.SavedSearch",
+    dispatch_uid="listings.percolator.search_deleted",
+)
+def invalidate_on_search_change(sender: Any, **kwargs: Any) -> None:
+    invalidate_index()
+    transaction.on_commit(invalidate_index)
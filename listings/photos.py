@@ -0,0 +1,324 @@
+"""Photo ingestion for dealer inventory feeds.
+
+Feed rows carry photo URLs (or paths relative to a local feed). URLs a listing
+does not have yet are fetched by a bounded thread pool, checked with Pillow
+and stored under a name derived from their SHA-256, so a stock photo shared by
+many units, or served under two URLs, is stored once and never attached to the
+same listing twice. Photo rows are written with ``bulk_create`` with
+``sort_order`` and ``is_primary`` worked out up front (``Photo.save`` queries
+for the primary photo on every row), and ``process_listing_photo`` is queued
+as one Celery group per batch once the rows are committed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from urllib.parse import urljoin, urlparse
+
+import requests
+from celery import group
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from .fragments import invalidate_listings
+from .models import Listing, Photo
+from .tasks import process_listing_photo
+
+logger = logging.getLogger(__name__)
+
+PHOTO_DIRECTORY = "listings/photos/feeds"
+CONTENT_NAME = re.compile(
+    rf"^{re.escape(PHOTO_DIRECTORY)}/[0-9a-f]{{2}}/([0-9a-f]{{64}})\.\w+$"
+)
+# Pillow format -> stored extension; anything else is rejected.
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "AVIF": "avif"}
+MAX_REPORTED_ERRORS = 20
+
+
+@dataclass
+class FetchedPhoto:
+    source: str
+    digest: str = ""
+    name: str = ""
+    content: bytes = b""
+    error: str = ""
+
+
+@dataclass
+class PhotoIngestResult:
+    requested: int = 0
+    created: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: list[str] = field(default_factory=list)
+    # Listings with at least one photo that could not be fetched.
+    failed_listing_ids: set[Any] = field(default_factory=set)
+
+
+@dataclass
+class _ListingPhotos:
+    sources: set[str] = field(default_factory=set)
+    digests: set[str] = field(default_factory=set)
+    count: int = 0
+    next_order: int = 0
+    has_primary: bool = False
+
+
+def content_name(digest: str, extension: str) -> str:
+    return f"{PHOTO_DIRECTORY}/{digest[:2]}/{digest}.{extension}"
+
+
+def content_digest(name: str) -> str:
+    """Return the SHA-256 encoded in a content-addressed photo name ("" for uploaded photos)."""
+
+    match = CONTENT_NAME.match(name or "")
+    return match.group(1) if match else ""
+
+
+def resolve_source(source: str, base: str = "") -> str:
+    """Resolve a feed photo reference against the feed it came from.
+
+    A remote feed may only point at http(s) photos; ``file://`` URLs and local
+    paths are reserved for feeds read from this machine, so a dealer's feed
+    cannot copy files from the worker's disk into public storage.
+    """
+
+    source = source.strip()
+    parsed = urlparse(base)
+    if parsed.scheme in ("http", "https"):
+        resolved = urljoin(base, source)
+        if urlparse(resolved).scheme not in ("http", "https"):
+            raise ValueError("a remote feed may only reference http(s) photos")
+        return resolved
+    if (
+        not base
+        or urlparse(source).scheme in ("http", "https", "file")
+        or Path(source).is_absolute()
+    ):
+        return source
+    base_path = Path(parsed.path if parsed.scheme == "file" else base)
+    return str((base_path if base_path.is_dir() else base_path.parent) / source)
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    chunk: list[Any] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def enqueue_processing(photo_ids: list[Any]) -> None:
+    if not photo_ids:
+        return
+    try:
+        group(process_listing_photo.s(photo_id) for photo_id in photo_ids).apply_async(
+            retry=False
+        )
+    except Exception as exc:
+        # The photos are committed either way; reprocess_photos picks up any left unprocessed.
+        logger.warning(
+            "Unable to enqueue processing for %s feed photos",
+            len(photo_ids),
+            exc_info=exc,
+        )
+
+
+class PhotoIngester:
+    """Attach feed photos to listings; one instance serves a whole feed import."""
+
+    def __init__(
+        self,
+        *,
+        base: str = "",
+        workers: int | None = None,
+        batch_size: int | None = None,
+        max_photos: int | None = None,
+    ) -> None:
+        self.base = base
+        self.workers = max(
+            int(workers or getattr(settings, "DEALER_FEED_PHOTO_WORKERS", 8)), 1
+        )
+        self.batch_size = max(
+            int(batch_size or getattr(settings, "DEALER_FEED_PHOTO_BATCH_SIZE", 200)), 1
+        )
+        self.max_photos = max(
+            int(max_photos or getattr(settings, "DEALER_FEED_MAX_PHOTOS", 40)), 1
+        )
+        self.max_bytes = int(
+            getattr(settings, "DEALER_FEED_PHOTO_MAX_BYTES", 20 * 1024 * 1024)
+        )
+        self.timeout = int(getattr(settings, "DEALER_FEED_TIMEOUT", 30))
+        self.storage = Photo._meta.get_field("image").storage
+        self._local = threading.local()
+
+    def ingest(self, wanted: dict[Any, list[str]]) -> PhotoIngestResult:
+        """Fetch and attach ``{listing_id: [photo URL, ...]}`` in feed order."""
+
+        result = PhotoIngestResult()
+        listings = self.existing(list(wanted))
+        jobs: list[tuple[Any, str]] = []
+        for listing_id, sources in wanted.items():
+            state = listings[listing_id]
+            room = self.max_photos - state.count
+            for source in dict.fromkeys(
+                source.strip() for source in sources if source and source.strip()
+            ):
+                if room <= 0:
+                    break
+                if source not in state.sources:
+                    jobs.append((listing_id, source))
+                    room -= 1
+        result.requested = len(jobs)
+        if jobs:
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="feed-photos"
+            ) as pool:
+                for batch in _chunks(jobs, self.batch_size):
+                    self.ingest_batch(pool, batch, listings, result)
+        return result
+
+    def existing(self, listing_ids: list[Any]) -> dict[Any, _ListingPhotos]:
+        listings = {listing_id: _ListingPhotos() for listing_id in listing_ids}
+        rows = Photo.objects.filter(listing_id__in=listing_ids).values_list(
+            "listing_id", "source_url", "image", "sha256", "sort_order", "is_primary"
+        )
+        for listing_id, source_url, image, sha256, sort_order, is_primary in rows:
+            state = listings[listing_id]
+            if source_url:
+                state.sources.add(source_url)
+            digest = sha256 or content_digest(image)
+            if digest:
+                state.digests.add(digest)
+            state.count += 1
+            state.next_order = max(state.next_order, sort_order + 1)
+            state.has_primary = state.has_primary or is_primary
+        return listings
+
+    def ingest_batch(
+        self,
+        pool: ThreadPoolExecutor,
+        batch: list[tuple[Any, str]],
+        listings: dict[Any, _ListingPhotos],
+        result: PhotoIngestResult,
+    ) -> None:
+        # Each URL is fetched once and each distinct image stored once, however many units use it.
+        sources = list(dict.fromkeys(source for _, source in batch))
+        fetched = dict(zip(sources, pool.map(self.fetch, sources)))
+        unique = {item.name: item for item in fetched.values() if item.name}
+        for item, error in zip(unique.values(), pool.map(self.store, unique.values())):
+            item.error = error
+            item.content = b""
+
+        photos: list[Photo] = []
+        for listing_id, source in batch:
+            item = unique.get(fetched[source].name) or fetched[source]
+            state = listings[listing_id]
+            if item.error:
+                result.failed += 1
+                result.failed_listing_ids.add(listing_id)
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append(f"photo {source}: {item.error}")
+                continue
+            state.sources.add(source)
+            if item.digest in state.digests:
+                result.duplicates += 1
+                continue
+            state.digests.add(item.digest)
+            photos.append(
+                Photo(
+                    listing_id=listing_id,
+                    image=item.name,
+                    sha256=item.digest,
+                    source_url=source[: Photo._meta.get_field("source_url").max_length],
+                    sort_order=state.next_order,
+                    is_primary=not state.has_primary,
+                )
+            )
+            state.next_order += 1
+            state.has_primary = True
+        if not photos:
+            return
+
+        with transaction.atomic():
+            Photo.objects.bulk_create(photos)
+            # What ``Photo.save`` would do per row: the listing's Last-Modified and detail fragments move on.
+            listing_ids = {photo.listing_id for photo in photos}
+            Listing.objects.filter(pk__in=listing_ids).update(updated_at=timezone.now())
+            invalidate_listings(listing_ids)
+            transaction.on_commit(
+                partial(enqueue_processing, [photo.pk for photo in photos])
+            )
+        result.created += len(photos)
+
+    def fetch(self, source: str) -> FetchedPhoto:
+        item = FetchedPhoto(source=source)
+        try:
+            content = self.read(resolve_source(source, self.base))
+            with Image.open(BytesIO(content)) as image:
+                image_format = image.format
+                image.verify()
+        except (
+            Exception
+        ) as exc:  # Pillow raises DecompressionBombError, which is not an OSError
+            item.error = str(exc) or exc.__class__.__name__
+            return item
+        extension = EXTENSIONS.get(image_format or "")
+        if extension is None:
+            item.error = f"unsupported image format {image_format!r}"
+            return item
+        item.digest = hashlib.sha256(content).hexdigest()
+        item.name = content_name(item.digest, extension)
+        item.content = content
+        return item
+
+    def read(self, source: str) -> bytes:
+        parsed = urlparse(source)
+        if parsed.scheme in ("http", "https"):
+            session = getattr(self._local, "session", None)
+            if session is None:
+                # One connection pool per worker thread; ``requests.Session`` is not thread-safe.
+                session = self._local.session = requests.Session()
+            with session.get(source, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                content = bytearray()
+                for block in response.iter_content(64 * 1024):
+                    content += block
+                    if len(content) > self.max_bytes:
+                        raise ValueError(f"larger than {self.max_bytes} bytes")
+                return bytes(content)
+        path = Path(parsed.path if parsed.scheme == "file" else source)
+        if path.stat().st_size > self.max_bytes:
+            raise ValueError(f"larger than {self.max_bytes} bytes")
+        return path.read_bytes()
+
+    def store(self, item: FetchedPhoto) -> str:
+        """Save ``item`` under its content name unless that image is stored already; return an error or ""."""
+
+        try:
+            if not self.storage.exists(item.name):
+                saved = self.storage.save(item.name, ContentFile(item.content))
+                if saved != item.name:
+                    # Another import stored the same bytes first; keep the canonical copy.
+                    self.storage.delete(saved)
+        except (
+            Exception
+        ) as exc:  # pragma: no cover - storage backends raise their own errors
+            logger.exception("Could not store feed photo %s", item.source)
+            return str(exc) or exc.__class__.__name__
+        return ""
@@ -0,0 +1,269 @@
+"""Pluggable keyword search for the public catalogue.
+
+Every Listing keeps a denormalised ``search_document`` that is refreshed in
+``Listing.save``. The active backend turns that document into an index the
+database can use instead of scanning every row with ``icontains``:
+
+* PostgreSQL: a generated, weighted ``tsvector`` column with a GIN index.
+* SQLite: an FTS5 virtual table synced from ``Listing.save`` and on delete.
+* Anything else: the original ``icontains`` filter, without ranking.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import TYPE_CHECKING, Any, Iterable
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .models import Listing
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DOCUMENT_FIELDS = (
+    "title",
+    "year",
+    "make",
+    "model",
+    "trim",
+    "city",
+    "province",
+    "tags",
+)
+FTS_TABLE = "listings_listing_fts"
+POSTGRES_CONFIG = "simple"
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r"[^\W_]+")
+
+
+def build_search_document(listing: "Listing") -> str:
+    """Return the text indexed for a listing."""
+
+    from .models import Province
+
+    province_label = ""
+    if listing.province:
+        try:
+            province_label = Province(listing.province).label
+        except ValueError:
+            province_label = ""
+    tags = (listing.tags or "").replace(",", " ")
+    parts = [
+        listing.title,
+        str(listing.year or ""),
+        listing.make,
+        listing.model,
+        listing.trim,
+        listing.city,
+        listing.province,
+        province_label,
+        tags,
+    ]
+    return " ".join(" ".join(str(part or "").split()) for part in parts if part).strip()
+
+
+def parse_terms(query: str, limit: int | None = MAX_TERMS) -> list[str]:
+    """Split a raw keyword query into lowercase alphanumeric terms (at most ``limit``)."""
+
+    return _TERM_RE.findall((query or "").lower())[:limit]
+
+
+class BaseSearchBackend:
+    """Fallback backend that mirrors the original ``icontains`` search."""
+
+    lookup_fields = ("title", "make", "model", "trim", "city", "province", "tags")
+
+    def filter(self, queryset: QuerySet, query: str) -> QuerySet:
+        """Restrict ``queryset`` to listings matching every term in ``query``."""
+
+        terms = parse_terms(query)
+        if not terms:
+            return queryset
+        for term in terms:
+            clause = Q()
+            for field in self.lookup_fields:
+                clause |= Q(**{f"{field}__icontains": term})
+            queryset = queryset.filter(clause)
+        return queryset
+
+    def rank(self, queryset: QuerySet, query: str) -> QuerySet:
+        """Annotate ``search_rank`` (higher is more relevant)."""
+
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        return self.rank(self.filter(queryset, query), query)
+
+    def index(self, listings: Iterable["Listing"]) -> None:
+        """Refresh the index entries for ``listings``."""
+
+    def remove(self, listing_ids: Iterable[object]) -> None:
+        """Drop index entries for deleted listings."""
+
+    def rebuild(self) -> int:
+        """Re-index every listing and return the number of rows indexed."""
+
+        return 0
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Search the generated ``search_vector`` column through its GIN index."""
+
+    def _tsquery(self, query: str) -> str:
+        return " & ".join(f"{term}:*" for term in parse_terms(query))
+
+    def filter(self, queryset: QuerySet, query: str) -> QuerySet:
+        tsquery = self._tsquery(query)
+        if not tsquery:
+            return queryset
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT id FROM {table} WHERE search_vector @@ to_tsquery('{POSTGRES_CONFIG}', %s)",
+                [tsquery],
+            )
+        )
+
+    def rank(self, queryset: QuerySet, query: str) -> QuerySet:
+        tsquery = self._tsquery(query)
+        if not tsquery:
+            return super().rank(queryset, query)
+        table = queryset.model._meta.db_table
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f"ts_rank_cd({table}.search_vector, to_tsquery('{POSTGRES_CONFIG}', %s))",
+                [tsquery],
+                output_field=FloatField(),
+            )
+        )
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """Search an FTS5 table with one row per listing, ranked with bm25."""
+
+    # bm25 weights for the (listing_id, title, vehicle, body) columns.
+    column_weights = (0.0, 10.0, 5.0, 1.0)
+
+    def _match(self, query: str) -> str:
+        return " ".join(f'"{term}"*' for term in parse_terms(query))
+
+    def filter(self, queryset: QuerySet, query: str) -> QuerySet:
+        match = self._match(query)
+        if not match:
+            return queryset
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT listing_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [match],
+            )
+        )
+
+    def rank(self, queryset: QuerySet, query: str) -> QuerySet:
+        match = self._match(query)
+        if not match:
+            return super().rank(queryset, query)
+        table = queryset.model._meta.db_table
+        weights = ", ".join(str(weight) for weight in self.column_weights)
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.listing_id = {table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    def _row(self, listing: "Listing") -> tuple[str, str, str, str]:
+        vehicle = " ".join(
+            str(part)
+            for part in (listing.year, listing.make, listing.model, listing.trim)
+            if part
+        )
+        return (
+            listing.pk.hex,
+            listing.title or "",
+            vehicle,
+            listing.search_document or "",
+        )
+
+    def index(self, listings: Iterable["Listing"]) -> None:
+        rows = [self._row(listing) for listing in listings]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE listing_id = %s",
+                [(row[0],) for row in rows],
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (listing_id, title, vehicle, body) VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, listing_ids: Iterable[object]) -> None:
+        params = [(getattr(pk, "hex", str(pk)),) for pk in listing_ids]
+        if params:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"DELETE FROM {FTS_TABLE} WHERE listing_id = %s", params
+                )
+
+    def rebuild(self) -> int:
+        from .models import Listing
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        total = 0
+        batch: list[Listing] = []
+        for listing in Listing.objects.only(
+            *SEARCH_DOCUMENT_FIELDS, "search_document"
+        ).iterator(chunk_size=500):
+            batch.append(listing)
+            if len(batch) >= 500:
+                self.index(batch)
+                total += len(batch)
+                batch = []
+        self.index(batch)
+        return total + len(batch)
+
+
+VENDOR_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteFTSSearchBackend,
+}
+
+_backends: dict[str, BaseSearchBackend] = {}
+
+
+def get_search_backend() -> BaseSearchBackend:
+    """Return the configured backend, picking one per database vendor on ``auto``."""
+
+    path = getattr(settings, "LISTING_SEARCH_BACKEND", "auto") or "auto"
+    key = f"{path}:{connection.vendor}"
+    backend = _backends.get(key)
+    if backend is None:
+        if path == "auto":
+            backend_class = VENDOR_BACKENDS.get(connection.vendor, BaseSearchBackend)
+        else:
+            backend_class = import_string(path)
+        backend = backend_class()
+        _backends[key] = backend
+    return backend
+
+
+@receiver(
+    post_delete,
+    sender="listings.Listing",
+    dispatch_uid="listings.search.listing_deleted",
+)
+def remove_deleted_listing(sender: Any, instance: "Listing", **kwargs: Any) -> None:
+    get_search_backend().remove([instance.pk])
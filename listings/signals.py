@@ -0,0 +1,43 @@
+"""Catalogue change notifications.
+
+``catalogue_changed`` fires whenever a listing enters, leaves or changes
+inside the public (active) set, so caches derived from the catalogue can be
+invalidated in one place. Bulk operations send a single signal for a batch.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from django.db.models.signals import post_delete
+from django.dispatch import Signal, receiver
+
+# Sent with ``listing_ids``, ``activated`` and ``deactivated`` (lists of primary keys).
+catalogue_changed = Signal()
+
+
+def notify_catalogue_changed(
+    listing_ids: Iterable[Any],
+    *,
+    activated: Iterable[Any] = (),
+    deactivated: Iterable[Any] = (),
+) -> None:
+    from .models import Listing
+
+    ids = list(listing_ids)
+    if not ids:
+        return
+    catalogue_changed.send(
+        sender=Listing,
+        listing_ids=ids,
+        activated=list(activated),
+        deactivated=list(deactivated),
+    )
+
+
+@receiver(
+    post_delete, sender="listings.Listing", dispatch_uid="listings.listing_deleted"
+)
+def listing_deleted(sender: Any, instance: Any, **kwargs: Any) -> None:
+    if instance.is_active:
+        notify_catalogue_changed([instance.pk], deactivated=[instance.pk])
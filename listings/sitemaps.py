@@ -1,18 +1,114 @@
-from django.contrib.sitemaps import Sitemap
+"""Listing entries for the sharded sitemap (see ``config.sitemaps``).
+
+Listings are split into shards of ``SITEMAP_SHARD_SIZE`` URLs in primary-key
+order. The shard boundaries (first pk, size and newest ``updated_at`` of each
+shard) are computed in one streaming pass over ``(pk, updated_at)`` pairs and
+cached; a shard then reads ``(slug, updated_at)`` for its pk range only. No
+full Listing rows are loaded.
+
+Shard boundaries and rendered shards are cached under a version token that is
+replaced whenever a listing is activated or leaves the catalogue. Changes to a
+listing that stays active only move its ``lastmod``, which may lag by up to
+``SITEMAP_CACHE_TIMEOUT``.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import receiver
 from django.urls import reverse
 
 from .models import Listing
+from .signals import catalogue_changed
+
+VERSION_KEY = "listing-sitemap:version"
+
+
+@dataclass(frozen=True)
+class Shard:
+    first_pk: Any
+    size: int
+    lastmod: datetime | None
+
+
+def shard_size() -> int:
+    # The sitemap protocol caps a file at 50,000 URLs.
+    return min(max(int(getattr(settings, "SITEMAP_SHARD_SIZE", 50000)), 1), 50000)
+
+
+def sitemap_version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return str(version)
+
+
+def invalidate_sitemaps() -> None:
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+@receiver(catalogue_changed, dispatch_uid="listings.sitemaps.invalidate")
+def invalidate_on_membership_change(
+    sender: Any, activated: Any = (), deactivated: Any = (), **kwargs: Any
+) -> None:
+    if activated or deactivated:
+        invalidate_sitemaps()
+        transaction.on_commit(invalidate_sitemaps)
+
+
+def _active() -> Any:
+    return Listing.objects.active().order_by("pk")
+
+
+def compute_shards(size: int | None = None) -> list[Shard]:
+    size = size or shard_size()
+    shards: list[Shard] = []
+    first_pk: Any = None
+    count = 0
+    lastmod: datetime | None = None
+    for pk, updated_at in (
+        _active().values_list("pk", "updated_at").iterator(chunk_size=5000)
+    ):
+        if count == size:
+            shards.append(Shard(first_pk, count, lastmod))
+            count, lastmod = 0, None
+        if count == 0:
+            first_pk = pk
+        count += 1
+        if updated_at and (lastmod is None or updated_at > lastmod):
+            lastmod = updated_at
+    if count:
+        shards.append(Shard(first_pk, count, lastmod))
+    return shards
 
 
-class ListingSitemap(Sitemap):
-    changefreq = "daily"
-    priority = 0.8
+def get_shards() -> list[Shard]:
+    size = shard_size()
+    key = f"listing-sitemap:{sitemap_version()}:shards:{size}"
+    shards = cache.get(key)
+    if shards is None:
+        shards = compute_shards(size)
+        cache.set(key, shards, int(getattr(settings, "SITEMAP_CACHE_TIMEOUT", 3600)))
+    return shards
 
-    def items(self):
-        return Listing.objects.active()
 
-    def lastmod(self, obj: Listing):
-        return obj.updated_at or obj.published_at
+def shard_entries(
+    shards: list[Shard], index: int
+) -> Iterator[tuple[str, datetime | None]]:
+    """Yield ``(path, lastmod)`` for shard ``index``, streaming from the database."""
 
-    def location(self, obj: Listing) -> str:
-        return reverse("listings:detail", args=[obj.slug])
+    queryset = _active().filter(pk__gte=shards[index].first_pk)
+    if index + 1 < len(shards):
+        queryset = queryset.filter(pk__lt=shards[index + 1].first_pk)
+    for slug, updated_at in queryset.values_list("slug", "updated_at").iterator(
+        chunk_size=2000
+    ):
+        yield reverse("listings:detail", args=[slug]), updated_at
@@ -1,56 +1,322 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
+import sys
+from datetime import timedelta
 from io import BytesIO
 from typing import Any
 
 from celery import shared_task
 from django.apps import apps
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.base import File
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
-from PIL import Image, ImageOps
+from PIL import ExifTags, Image, ImageOps
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+from .emails import (
+    build_saved_search_digest,
+    send_bulk_notifications,
+    send_inquiry_notification,
+)
+from .fragments import invalidate_listings
+from .inbox import reconcile_counters
+from .models import InquiryDeliveryStatus, ListingStatus
+from .signals import notify_catalogue_changed
 
 logger = logging.getLogger(__name__)
 
-DERIVATIVE_SPECS = {
-    "thumbnail": {"size": (320, 320), "quality": 75},
-    "display": {"size": (1280, 1280), "quality": 85},
+# Encoder settings per output format; AVIF needs a Pillow build with an AVIF encoder.
+DERIVATIVE_FORMATS: dict[str, dict[str, Any]] = {
+    "avif": {
+        "pillow": "AVIF",
+        "extension": "avif",
+        "type": "image/avif",
+        "options": {"quality": 55},
+    },
+    "webp": {
+        "pillow": "WEBP",
+        "extension": "webp",
+        "type": "image/webp",
+        "options": {"quality": 78, "method": 4},
+    },
+    "jpeg": {
+        "pillow": "JPEG",
+        "extension": "jpg",
+        "type": "image/jpeg",
+        "options": {"quality": 82, "optimize": True, "progressive": True},
+    },
 }
 
 
+def _encoder_available(fmt: str) -> bool:
+    Image.init()
+    return DERIVATIVE_FORMATS[fmt]["pillow"] in Image.SAVE
+
+
+def get_derivative_matrix() -> list[dict[str, Any]]:
+    """Return one spec per (width, format) from ``LISTING_PHOTO_WIDTHS`` x ``LISTING_PHOTO_FORMATS``.
+
+    JPEG is always rendered as the ``<img>`` fallback; formats without an
+    encoder in this Pillow build are skipped.
+    """
+
+    widths = sorted(
+        {
+            int(width)
+            for width in getattr(settings, "LISTING_PHOTO_WIDTHS", [320, 1280])
+            if int(width) > 0
+        }
+    )
+    formats = [
+        fmt
+        for fmt in getattr(settings, "LISTING_PHOTO_FORMATS", ["jpeg"])
+        if fmt in DERIVATIVE_FORMATS and fmt != "jpeg" and _encoder_available(fmt)
+    ]
+    formats.append("jpeg")
+    return [
+        {
+            "key": f"{fmt}-{width}",
+            "width": width,
+            "format": fmt,
+            **DERIVATIVE_FORMATS[fmt],
+        }
+        for width in widths
+        for fmt in formats
+    ]
+
+
+def _peak_rss_kb() -> int | None:
+    """High-water mark of this process's resident set size, in KiB."""
+
+    if resource is None:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _fit(size: tuple[int, int], box: int) -> tuple[int, int]:
+    """Size of ``size`` scaled down (never up) to fit a ``box`` x ``box`` square."""
+
+    width, height = size
+    scale = min(box / max(width, height), 1.0)
+    return max(round(width * scale), 1), max(round(height * scale), 1)
+
+
+def _decode_for(source: Image.Image, box: int) -> Image.Image:
+    """Decode ``source`` once, at the smallest resolution that still covers ``box``.
+
+    JPEGs are DCT-scaled while decoding (``draft``); other formats are decoded
+    in full and box-reduced by an integer factor, keeping at least 2x headroom
+    for the final Lanczos resample. The result is upright and RGB/L.
+    """
+
+    # A square box fits the same way before and after EXIF rotation.
+    target = _fit(source.size, box)
+    source.draft(None, target)
+    source.load()
+    image = source
+    if image.mode not in ("RGB", "L"):
+        image = source.convert("RGB")
+        source.close()
+    factor = min(image.width // (target[0] * 2), image.height // (target[1] * 2))
+    if factor >= 2:
+        reduced = image.reduce(factor)
+        image.close()
+        image = reduced
+    ImageOps.exif_transpose(image, in_place=True)
+    return image
+
+
+def derivative_spec_fingerprint(matrix: list[dict[str, Any]] | None = None) -> str:
+    """Short hash of the derivative matrix, stored as ``Photo.derivatives["spec"]``.
+
+    Photos whose stored fingerprint differs were rendered with an older matrix.
+    """
+
+    specs = [
+        {key: spec[key] for key in ("key", "width", "format", "options")}
+        for spec in (matrix if matrix is not None else get_derivative_matrix())
+    ]
+    raw = json.dumps(specs, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def perceptual_hash(image: Image.Image) -> str:
+    """64-bit difference hash (dHash) as 16 hex digits; near-identical pictures differ in few bits."""
+
+    # One bit per horizontally adjacent pixel pair of a 9x8 grayscale thumbnail.
+    with image.convert("L") as gray, gray.resize((9, 8), Image.Resampling.BOX) as small:
+        pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for column in range(8):
+            bits = (bits << 1) | (
+                pixels[row * 9 + column] > pixels[row * 9 + column + 1]
+            )
+    return f"{bits:016x}"
+
+
+def _content_sha256(file: Any) -> str:
+    digest = hashlib.sha256()
+    for block in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _derivative_names(derivatives: Any) -> set[str]:
+    return {
+        str(data.get("name"))
+        for data in (derivatives or {}).values()
+        if isinstance(data, dict) and data.get("name")
+    }
+
+
+def _processed_twin(photo: Any, digest: str, spec: str) -> Any:
+    """Another photo with the same original bytes whose derivatives match the current matrix, if any."""
+
+    twin = (
+        type(photo)
+        .objects.filter(
+            sha256=digest, processed_at__isnull=False, derivatives__spec=spec
+        )
+        .exclude(pk=photo.pk)
+        .order_by("pk")
+        .first()
+    )
+    display = twin.get_derivative_info("display") if twin else None
+    if not display or not photo.image.storage.exists(display["name"]):
+        return None
+    return twin
+
+
+def _delete_stale_derivatives(photo: Any, names: set[str], digests: set[str]) -> None:
+    """Delete ``names`` unless another photo with one of ``digests`` still points at them."""
+
+    if not names:
+        return
+    shared: set[str] = set()
+    twins = (
+        type(photo)
+        .objects.filter(sha256__in=[digest for digest in digests if digest])
+        .exclude(pk=photo.pk)
+    )
+    for derivatives in twins.values_list("derivatives", flat=True):
+        shared |= _derivative_names(derivatives)
+    for name in names - shared:
+        try:
+            photo.image.storage.delete(name)
+        except Exception:  # pragma: no cover - storage implementations vary
+            logger.debug(
+                "Could not delete stale derivative %s for photo %s", name, photo.pk
+            )
+
+
+def _share_derivatives(photo: Any, twin: Any, previous_digest: str) -> dict[str, Any]:
+    existing_names = _derivative_names(photo.derivatives)
+    photo.original_width, photo.original_height = (
+        twin.original_width,
+        twin.original_height,
+    )
+    photo.processed_at = timezone.now()
+    photo.derivatives = dict(twin.derivatives)
+    photo.sha256 = twin.sha256
+    photo.perceptual_hash = twin.perceptual_hash
+    photo.save(
+        update_fields=[
+            "original_width",
+            "original_height",
+            "processed_at",
+            "derivatives",
+            "sha256",
+            "perceptual_hash",
+            "updated_at",
+        ]
+    )
+    _delete_stale_derivatives(
+        photo,
+        existing_names - _derivative_names(photo.derivatives),
+        {previous_digest, twin.sha256},
+    )
+    logger.info(
+        "Photo %s reuses the derivatives of identical photo %s.", photo.pk, twin.pk
+    )
+    return {
+        "status": "processed",
+        "photo_id": photo.pk,
+        "derivatives": 0,
+        "shared_with": twin.pk,
+        "original_size": [photo.original_width, photo.original_height],
+    }
+
+
 @shared_task(name="listings.process_listing_photo")
-def process_listing_photo(photo_id: int) -> str:
-    """Generate optimized derivatives and metadata for uploaded listing photos."""
+def process_listing_photo(photo_id: int) -> dict[str, Any]:
+    """Generate responsive derivatives (every configured width and format) and metadata for a listing photo.
+
+    The original is streamed from storage and decoded once at the largest size
+    needed; each smaller width is resampled from the previous one. The result
+    reports the worker's peak RSS so worker memory can be sized. A photo whose
+    original has the same SHA-256 as an already processed photo reuses that
+    photo's derivatives instead of encoding its own.
+    """
 
     Photo = apps.get_model("listings", "Photo")
     photo = Photo.objects.filter(pk=photo_id).first()
     if not photo:
-        logger.warning("Skipping photo processing; photo %s no longer exists.", photo_id)
-        return "missing"
+        logger.warning(
+            "Skipping photo processing; photo %s no longer exists.", photo_id
+        )
+        return {"status": "missing", "photo_id": photo_id}
     if not photo.image:
         logger.warning("Skipping photo %s; no original image attached.", photo.pk)
-        return "missing"
+        return {"status": "missing", "photo_id": photo_id}
 
+    matrix = get_derivative_matrix()
+    spec_fingerprint = derivative_spec_fingerprint(matrix)
+    widths = sorted({spec["width"] for spec in matrix}, reverse=True)
+    rss_before = _peak_rss_kb()
     storage = photo.image.storage
     image_name = photo.image.name
+    previous_digest = photo.sha256
     try:
         with storage.open(image_name, "rb") as original_file:
-            original_bytes = original_file.read()
+            digest = _content_sha256(original_file)
+            twin = _processed_twin(photo, digest, spec_fingerprint)
+            if twin is not None:
+                return _share_derivatives(photo, twin, previous_digest)
+            try:
+                source = Image.open(original_file)
+                orientation = source.getexif().get(ExifTags.Base.Orientation)
+                source_size = (
+                    source.size[::-1] if orientation in (5, 6, 7, 8) else source.size
+                )
+                image = _decode_for(source, widths[0])
+            except Exception as exc:
+                logger.exception("Unable to decode photo %s: %s", photo.pk, exc)
+                return {"status": "error", "photo_id": photo.pk}
     except FileNotFoundError:
-        logger.warning("Original image for photo %s not found at %s.", photo.pk, image_name)
-        return "missing"
-    except Exception as exc:  # pragma: no cover - storage/credential issues vary per env
+        logger.warning(
+            "Original image for photo %s not found at %s.", photo.pk, image_name
+        )
+        return {"status": "missing", "photo_id": photo.pk}
+    except (
+        Exception
+    ) as exc:  # pragma: no cover - storage/credential issues vary per env
         logger.exception("Error opening photo %s: %s", photo.pk, exc)
-        return "error"
-
-    try:
-        image = Image.open(BytesIO(original_bytes))
-        image = ImageOps.exif_transpose(image)
-        image.load()
-    except Exception as exc:
-        logger.exception("Unable to decode photo %s: %s", photo.pk, exc)
-        return "error"
+        return {"status": "error", "photo_id": photo.pk}
+    decoded_size = image.size
+    fingerprint = perceptual_hash(image)
 
     derivatives: dict[str, Any] = {}
     new_file_names: set[str] = set()
@@ -59,70 +325,394 @@ def process_listing_photo(photo_id: int) -> str:
         for data in (photo.derivatives or {}).values()
         if isinstance(data, dict) and data.get("name")
     }
+    base, _ = os.path.splitext(image_name)
+    rendered_sizes: set[tuple[int, int]] = set()
 
-    for key, spec in DERIVATIVE_SPECS.items():
-        derivative_image = image.copy()
-        derivative_image.thumbnail(spec["size"], Image.Resampling.LANCZOS)
-        if derivative_image.mode not in ("RGB", "L"):
-            derivative_image = derivative_image.convert("RGB")
-
-        width, height = derivative_image.width, derivative_image.height
-
-        buffer = BytesIO()
-        derivative_image.save(
-            buffer,
-            format="JPEG",
-            quality=spec.get("quality", 85),
-            optimize=True,
-            progressive=True,
-        )
-        derivative_image.close()
-        buffer.seek(0)
+    current = image
+    for target_width in widths:
+        size = _fit(source_size, target_width)
+        if size != current.size:
+            resized = current.resize(size, Image.Resampling.LANCZOS)
+            current.close()
+            current = resized
+        if size in rendered_sizes:
+            # The original is smaller than this width; identical files already exist.
+            continue
+        rendered_sizes.add(size)
 
-        base, _ = os.path.splitext(image_name)
-        derivative_name = f"{base}_{key}.jpg"
-        try:
-            storage.delete(derivative_name)
-        except Exception:  # pragma: no cover - deleting stale file best effort
-            pass
-        saved_name = storage.save(derivative_name, ContentFile(buffer.getvalue()))
-        new_file_names.add(saved_name)
-
-        derivative_info: dict[str, Any] = {
-            "name": saved_name,
-            "width": width,
-            "height": height,
-        }
-        try:
-            derivative_info["url"] = storage.url(saved_name)
-        except Exception:  # pragma: no cover - storages may need configuration
-            pass
-        derivatives[key] = derivative_info
+        for spec in (spec for spec in matrix if spec["width"] == target_width):
+            buffer = BytesIO()
+            current.save(buffer, format=spec["pillow"], **spec["options"])
+            buffer.seek(0)
+
+            derivative_name = f"{base}_{spec['width']}w.{spec['extension']}"
+            try:
+                storage.delete(derivative_name)
+            except Exception:  # pragma: no cover - deleting stale file best effort
+                pass
+            saved_name = storage.save(
+                derivative_name, File(buffer, name=derivative_name)
+            )
+            new_file_names.add(saved_name)
 
-    image_width = getattr(image, "width", None)
-    image_height = getattr(image, "height", None)
-    image.close()
+            derivative_info: dict[str, Any] = {
+                "name": saved_name,
+                "width": size[0],
+                "height": size[1],
+                "format": spec["format"],
+                "type": spec["type"],
+            }
+            try:
+                derivative_info["url"] = storage.url(saved_name)
+            except Exception:  # pragma: no cover - storages may need configuration
+                pass
+            derivatives[spec["key"]] = derivative_info
+    current.close()
 
-    photo.original_width = image_width
-    photo.original_height = image_height
+    # Keep the original single-size keys pointing at the smallest and largest JPEGs.
+    jpegs = sorted(
+        (info for info in derivatives.values() if info["format"] == "jpeg"),
+        key=lambda info: info["width"],
+    )
+    if jpegs:
+        for alias, info in (("thumbnail", jpegs[0]), ("display", jpegs[-1])):
+            derivatives[alias] = {
+                key: info[key]
+                for key in ("name", "width", "height", "url")
+                if key in info
+            }
+
+    derivatives["spec"] = spec_fingerprint
+
+    photo.original_width, photo.original_height = source_size
     photo.processed_at = timezone.now()
     photo.derivatives = derivatives
+    photo.sha256 = digest
+    photo.perceptual_hash = fingerprint
     photo.save(
         update_fields=[
             "original_width",
             "original_height",
             "processed_at",
             "derivatives",
+            "sha256",
+            "perceptual_hash",
             "updated_at",
         ]
     )
 
-    stale_files = existing_names - new_file_names
-    for name in stale_files:
-        try:
-            storage.delete(name)
-        except Exception:  # pragma: no cover - storage implementations vary
-            logger.debug("Could not delete stale derivative %s for photo %s", name, photo.pk)
+    _delete_stale_derivatives(
+        photo, existing_names - new_file_names, {previous_digest, digest}
+    )
+
+    peak_rss_kb = _peak_rss_kb()
+    logger.info(
+        "Processed photo %s into %d derivatives (decoded at %sx%s, peak RSS %s KiB).",
+        photo.pk,
+        len(new_file_names),
+        decoded_size[0],
+        decoded_size[1],
+        peak_rss_kb,
+    )
+    return {
+        "status": "processed",
+        "photo_id": photo.pk,
+        "derivatives": len(new_file_names),
+        "original_size": list(source_size),
+        "decoded_size": list(decoded_size),
+        "peak_rss_kb": peak_rss_kb,
+        "rss_growth_kb": (
+            peak_rss_kb - rss_before
+            if peak_rss_kb is not None and rss_before is not None
+            else None
+        ),
+    }
+
+
+def _delivery_retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff between delivery attempts, capped at an hour."""
+
+    base = int(getattr(settings, "INQUIRY_DELIVERY_RETRY_DELAY", 30))
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 3600))
+
+
+def _claim_delivery(delivery_id: int) -> Any:
+    """Lease a due outbox row so concurrent workers cannot send it twice.
+
+    The lease pushes ``available_at`` forward; if the worker dies mid-send the
+    row simply becomes due again once the lease runs out.
+    """
+
+    InquiryDelivery = apps.get_model("listings", "InquiryDelivery")
+    now = timezone.now()
+    lease = int(getattr(settings, "INQUIRY_DELIVERY_LEASE_SECONDS", 300))
+    with transaction.atomic():
+        delivery = (
+            InquiryDelivery.objects.select_for_update(skip_locked=True)
+            .filter(
+                pk=delivery_id,
+                status=InquiryDeliveryStatus.PENDING,
+                available_at__lte=now,
+            )
+            .first()
+        )
+        if delivery is None:
+            return None
+        delivery.attempts += 1
+        delivery.available_at = now + timedelta(seconds=lease)
+        delivery.save(update_fields=["attempts", "available_at", "updated_at"])
+    return delivery
+
+
+@shared_task(name="listings.deliver_inquiry")
+def deliver_inquiry(delivery_id: int) -> str:
+    """Send the seller notification for one outbox row and record the outcome."""
+
+    Inquiry = apps.get_model("listings", "Inquiry")
+    InquiryEvent = apps.get_model("listings", "InquiryEvent")
+    delivery = _claim_delivery(delivery_id)
+    if delivery is None:
+        return "skipped"
+
+    inquiry = Inquiry.objects.select_related("listing", "listing__seller").get(
+        pk=delivery.inquiry_id
+    )
+    send_success, delivery_data = send_inquiry_notification(inquiry)
+    max_attempts = max(int(getattr(settings, "INQUIRY_DELIVERY_MAX_ATTEMPTS", 5)), 1)
+    now_ts = timezone.now()
+    metadata = {**delivery_data, "attempt": delivery.attempts}
+
+    with transaction.atomic():
+        inquiry.last_attempted_at = now_ts
+        inquiry.delivery_reference = str(
+            delivery_data.get("message_id") or delivery_data.get("backend") or ""
+        )
+        update_fields = [
+            "delivery_status",
+            "delivery_reference",
+            "delivery_error",
+            "last_attempted_at",
+            "updated_at",
+        ]
+        if send_success:
+            delivery.status = inquiry.delivery_status = InquiryDeliveryStatus.SENT
+            delivery.last_error = inquiry.delivery_error = ""
+            inquiry.delivered_at = now_ts
+            update_fields.append("delivered_at")
+            InquiryEvent.objects.create(
+                inquiry=inquiry,
+                event_type=InquiryEvent.EventType.EMAIL_SENT,
+                message="Inquiry email delivered to seller.",
+                metadata=metadata,
+            )
+            result = "sent"
+        else:
+            error = str(
+                delivery_data.get("error") or "Unable to deliver inquiry email."
+            )
+            delivery.last_error = inquiry.delivery_error = error
+            if delivery.attempts >= max_attempts:
+                delivery.status = inquiry.delivery_status = InquiryDeliveryStatus.FAILED
+                event_message = "Inquiry email delivery failed."
+                result = "failed"
+            else:
+                delivery.available_at = now_ts + _delivery_retry_delay(
+                    delivery.attempts
+                )
+                metadata["retry_at"] = delivery.available_at.isoformat()
+                event_message = "Inquiry email delivery failed; retry scheduled."
+                result = "retry"
+            InquiryEvent.objects.create(
+                inquiry=inquiry,
+                event_type=InquiryEvent.EventType.EMAIL_FAILED,
+                message=event_message,
+                metadata=metadata,
+            )
+        inquiry.save(update_fields=update_fields)
+        delivery.save(
+            update_fields=["status", "available_at", "last_error", "updated_at"]
+        )
+
+    logger.info(
+        "Inquiry delivery %s attempt %d: %s", delivery.pk, delivery.attempts, result
+    )
+    return result
+
+
+@shared_task(name="listings.drain_inquiry_outbox")
+def drain_inquiry_outbox(limit: int = 100) -> int:
+    """Deliver due outbox rows (missed enqueues, retries and expired leases)."""
+
+    InquiryDelivery = apps.get_model("listings", "InquiryDelivery")
+    due_ids = list(
+        InquiryDelivery.objects.filter(
+            status=InquiryDeliveryStatus.PENDING, available_at__lte=timezone.now()
+        )
+        .order_by("available_at")
+        .values_list("pk", flat=True)[:limit]
+    )
+    processed = 0
+    for delivery_id in due_ids:
+        if deliver_inquiry(delivery_id) != "skipped":
+            processed += 1
+    return processed
+
+
+@shared_task(name="listings.send_saved_search_digests")
+def send_saved_search_digests(batch_size: int | None = None) -> dict[str, int]:
+    """Email each user one digest of the listings that matched their saved searches since the last one.
+
+    A search is due once ``SAVED_SEARCH_DIGEST_WINDOW`` seconds have passed since
+    its watermark; only matches newer than the watermark are read, and the
+    watermark advances only after the user's digest was sent.
+    """
+
+    Listing = apps.get_model("listings", "Listing")
+    SavedSearch = apps.get_model("listings", "SavedSearch")
+    SavedSearchMatch = apps.get_model("listings", "SavedSearchMatch")
+    batch_size = max(
+        int(batch_size or getattr(settings, "SAVED_SEARCH_DIGEST_BATCH_SIZE", 100)), 1
+    )
+    window = timedelta(
+        seconds=max(int(getattr(settings, "SAVED_SEARCH_DIGEST_WINDOW", 3600)), 0)
+    )
+    cutoff = timezone.now()
+
+    due_searches = SavedSearch.objects.filter(
+        Q(last_notified_at__isnull=True) | Q(last_notified_at__lte=cutoff - window)
+    )
+    pending = SavedSearchMatch.objects.filter(
+        saved_search__in=due_searches, created_at__lte=cutoff
+    ).filter(
+        Q(saved_search__last_notified_at__isnull=True)
+        | Q(created_at__gt=F("saved_search__last_notified_at"))
+    )
+    user_ids = list(
+        pending.order_by("saved_search__user_id")
+        .values_list("saved_search__user_id", flat=True)
+        .distinct()
+    )
+
+    totals = {"sent": 0, "failed": 0, "listings": 0}
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start : start + batch_size]
+        digests: dict[int, tuple[str, dict[int, tuple[Any, list[Any]]]]] = {}
+        matches = (
+            pending.filter(
+                saved_search__user_id__in=chunk, listing__in=Listing.objects.active()
+            )
+            .select_related("saved_search__user", "listing")
+            .order_by("saved_search__user_id", "saved_search_id", "-created_at")
+        )
+        for match in matches:
+            search = match.saved_search
+            groups = digests.setdefault(search.user_id, (search.user.email, {}))[1]
+            groups.setdefault(search.pk, (search, []))[1].append(match.listing)
+
+        recipients = [user_id for user_id, (email, _) in digests.items() if email]
+        messages = [
+            build_saved_search_digest(
+                digests[user_id][0], list(digests[user_id][1].values())
+            )
+            for user_id in recipients
+        ]
+        results = send_bulk_notifications(messages) if messages else []
+        failed = {user_id for user_id, (ok, _) in zip(recipients, results) if not ok}
+        for user_id, (ok, metadata) in zip(recipients, results):
+            if ok:
+                totals["sent"] += 1
+                totals["listings"] += sum(
+                    len(listings) for _, listings in digests[user_id][1].values()
+                )
+            else:
+                totals["failed"] += 1
+                logger.warning(
+                    "Saved-search digest for user %s failed: %s",
+                    user_id,
+                    metadata.get("error"),
+                )
+
+        # Users whose matches have all left the catalogue advance too, so they are not rescanned.
+        delivered = [user_id for user_id in chunk if user_id not in failed]
+        due_searches.filter(user_id__in=delivered).update(
+            last_notified_at=cutoff, updated_at=timezone.now()
+        )
+
+    logger.info(
+        "Saved-search digests: %(sent)d sent, %(failed)d failed, %(listings)d listings",
+        totals,
+    )
+    return totals
+
+
+@shared_task(name="listings.archive_expired_listings")
+def archive_expired_listings(batch_size: int | None = None) -> int:
+    """Move approved listings whose ``expires_at`` has passed to ARCHIVED, one batched UPDATE at a time.
+
+    Each batch fires what a manual archive's ``save()`` would: the catalogue
+    signal (facets, sitemaps) and the detail fragment versions. Returns the
+    number of listings archived.
+    """
+
+    Listing = apps.get_model("listings", "Listing")
+    batch_size = max(
+        int(batch_size or getattr(settings, "LISTING_EXPIRY_BATCH_SIZE", 500)), 1
+    )
+    archived = 0
+    while True:
+        with transaction.atomic():
+            # Locked, so a seller renewing one of these listings waits for the batch.
+            selected = (
+                Listing.objects.expired().select_for_update().order_by("expires_at")
+            )
+            ids = list(selected.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            now = timezone.now()
+            # Re-check the predicate so a listing edited since the SELECT is left alone (SQLite has no row locks).
+            count = (
+                Listing.objects.expired()
+                .filter(pk__in=ids)
+                .update(
+                    status=ListingStatus.ARCHIVED,
+                    published_at=None,
+                    is_promoted=False,
+                    updated_at=now,
+                )
+            )
+            archived_ids = ids
+            if count < len(ids):
+                # Only the rows this UPDATE wrote carry its timestamp.
+                archived_ids = list(
+                    Listing.objects.filter(
+                        pk__in=ids, status=ListingStatus.ARCHIVED, updated_at=now
+                    ).values_list("pk", flat=True)
+                )
+            if archived_ids:
+                notify_catalogue_changed(archived_ids, deactivated=archived_ids)
+                invalidate_listings(archived_ids)
+        archived += count
+        if len(ids) < batch_size:
+            break
+
+    if archived:
+        logger.info("Archived %d expired listings", archived)
+    return archived
+
+
+@shared_task(name="listings.reconcile_unread_counters")
+def reconcile_unread_counters() -> int:
+    """Correct seller unread-inquiry counters that drifted from the inquiries table."""
+
+    return reconcile_counters()
+
+
+@shared_task(name="listings.import_dealer_feed")
+def import_dealer_feed(dealer_id: int, source: str, **options: Any) -> dict[str, Any]:
+    """Import one dealer's inventory feed; see ``listings.feeds``."""
+
+    from .feeds import import_feed
 
-    logger.info("Processed photo %s into %d derivatives.", photo.pk, len(derivatives))
-    return str(photo.pk)
+    DealerProfile = apps.get_model("dealers", "DealerProfile")
+    dealer = DealerProfile.objects.select_related("user").get(pk=dealer_id)
+    return import_feed(dealer, source, **options).as_dict()
@@ -2,6 +2,7 @@ from django import template
 
 register = template.Library()
 
+
 @register.simple_tag
 def remove_filter_from_query(request, key, value):
     updated_query = request.GET.copy()
@@ -10,4 +11,15 @@ def remove_filter_from_query(request, key, value):
         if value in values:
             values.remove(value)
             updated_query.setlist(key, values)
-    return updated_query.urlencode()
\ No newline at end of file
+    updated_query.pop("page", None)
+    updated_query.pop("cursor", None)
+    return updated_query.urlencode()
+
+
+@register.filter
+def facet_count(counts, value):
+    """Return the facet count for ``value`` (0 when absent)."""
+
+    if not counts:
+        return 0
+    return counts.get(value, 0)
@@ -1,37 +1,63 @@
-from decimal import Decimal
 import json
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from threading import Thread
 from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.core import mail
-from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from PIL import Image
 
+from config import aws, ratelimit, slugs
 from dealers.models import DealerProfile
 from guides.registry import get_guides
-
+from listings.duplicates import DuplicateGroup, find_duplicate_groups, hamming
+from listings.emails import send_inquiry_notification
+from listings.facets import get_facets
+from listings.feeds import FeedError, import_feed
+from listings.filters import parse_listing_filters
+from listings.management.commands.seed_models import MODEL_SPECS
 from listings.models import (
+    ChargePort,
+    Drivetrain,
     Inquiry,
+    InquiryDelivery,
     InquiryDeliveryStatus,
     InquiryEvent,
     InquiryStatus,
     Listing,
+    ListingQuerySet,
     ListingStatus,
     ModelSpec,
     Photo,
     Province,
-    ChargePort,
-    Drivetrain,
     SavedSearch,
+    SavedSearchMatch,
+)
+from listings.percolator import Percolator, index_search
+from listings.photos import enqueue_processing, resolve_source
+from listings.tasks import (
+    archive_expired_listings,
+    deliver_inquiry,
+    drain_inquiry_outbox,
+    import_dealer_feed,
+    process_listing_photo,
+    send_saved_search_digests,
 )
-from listings.tasks import process_listing_photo
-from listings.management.commands.seed_models import MODEL_SPECS
 
 
 class SeedModelsCommandTests(TestCase):
@@ -72,6 +98,21 @@ class SeedModelsCommandTests(TestCase):
         self.assertEqual(failed.delivery_status, InquiryDeliveryStatus.FAILED)
         self.assertIn("sandbox", failed.delivery_error)
 
+    def test_explain_catalogue_finds_no_sequential_scans(self) -> None:
+        call_command("seed_models", verbosity=0)
+        out = StringIO()
+        call_command("explain_catalogue", stdout=out)
+        self.assertIn("no sequential scans", out.getvalue())
+
+        with mock.patch(
+            "django.db.models.query.QuerySet.explain",
+            return_value="3 0 0 SCAN listings_listing",
+        ):
+            with self.assertRaisesMessage(
+                CommandError, "price-max: sequential scan on listings_listing"
+            ):
+                call_command("explain_catalogue", shape=["price-max"], verbosity=0)
+
 
 class ListingModelTests(TestCase):
     def setUp(self) -> None:
@@ -105,6 +146,162 @@ class ListingModelTests(TestCase):
         self.assertIsNotNone(listing.approved_at)
         self.assertIsNotNone(listing.published_at)
 
+    def test_archive_expired_listings_in_batches(self) -> None:
+        past = timezone.now() - timedelta(hours=1)
+        fields = {
+            "seller": self.user,
+            "year": 2022,
+            "make": "Kia",
+            "model": "Niro",
+            "price": 40000,
+            "province": "ON",
+            "city": "Ottawa",
+        }
+        expired = [
+            Listing.objects.create(
+                title=f"Expired {n}",
+                status=ListingStatus.APPROVED,
+                expires_at=past,
+                **fields,
+            )
+            for n in range(3)
+        ]
+        current = Listing.objects.create(
+            title="Current",
+            status=ListingStatus.APPROVED,
+            expires_at=timezone.now() + timedelta(days=1),
+            **fields,
+        )
+        draft = Listing.objects.create(
+            title="Draft", status=ListingStatus.DRAFT, expires_at=past, **fields
+        )
+        self.assertEqual(get_facets({})["makes"], {"Kia": 4})
+
+        with self.assertNumQueries(
+            8
+        ):  # a SELECT and an UPDATE per batch of two, inside savepoints
+            self.assertEqual(archive_expired_listings(batch_size=2), 3)
+
+        self.assertEqual(
+            set(
+                Listing.objects.filter(status=ListingStatus.ARCHIVED).values_list(
+                    "pk", flat=True
+                )
+            ),
+            {listing.pk for listing in expired},
+        )
+        self.assertFalse(
+            Listing.objects.filter(
+                pk=expired[0].pk, published_at__isnull=False
+            ).exists()
+        )
+        self.assertEqual(list(Listing.objects.active()), [current])
+        self.assertEqual(Listing.objects.get(pk=draft.pk).status, ListingStatus.DRAFT)
+        self.assertEqual(get_facets({})["makes"], {"Kia": 1})
+        self.assertEqual(archive_expired_listings(), 0)
+
+    def test_archive_expired_listings_skips_listings_renewed_mid_batch(self) -> None:
+        past = timezone.now() - timedelta(hours=1)
+        fields = {
+            "seller": self.user,
+            "year": 2022,
+            "make": "Kia",
+            "model": "Niro",
+            "price": 40000,
+            "province": "ON",
+            "city": "Ottawa",
+        }
+        expired, renewed = (
+            Listing.objects.create(
+                title=f"Expired {n}",
+                status=ListingStatus.APPROVED,
+                expires_at=past,
+                **fields,
+            )
+            for n in range(2)
+        )
+        real_expired = ListingQuerySet.expired
+        calls: list[ListingQuerySet] = []
+
+        def expired_then_renew(queryset: ListingQuerySet) -> ListingQuerySet:
+            # The seller renews between the batch's SELECT and its UPDATE.
+            if len(calls) == 1:
+                Listing.objects.filter(pk=renewed.pk).update(
+                    expires_at=timezone.now() + timedelta(days=30)
+                )
+            calls.append(queryset)
+            return real_expired(queryset)
+
+        with mock.patch.object(
+            ListingQuerySet, "expired", expired_then_renew
+        ), mock.patch("listings.tasks.notify_catalogue_changed") as notify, mock.patch(
+            "listings.tasks.invalidate_listings"
+        ) as invalidate:
+            self.assertEqual(archive_expired_listings(batch_size=2), 1)
+        notify.assert_called_once_with([expired.pk], deactivated=[expired.pk])
+        invalidate.assert_called_once_with([expired.pk])
+        self.assertEqual(
+            Listing.objects.get(pk=renewed.pk).status, ListingStatus.APPROVED
+        )
+
+    def test_slug_allocation_uses_one_query_and_survives_races(self) -> None:
+        fields = {
+            "seller": self.user,
+            "year": 2024,
+            "make": "Tesla",
+            "model": "Model 3",
+            "price": 50000,
+            "province": "ON",
+            "city": "Toronto",
+        }
+        first = Listing.objects.create(title="2024 Tesla Model 3", **fields)
+        Listing.objects.create(title="2024 Tesla Model 3 Long Range", **fields)
+        for _ in range(3):
+            Listing.objects.create(title="2024 Tesla Model 3", **fields)
+        self.assertEqual(first.slug, "2024-tesla-model-3")
+        with CaptureQueriesContext(connection) as queries:
+            fifth = Listing.objects.create(title="2024 Tesla Model 3", **fields)
+        self.assertEqual(fifth.slug, "2024-tesla-model-3-5")
+        self.assertEqual(
+            sum(
+                '"slug"' in query["sql"] and "SELECT" in query["sql"]
+                for query in queries
+            ),
+            1,
+        )
+
+        self.assertEqual(
+            slugs.allocate_slugs(
+                Listing, ["2024-tesla-model-3", "2024-kia-ev9", "2024-tesla-model-3"]
+            ),
+            ["2024-tesla-model-3-6", "2024-kia-ev9", "2024-tesla-model-3-7"],
+        )
+
+        # A concurrent save took the allocated slug: the INSERT fails and the slug is allocated again.
+        real = slugs.allocate_slug
+        with mock.patch("config.slugs.allocate_slug") as allocate:
+            allocate.side_effect = lambda model, base, **kwargs: (
+                first.slug if allocate.call_count == 1 else real(model, base, **kwargs)
+            )
+            retried = Listing.objects.create(title="2024 Tesla Model 3", **fields)
+        self.assertEqual(allocate.call_count, 2)
+        self.assertEqual(retried.slug, "2024-tesla-model-3-6")
+
+        # A title ending in a number looks like a suffix but does not push later slugs past it.
+        Listing.objects.create(title="Tesla Model 3 2022", **fields)
+        self.assertEqual(
+            Listing.objects.create(title="Tesla Model 3", **fields).slug,
+            "tesla-model-3",
+        )
+        self.assertEqual(
+            Listing.objects.create(title="Tesla Model 3", **fields).slug,
+            "tesla-model-3-2",
+        )
+        self.assertEqual(
+            slugs.allocate_slugs(Listing, ["tesla-model-3"] * 2),
+            ["tesla-model-3-3", "tesla-model-3-4"],
+        )
+
     def test_photo_primary_flags(self) -> None:
         listing = Listing.objects.create(
             seller=self.user,
@@ -120,7 +317,9 @@ class ListingModelTests(TestCase):
         )
 
         photo1 = Photo.objects.create(listing=listing, image="photos/test1.jpg")
-        photo2 = Photo.objects.create(listing=listing, image="photos/test2.jpg", is_primary=True)
+        photo2 = Photo.objects.create(
+            listing=listing, image="photos/test2.jpg", is_primary=True
+        )
         photo1.refresh_from_db()
         photo2.refresh_from_db()
 
@@ -156,6 +355,181 @@ class ListingModelTests(TestCase):
         inquiry.refresh_from_db()
         self.assertEqual(inquiry.status, InquiryStatus.CLOSED)
 
+    @override_settings(
+        LISTING_PHOTO_WIDTHS=[320, 640, 2400],
+        LISTING_PHOTO_FORMATS=["avif", "webp", "jpeg"],
+    )
+    def test_process_listing_photo_renders_width_and_format_matrix(self) -> None:
+        with TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+            listing = Listing.objects.create(
+                seller=self.user,
+                title="2021 Kia Niro EV",
+                year=2021,
+                make="Kia",
+                model="Niro EV",
+                price=30000,
+                province=Province.ON,
+                city="Ottawa",
+            )
+            buffer = BytesIO()
+            Image.new("RGB", (1600, 900), color="green").save(buffer, format="JPEG")
+            photo = Photo.objects.create(
+                listing=listing,
+                image=SimpleUploadedFile(
+                    "matrix.jpg", buffer.getvalue(), content_type="image/jpeg"
+                ),
+            )
+
+            process_listing_photo(photo.pk)
+            photo.refresh_from_db()
+
+            formats = ["webp", "jpeg"] + (["avif"] if "AVIF" in Image.SAVE else [])
+            for fmt in formats:
+                self.assertEqual(photo.derivatives[f"{fmt}-320"]["width"], 320)
+                self.assertEqual(photo.derivatives[f"{fmt}-640"]["width"], 640)
+                # Never upscaled past the original.
+                self.assertEqual(photo.derivatives[f"{fmt}-2400"]["width"], 1600)
+            self.assertEqual(photo.derivatives["webp-640"]["type"], "image/webp")
+            self.assertEqual(
+                photo.derivatives["thumbnail"]["name"],
+                photo.derivatives["jpeg-320"]["name"],
+            )
+            self.assertEqual(
+                photo.derivatives["display"]["name"],
+                photo.derivatives["jpeg-2400"]["name"],
+            )
+            with Image.open(
+                Path(tmpdir) / photo.derivatives["webp-640"]["name"]
+            ) as rendered:
+                self.assertEqual(rendered.format, "WEBP")
+
+            self.assertEqual(photo.srcset.count("w,"), 2)
+            self.assertTrue(photo.srcset.endswith(" 1600w"))
+            self.assertEqual(photo.picture_sources[-1]["type"], "image/webp")
+
+            listing.transition(ListingStatus.APPROVED)
+            response = self.client.get(reverse("listings:detail", args=[listing.slug]))
+            self.assertContains(response, '<source type="image/webp"')
+            self.assertContains(
+                response, photo.derivatives["jpeg-640"]["url"] + " 640w"
+            )
+
+    @override_settings(LISTING_PHOTO_WIDTHS=[320, 640], LISTING_PHOTO_FORMATS=["jpeg"])
+    def test_process_listing_photo_decodes_once_at_reduced_size(self) -> None:
+        with TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+            listing = Listing.objects.create(
+                seller=self.user,
+                title="2023 Tesla Model Y",
+                year=2023,
+                make="Tesla",
+                model="Model Y",
+                price=52000,
+                province=Province.BC,
+                city="Victoria",
+            )
+            exif = Image.Exif()
+            exif[0x0112] = 6  # stored landscape, displayed portrait
+            buffer = BytesIO()
+            Image.new("RGB", (4000, 3000), color="red").save(
+                buffer, format="JPEG", exif=exif
+            )
+            photo = Photo.objects.create(
+                listing=listing,
+                image=SimpleUploadedFile(
+                    "phone.jpg", buffer.getvalue(), content_type="image/jpeg"
+                ),
+            )
+
+            result = process_listing_photo(photo.pk)
+            photo.refresh_from_db()
+
+            self.assertEqual(result["status"], "processed")
+            self.assertEqual(result["derivatives"], 2)
+            self.assertEqual(result["original_size"], [3000, 4000])
+            # JPEG draft mode decoded at 1/4 scale instead of the full 12 MP bitmap.
+            self.assertEqual(result["decoded_size"], [750, 1000])
+            self.assertGreater(result["peak_rss_kb"], 0)
+            self.assertEqual(
+                (photo.original_width, photo.original_height), (3000, 4000)
+            )
+            self.assertEqual(
+                (
+                    photo.derivatives["jpeg-640"]["width"],
+                    photo.derivatives["jpeg-640"]["height"],
+                ),
+                (480, 640),
+            )
+            self.assertEqual(
+                (
+                    photo.derivatives["jpeg-320"]["width"],
+                    photo.derivatives["jpeg-320"]["height"],
+                ),
+                (240, 320),
+            )
+
+    @override_settings(LISTING_PHOTO_WIDTHS=[320], LISTING_PHOTO_FORMATS=["jpeg"])
+    def test_reprocess_photos_handles_stale_photos_and_resumes_from_checkpoint(
+        self,
+    ) -> None:
+        with TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+            listing = Listing.objects.create(
+                seller=self.user,
+                title="2020 Nissan Leaf Plus",
+                year=2020,
+                make="Nissan",
+                model="Leaf",
+                price=28000,
+                province=Province.QC,
+                city="Montreal",
+            )
+            photos = []
+            for index in range(4):
+                buffer = BytesIO()
+                Image.new("RGB", (800, 600), color="white").save(buffer, format="JPEG")
+                photos.append(
+                    Photo.objects.create(
+                        listing=listing,
+                        image=SimpleUploadedFile(
+                            f"backfill-{index}.jpg",
+                            buffer.getvalue(),
+                            content_type="image/jpeg",
+                        ),
+                    )
+                )
+            process_listing_photo(photos[0].pk)
+            # Rendered with an older matrix.
+            Photo.objects.filter(pk=photos[1].pk).update(
+                processed_at=timezone.now(), derivatives={"spec": "old"}
+            )
+
+            checkpoint = Path(tmpdir) / "reprocess.checkpoint"
+            checkpoint.write_text(str(photos[1].pk))
+            out = StringIO()
+            call_command(
+                "reprocess_photos", workers=1, checkpoint=str(checkpoint), stdout=out
+            )
+            self.assertIn("Resuming after photo", out.getvalue())
+            self.assertIn("Reprocessed 2 photos", out.getvalue())
+            self.assertIn("photos/sec", out.getvalue())
+            self.assertFalse(checkpoint.exists())
+            self.assertEqual(
+                Photo.objects.get(pk=photos[1].pk).derivatives, {"spec": "old"}
+            )
+
+            out = StringIO()
+            call_command("reprocess_photos", workers=1, stdout=out)
+            self.assertIn("Reprocessed 1 photos", out.getvalue())
+            specs = {
+                photo.derivatives.get("spec")
+                for photo in Photo.objects.filter(listing=listing)
+            }
+            self.assertEqual(len(specs), 1)
+            self.assertNotIn("old", specs)
+
+            out = StringIO()
+            call_command("reprocess_photos", workers=1, stdout=out)
+            self.assertIn("Reprocessed 0 photos", out.getvalue())
+
     def test_model_spec_slug_unique(self) -> None:
         spec = ModelSpec.objects.create(
             make="Ford",
@@ -185,7 +559,9 @@ class ListingModelTests(TestCase):
 
             photo = Photo.objects.create(
                 listing=listing,
-                image=SimpleUploadedFile("test.jpg", buffer.getvalue(), content_type="image/jpeg"),
+                image=SimpleUploadedFile(
+                    "test.jpg", buffer.getvalue(), content_type="image/jpeg"
+                ),
             )
 
             process_listing_photo(photo.pk)
@@ -195,7 +571,7 @@ class ListingModelTests(TestCase):
             self.assertEqual(photo.original_width, 1600)
             self.assertEqual(photo.original_height, 900)
             self.assertTrue(photo.derivatives)
-            self.assertTrue(photo.image_url.endswith('test.jpg'))
+            self.assertTrue(photo.image_url.endswith("test.jpg"))
             thumbnail = photo.derivatives.get("thumbnail")
             display = photo.derivatives.get("display")
             self.assertIsNotNone(thumbnail)
@@ -212,12 +588,877 @@ class ListingModelTests(TestCase):
             photo.derivatives = {}
             photo.save(update_fields=["derivatives"])
             photo.refresh_from_db()
-            self.assertTrue(photo.thumbnail_url.endswith('test.jpg'))
-            self.assertTrue(photo.display_url.endswith('test.jpg'))
+            self.assertEqual(photo.srcset, "")
+            self.assertEqual(photo.picture_sources, [])
+            self.assertTrue(photo.thumbnail_url.endswith("test.jpg"))
+            self.assertTrue(photo.display_url.endswith("test.jpg"))
+
+    @override_settings(
+        LISTING_PHOTO_WIDTHS=[320, 640],
+        LISTING_PHOTO_FORMATS=["jpeg"],
+        PHOTO_DUPLICATE_DISTANCE=6,
+    )
+    def test_identical_photos_share_derivatives_and_near_duplicates_are_reported(
+        self,
+    ) -> None:
+        other = get_user_model().objects.create_user(
+            email="copycat@example.com", password="password123"
+        )
+        picture = Image.radial_gradient("L").convert("RGB").resize((1600, 900))
+        original, smaller, unrelated = BytesIO(), BytesIO(), BytesIO()
+        picture.save(original, format="JPEG")
+        # The same picture re-encoded at another size and quality.
+        picture.resize((800, 450)).save(smaller, format="JPEG", quality=60)
+        Image.linear_gradient("L").convert("RGB").resize((1600, 900)).save(
+            unrelated, format="JPEG"
+        )
+
+        with TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+            photos = []
+            for seller, name, content in (
+                (self.user, "original.jpg", original),
+                (other, "copy.jpg", original),
+                (other, "smaller.jpg", smaller),
+                (other, "unrelated.jpg", unrelated),
+            ):
+                listing = Listing.objects.create(
+                    seller=seller,
+                    title=f"2022 Kia EV6 {name}",
+                    year=2022,
+                    make="Kia",
+                    model="EV6",
+                    price=45000,
+                    province=Province.ON,
+                    city="Toronto",
+                )
+                image = SimpleUploadedFile(
+                    name, content.getvalue(), content_type="image/jpeg"
+                )
+                photos.append(Photo.objects.create(listing=listing, image=image))
+
+            process_listing_photo(photos[0].pk)
+            files = {path for path in Path(tmpdir).rglob("*") if path.is_file()}
+            result = process_listing_photo(photos[1].pk)
+            self.assertEqual(result["shared_with"], photos[0].pk)
+            # Nothing was encoded for the copy.
+            self.assertEqual(
+                {path for path in Path(tmpdir).rglob("*") if path.is_file()}, files
+            )
+            for photo in photos[2:]:
+                process_listing_photo(photo.pk)
+            first, copy, resized, different = (
+                Photo.objects.get(pk=photo.pk) for photo in photos
+            )
+            self.assertEqual(copy.derivatives, first.derivatives)
+            self.assertEqual(
+                (copy.sha256, copy.perceptual_hash),
+                (first.sha256, first.perceptual_hash),
+            )
+            self.assertEqual(len(first.sha256), 64)
+            self.assertEqual(len(first.perceptual_hash), 16)
+            self.assertNotEqual(resized.sha256, first.sha256)
+            self.assertNotEqual(different.sha256, first.sha256)
+            self.assertLessEqual(
+                hamming(
+                    int(resized.perceptual_hash, 16), int(first.perceptual_hash, 16)
+                ),
+                6,
+            )
+
+            # Deleting a stale derivative must not pull it from under the photo sharing it.
+            Photo.objects.filter(pk=first.pk).update(
+                derivatives={
+                    "spec": "old",
+                    "jpeg-999": {"name": first.derivatives["display"]["name"]},
+                }
+            )
+            process_listing_photo(first.pk)
+            self.assertTrue(
+                (Path(tmpdir) / copy.derivatives["display"]["name"]).exists()
+            )
+
+            groups = find_duplicate_groups()
+            self.assertEqual(len(groups), 1)
+            self.assertEqual(
+                {photo.pk for photo in groups[0].photos},
+                {first.pk, copy.pk, resized.pk},
+            )
+            self.assertEqual(groups[0].seller_ids, {self.user.pk, other.pk})
+            self.assertFalse(groups[0].exact)
+            self.assertTrue(DuplicateGroup(photos=[first, copy]).exact)
+
+            admin_user = get_user_model().objects.create_superuser(
+                email="admin@example.com", password="adminpass"
+            )
+            self.client.force_login(admin_user)
+            response = self.client.get(reverse("admin:listings_photo_duplicates"))
+            self.assertContains(response, "2 sellers, 3 photos")
+            self.assertContains(response, "copycat@example.com")
+            self.assertNotContains(response, "unrelated.jpg")
+            self.assertContains(
+                self.client.get(reverse("admin:listings_photo_changelist")),
+                "Near-duplicates",
+            )
+            # Wide distances would turn the band lookup into an all-pairs scan.
+            response = self.client.get(
+                reverse("admin:listings_photo_duplicates"), {"distance": 63}
+            )
+            self.assertEqual(response.context["distance"], 16)
+
+
+@override_settings(
+    AWS_ACCESS_KEY_ID="key-1",
+    AWS_SECRET_ACCESS_KEY="secret",
+    AWS_SESSION_TOKEN="",
+    AWS_DEFAULT_REGION="ca-central-1",
+)
+class AWSClientRegistryTests(TestCase):
+    def setUp(self) -> None:
+        aws.reset_clients()
+        self.addCleanup(aws.reset_clients)
+
+    def test_clients_are_shared_until_credentials_change(self) -> None:
+        client = aws.get_client("ses")
+        self.assertIs(aws.get_client("ses"), client)
+        self.assertEqual(client.meta.region_name, "ca-central-1")
+        self.assertIsNot(aws.get_client("s3"), client)
+        with override_settings(AWS_ACCESS_KEY_ID="key-2"):
+            rotated = aws.get_client("ses")
+        self.assertIsNot(rotated, client)
+        self.assertEqual(rotated._request_signer._credentials.access_key, "key-2")
+
+    def test_clients_are_rebuilt_in_a_forked_child(self) -> None:
+        client = aws.get_client("ses")
+        with mock.patch.object(aws, "_pid", -1):
+            self.assertIsNot(aws.get_client("ses"), client)
+
+    @override_settings(SES_ENABLED=True)
+    def test_ses_delivery_uses_the_shared_client(self) -> None:
+        user = get_user_model().objects.create_user(
+            email="ses-seller@example.com", password="pass12345"
+        )
+        listing = Listing.objects.create(
+            seller=user,
+            title="SES Listing",
+            year=2022,
+            make="Kia",
+            model="EV6",
+            price=Decimal("1000"),
+            province=Province.ON,
+        )
+        inquiry = Inquiry.objects.create(
+            listing=listing, name="Buyer", email="buyer@example.com", message="Hi"
+        )
+        with mock.patch("listings.emails.get_client") as get_client:
+            get_client.return_value.send_email.return_value = {"MessageId": "abc"}
+            self.assertEqual(
+                send_inquiry_notification(inquiry),
+                (True, {"service": "ses", "message_id": "abc"}),
+            )
+            send_inquiry_notification(inquiry)
+        get_client.assert_called_with("ses", region_name="ca-central-1")
+        self.assertEqual(get_client.return_value.send_email.call_count, 2)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self) -> None:
+        self.backend = ratelimit.LocMemRateLimitBackend()
+
+    def test_parse_rate(self) -> None:
+        self.assertEqual(ratelimit.parse_rate("5/m"), (5, 60))
+        self.assertEqual(ratelimit.parse_rate("20/1h"), (20, 3600))
+        self.assertEqual(ratelimit.parse_rate("100/10s"), (100, 10))
+        with self.assertRaises(ImproperlyConfigured):
+            ratelimit.parse_rate("lots")
+
+    def test_concurrent_hits_never_exceed_the_limit(self) -> None:
+        for algorithm in ratelimit.ALGORITHMS:
+            with self.subTest(algorithm=algorithm), ThreadPoolExecutor(
+                max_workers=16
+            ) as pool:
+                results = list(
+                    pool.map(
+                        lambda _, algorithm=algorithm: self.backend.hit(
+                            f"hammer-{algorithm}", 50, 3600, algorithm
+                        ),
+                        range(320),
+                    )
+                )
+                self.assertEqual(sum(result.allowed for result in results), 50)
+                self.assertTrue(
+                    all(
+                        result.retry_after >= 1
+                        for result in results
+                        if not result.allowed
+                    )
+                )
+
+    def test_sliding_window_admits_hits_as_old_ones_expire(self) -> None:
+        with mock.patch("config.ratelimit.time.monotonic", return_value=1000.0):
+            self.assertTrue(self.backend.hit("k", 2, 60, "sliding").allowed)
+        with mock.patch("config.ratelimit.time.monotonic", return_value=1030.0):
+            self.assertTrue(self.backend.hit("k", 2, 60, "sliding").allowed)
+            denied = self.backend.hit("k", 2, 60, "sliding")
+        self.assertFalse(denied.allowed)
+        self.assertEqual(denied.retry_after, 31)
+        with mock.patch("config.ratelimit.time.monotonic", return_value=1061.0):
+            self.assertTrue(self.backend.hit("k", 2, 60, "sliding").allowed)
+            self.assertFalse(self.backend.hit("k", 2, 60, "sliding").allowed)
+
+    @override_settings(FEATURE_SAVED_SEARCHES=True, SAVED_SEARCH_RATE_LIMIT="1/h")
+    def test_saved_search_creation_is_rate_limited(self) -> None:
+        ratelimit.get_backend().reset()
+        self.addCleanup(ratelimit.get_backend().reset)
+        user = get_user_model().objects.create_user(
+            email="saver@example.com", password="pass1234"
+        )
+        self.client.force_login(user)
+        for name in ("First", "Second"):
+            self.client.post(
+                reverse("listings:save_search"),
+                {
+                    "name": name,
+                    "querystring": f"make={name}",
+                    "next": reverse("listings:list"),
+                },
+            )
+        self.assertEqual(
+            list(SavedSearch.objects.filter(user=user).values_list("name", flat=True)),
+            ["First"],
+        )
+
+
+class SavedSearchPercolatorTests(TestCase):
+    def test_percolator_matches_discrete_range_and_keyword_constraints(self) -> None:
+        searches = [
+            index_search(1, 10, {"make": "Tesla"}),
+            index_search(
+                2, 10, {"make": ["Tesla", "Kia"], "province": "BC", "year_min": "2023"}
+            ),
+            index_search(3, 11, {"province": "ON"}),
+            index_search(4, 11, {"price_max": "50000"}),
+            index_search(5, 12, {"q": "long rang"}),
+            index_search(6, 12, {"make": "Tesla", "drivetrain": "AWD"}),
+            index_search(7, 99, {"make": "Tesla"}),
+        ]
+        # Noise the lookup must not have to scan.
+        searches += [
+            index_search(100 + i, 13, {"make": f"Make{i}", "province": "BC"})
+            for i in range(5000)
+        ]
+        percolator = Percolator(searches)
+        values = {
+            "dealer_slug": "",
+            "make": "Tesla",
+            "province": "BC",
+            "dc_fast_charge_type": "NACS",
+            "drivetrain": "RWD",
+            "year": 2024,
+            "price": Decimal("48990"),
+            "seller_id": 99,
+        }
+        matched = {
+            search.id
+            for search in percolator.match(values, "2024 Tesla Model 3 Long Range")
+        }
+        self.assertEqual(matched, {1, 2, 4, 5})
+        self.assertEqual(percolator.size, 5007)
+
+    @override_settings(FEATURE_SAVED_SEARCHES=True)
+    def test_approval_queues_matches_for_saved_searches(self) -> None:
+        user_model = get_user_model()
+        seller = user_model.objects.create_user(
+            email="perc-seller@example.com", password="pass1234"
+        )
+        buyer = user_model.objects.create_user(
+            email="perc-buyer@example.com", password="pass1234"
+        )
+        wanted = SavedSearch.objects.create(
+            user=buyer,
+            querystring="make=Kia&price_max=60000",
+            query_params={"make": "Kia", "price_max": "60000"},
+        )
+        SavedSearch.objects.create(
+            user=buyer, querystring="make=Tesla", query_params={"make": "Tesla"}
+        )
+        listing = Listing.objects.create(
+            seller=seller,
+            title="2023 Kia EV6 Wind",
+            year=2023,
+            make="Kia",
+            model="EV6",
+            price=Decimal("52000"),
+            province=Province.ON,
+            status=ListingStatus.PENDING_REVIEW,
+        )
+        self.assertFalse(SavedSearchMatch.objects.exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.transition(ListingStatus.APPROVED)
+        self.assertEqual(
+            list(SavedSearchMatch.objects.values_list("saved_search", "listing")),
+            [(wanted.pk, listing.pk)],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.transition(ListingStatus.ARCHIVED)
+            listing.transition(ListingStatus.APPROVED)
+        self.assertEqual(SavedSearchMatch.objects.count(), 1)
+
+
+class SavedSearchDigestTests(TestCase):
+    def setUp(self) -> None:
+        user_model = get_user_model()
+        self.seller = user_model.objects.create_user(
+            email="digest-seller@example.com", password="pass1234"
+        )
+        self.buyer = user_model.objects.create_user(
+            email="digest-buyer@example.com", password="pass1234"
+        )
+        self.other = user_model.objects.create_user(
+            email="digest-other@example.com", password="pass1234"
+        )
+        self.kia = SavedSearch.objects.create(
+            user=self.buyer,
+            name="Kias",
+            querystring="make=Kia",
+            query_params={"make": "Kia"},
+        )
+        self.bc = SavedSearch.objects.create(
+            user=self.buyer, querystring="province=BC", query_params={"province": "BC"}
+        )
+        self.cheap = SavedSearch.objects.create(
+            user=self.other,
+            querystring="price_max=60000",
+            query_params={"price_max": "60000"},
+        )
+
+    def _listing(self, title: str, **extra) -> Listing:
+        fields = {
+            "year": 2023,
+            "make": "Kia",
+            "model": "EV6",
+            "price": Decimal("52000"),
+            "province": Province.BC,
+        }
+        fields.update(extra)
+        return Listing.objects.create(
+            seller=self.seller, title=title, status=ListingStatus.APPROVED, **fields
+        )
+
+    def test_one_digest_per_user_and_watermark_advances(self) -> None:
+        first = self._listing("2023 Kia EV6 Wind")
+        second = self._listing("2022 Kia Niro EV", model="Niro")
+        expired = self._listing(
+            "2021 Kia Soul EV", expires_at=timezone.now() - timedelta(days=1)
+        )
+        archive_expired_listings()
+        for search, listing in (
+            (self.kia, first),
+            (self.kia, second),
+            (self.bc, first),
+            (self.kia, expired),
+            (self.cheap, second),
+        ):
+            SavedSearchMatch.objects.create(saved_search=search, listing=listing)
+
+        result = send_saved_search_digests(batch_size=1)
+
+        self.assertEqual(result, {"sent": 2, "failed": 0, "listings": 4})
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["digest-buyer@example.com", "digest-other@example.com"],
+        )
+        buyer_email = next(
+            message
+            for message in mail.outbox
+            if message.to == ["digest-buyer@example.com"]
+        )
+        self.assertEqual(
+            buyer_email.subject, "3 new listings match your saved searches"
+        )
+        self.assertIn("Kias:", buyer_email.body)
+        self.assertIn(reverse("listings:detail", args=[second.slug]), buyer_email.body)
+        self.assertNotIn("Soul", buyer_email.body)
+        self.assertFalse(
+            SavedSearch.objects.filter(last_notified_at__isnull=True).exists()
+        )
+
+        # Nothing new since the watermark: nothing is sent.
+        self.assertEqual(send_saved_search_digests()["sent"], 0)
+        third = self._listing("2024 Kia EV9", model="EV9")
+        SavedSearchMatch.objects.create(saved_search=self.kia, listing=third)
+        self.assertEqual(
+            send_saved_search_digests()["sent"], 0
+        )  # still inside the window
+        with override_settings(SAVED_SEARCH_DIGEST_WINDOW=0):
+            self.assertEqual(
+                send_saved_search_digests(), {"sent": 1, "failed": 0, "listings": 1}
+            )
+        self.assertIn("EV9", mail.outbox[-1].body)
+        self.assertNotIn("Niro", mail.outbox[-1].body)
+
+    @mock.patch(
+        "listings.tasks.send_bulk_notifications",
+        return_value=[(False, {"error": "SMTP down"})],
+    )
+    def test_failed_digest_keeps_the_watermark(self, mock_send) -> None:
+        SavedSearchMatch.objects.create(
+            saved_search=self.kia, listing=self._listing("2023 Kia EV6")
+        )
+        self.assertEqual(send_saved_search_digests()["failed"], 1)
+        self.kia.refresh_from_db()
+        self.assertIsNone(self.kia.last_notified_at)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+class DealerFeedImportTests(TestCase):
+    CSV = (
+        "vin,stock,title,year,make,model,trim,price,mileage,drivetrain,charge_type\n"
+        "KNDC3DLC5P5000001,K-1,2023 Kia EV6 Wind,2023,Kia,EV6,Wind,52000,12000,AWD,CCS\n"
+        'KNDC3DLC5P5000002,K-2,,2023,Kia,EV6,Wind,"51,500",9000,awd,ccs\n'
+        ",T-9,,2024,Tesla,Model 3,,49990,0,RWD,NACS\n"
+        ",,No keys,2022,Kia,Niro,,30000,0,,\n"
+        "KNDC3DLC5P5000003,K-3,Bad price,2023,Kia,EV6,,cheap,0,,\n"
+    )
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            email="feed-dealer@example.com", password="pass1234"
+        )
+        self.dealer = DealerProfile.objects.create(
+            user=user, name="Feed Motors", city="Toronto", province=Province.ON
+        )
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, name: str, content: str) -> str:
+        path = Path(self.tmp.name) / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def test_csv_import_creates_updates_and_archives_in_bulk(self) -> None:
+        out = StringIO()
+        call_command(
+            "import_dealer_feed",
+            self.dealer.slug,
+            self._write("feed.csv", self.CSV),
+            "--approve",
+            stdout=out,
+        )
+        self.assertIn("5 rows", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertIn(
+            "3 created, 0 updated, 0 unchanged, 0 archived, 2 skipped", out.getvalue()
+        )
+        self.assertIn("row 4: row has neither a VIN nor a stock number", out.getvalue())
+
+        listings = {
+            listing.stock_number: listing
+            for listing in Listing.objects.filter(dealer=self.dealer)
+        }
+        self.assertEqual(set(listings), {"K-1", "K-2", "T-9"})
+        self.assertEqual(listings["K-1"].slug, "2023-kia-ev6-wind")
+        self.assertEqual(listings["K-2"].slug, "2023-kia-ev6-wind-2")
+        self.assertEqual(listings["K-2"].price, Decimal("51500.00"))
+        self.assertEqual(listings["K-2"].drivetrain, Drivetrain.AWD)
+        self.assertEqual(listings["T-9"].title, "2024 Tesla Model 3")
+        self.assertTrue(
+            all(
+                listing.is_active and listing.published_at
+                for listing in listings.values()
+            )
+        )
+        self.assertEqual(listings["T-9"].seller, self.dealer.user)
+        self.assertEqual(get_facets({})["makes"], {"Kia": 2, "Tesla": 1})
+        response = self.client.get(reverse("listings:list"), {"q": "tesla"})
+        self.assertEqual(list(response.context["listings"]), [listings["T-9"]])
+
+        # Re-import as JSON lines: K-1 is matched by VIN and repriced, T-9 by stock number, K-2 left the lot.
+        feed = "\n".join(
+            json.dumps(row)
+            for row in (
+                {
+                    "vin": "kndc3dlc5p5000001",
+                    "stock_number": "K-1",
+                    "year": 2023,
+                    "make": "Kia",
+                    "model": "EV6",
+                    "trim": "Wind",
+                    "price": "50000",
+                },
+                {
+                    "stock_number": "T-9",
+                    "year": 2024,
+                    "make": "Tesla",
+                    "model": "Model 3",
+                    "price": 48990,
+                },
+            )
+        )
+        result = import_feed(
+            self.dealer, self._write("feed.jsonl", feed), status=ListingStatus.APPROVED
+        )
+        self.assertEqual(
+            (result.rows, result.created, result.updated, result.archived), (2, 0, 2, 1)
+        )
+        self.assertEqual(
+            Listing.objects.get(pk=listings["K-1"].pk).price, Decimal("50000.00")
+        )
+        self.assertEqual(
+            Listing.objects.get(pk=listings["K-2"].pk).status, ListingStatus.ARCHIVED
+        )
+        self.assertEqual(get_facets({})["makes"], {"Kia": 1, "Tesla": 1})
+
+    def test_rows_match_hand_entered_vins_and_repeated_units_are_skipped(self) -> None:
+        by_hand = Listing.objects.create(
+            seller=self.dealer.user,
+            dealer=self.dealer,
+            title="2023 Kia EV6",
+            year=2023,
+            make="Kia",
+            model="EV6",
+            price=Decimal("49000"),
+            province=Province.ON,
+            city="Toronto",
+            vin="kndc3dlc5p5000009",
+            status=ListingStatus.APPROVED,
+        )
+        unit = {"year": 2023, "make": "Kia", "model": "EV6", "price": 48000}
+        feed = "\n".join(
+            json.dumps(row)
+            for row in (
+                {**unit, "vin": "KNDC3DLC5P5000009", "stock": "H-1"},
+                # The same unit again under another stock number, then a new unit twice.
+                {**unit, "vin": "KNDC3DLC5P5000009", "stock": "H-2"},
+                {**unit, "vin": "KNDC3DLC5P5000010", "stock": "N-1"},
+                {**unit, "stock": "N-1", "price": 47000},
+            )
+        )
+        result = import_feed(
+            self.dealer, self._write("feed.jsonl", feed), status=ListingStatus.APPROVED
+        )
+        self.assertEqual((result.created, result.updated, result.skipped), (1, 1, 2))
+        self.assertEqual(
+            result.errors,
+            [
+                "row 2: duplicate of an earlier row",
+                "row 4: duplicate of an earlier row",
+            ],
+        )
+        self.assertEqual(Listing.objects.filter(dealer=self.dealer).count(), 2)
+        by_hand.refresh_from_db()
+        self.assertEqual(
+            (by_hand.vin, by_hand.stock_number, by_hand.price),
+            ("KNDC3DLC5P5000009", "H-1", Decimal("48000.00")),
+        )
+        self.assertEqual(
+            Listing.objects.get(dealer=self.dealer, stock_number="N-1").price,
+            Decimal("48000.00"),
+        )
+
+    def test_unchanged_rows_are_skipped_without_writes_or_hooks(self) -> None:
+        path = self._write("feed.csv", self.CSV)
+        import_feed(self.dealer, path, status=ListingStatus.APPROVED)
+        before = dict(
+            Listing.objects.filter(dealer=self.dealer).values_list(
+                "stock_number", "updated_at"
+            )
+        )
+
+        with mock.patch(
+            "listings.feeds.notify_catalogue_changed"
+        ) as notify, mock.patch(
+            "listings.feeds.invalidate_listings"
+        ) as invalidate, CaptureQueriesContext(
+            connection
+        ) as queries:
+            result = import_feed(self.dealer, path, status=ListingStatus.APPROVED)
+        self.assertEqual(
+            (result.created, result.updated, result.unchanged, result.archived),
+            (0, 0, 3, 0),
+        )
+        notify.assert_not_called()
+        invalidate.assert_not_called()
+        self.assertFalse(
+            [
+                query
+                for query in queries.captured_queries
+                if query["sql"].startswith("UPDATE")
+            ]
+        )
+        self.assertEqual(
+            dict(
+                Listing.objects.filter(dealer=self.dealer).values_list(
+                    "stock_number", "updated_at"
+                )
+            ),
+            before,
+        )
+
+        # One repriced unit is the only row written.
+        result = import_feed(
+            self.dealer,
+            self._write("repriced.csv", self.CSV.replace("52000", "50500")),
+            status=ListingStatus.APPROVED,
+        )
+        self.assertEqual((result.updated, result.unchanged), (1, 2))
+        listing = Listing.objects.get(dealer=self.dealer, stock_number="K-1")
+        self.assertEqual(listing.price, Decimal("50500.00"))
+        self.assertGreater(listing.updated_at, before["K-1"])
+        self.assertEqual(
+            Listing.objects.get(dealer=self.dealer, stock_number="K-2").updated_at,
+            before["K-2"],
+        )
+
+    def test_feed_photos_are_fetched_deduplicated_and_bulk_inserted(self) -> None:
+        images = Path(self.tmp.name) / "images"
+        images.mkdir()
+        for name, color in (
+            ("front.jpg", "red"),
+            ("side.png", "blue"),
+            ("rear.jpg", "green"),
+        ):
+            image = Image.new("RGB", (40, 30), color=color)
+            image.save(images / name, format="PNG" if name.endswith(".png") else "JPEG")
+        # The same bytes under a second name, and something that is not an image.
+        (images / "front-copy.jpg").write_bytes((images / "front.jpg").read_bytes())
+        (images / "broken.jpg").write_text("<html>not found</html>")
+        feed = "\n".join(
+            json.dumps(row)
+            for row in (
+                {
+                    "stock": "P-1",
+                    "year": 2024,
+                    "make": "Kia",
+                    "model": "EV9",
+                    "price": 70000,
+                    "photos": [
+                        "images/front.jpg",
+                        "images/side.png",
+                        "images/front-copy.jpg",
+                        "images/broken.jpg",
+                    ],
+                },
+                {
+                    "stock": "P-2",
+                    "year": 2024,
+                    "make": "Kia",
+                    "model": "EV9",
+                    "price": 71000,
+                    "photos": "images/front.jpg",
+                },
+            )
+        )
+
+        handler = partial(QuietHandler, directory=self.tmp.name)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media
+        ), mock.patch("listings.photos.group") as group:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = import_feed(
+                    self.dealer,
+                    self._write("feed.jsonl", feed),
+                    status=ListingStatus.APPROVED,
+                )
+            self.assertEqual((result.created, result.photos), (2, 3))
+            self.assertEqual(len(result.errors), 1)
+            self.assertIn("broken.jpg", result.errors[0])
+            first = Listing.objects.get(dealer=self.dealer, stock_number="P-1")
+            second = Listing.objects.get(dealer=self.dealer, stock_number="P-2")
+            photos = list(first.photos.order_by("sort_order"))
+            self.assertEqual(
+                [photo.source_url for photo in photos],
+                ["images/front.jpg", "images/side.png"],
+            )
+            self.assertEqual(
+                [(photo.sort_order, photo.is_primary) for photo in photos],
+                [(0, True), (1, False)],
+            )
+            # One stored original for both units.
+            self.assertEqual(second.photos.get().image.name, photos[0].image.name)
+            self.assertEqual(
+                len(list((Path(media) / "listings/photos/feeds").rglob("*.*"))), 2
+            )
+            self.assertEqual(group.call_count, 1)
+            self.assertEqual(len(list(group.call_args.args[0])), 3)
+            group.return_value.apply_async.assert_called_once_with(retry=False)
+            # A failed photo keeps the row out of the fingerprint skip so it is retried next time.
+            self.assertEqual(first.feed_fingerprint, "")
+
+            # The same feed over HTTP: relative photo paths resolve against the feed URL.
+            (images / "broken.jpg").write_bytes((images / "rear.jpg").read_bytes())
+            self._write("feed.jsonl", feed)
+            url = f"http://127.0.0.1:{server.server_address[1]}/feed.jsonl"
+            result = import_feed(self.dealer, url, status=ListingStatus.APPROVED)
+            self.assertEqual(
+                (result.updated, result.unchanged, result.photos, result.errors),
+                (0, 2, 1, []),
+            )
+            self.assertEqual(
+                list(
+                    first.photos.order_by("sort_order").values_list(
+                        "sort_order", "is_primary"
+                    )
+                ),
+                [(0, True), (1, False), (2, False)],
+            )
+
+    def test_photo_processing_enqueue_failure_is_logged(self) -> None:
+        # The photos are committed before the enqueue, so a broker outage must not fail the import.
+        with mock.patch("listings.photos.group") as group, self.assertLogs(
+            "listings.photos", "WARNING"
+        ):
+            group.return_value.apply_async.side_effect = OSError("broker down")
+            enqueue_processing([1, 2])
+
+    def test_only_units_the_feed_archived_are_relisted(self) -> None:
+        path = self._write("feed.csv", self.CSV)
+        import_feed(self.dealer, path, status=ListingStatus.APPROVED)
+        listings = {
+            listing.stock_number: listing
+            for listing in Listing.objects.filter(dealer=self.dealer)
+        }
+        # The seller archives K-1 from the dashboard; T-9 runs past its expiry date.
+        seller_archived = listings["K-1"]
+        seller_archived.status = ListingStatus.ARCHIVED
+        seller_archived.expires_at = timezone.now()
+        seller_archived.save(update_fields=["status", "expires_at", "updated_at"])
+        Listing.objects.filter(pk=listings["T-9"].pk).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        archive_expired_listings()
+        # K-2 drops out of the feed.
+        lines = self.CSV.splitlines()
+        import_feed(
+            self.dealer,
+            self._write("short.csv", "\n".join(lines[:2] + lines[3:])),
+            status=ListingStatus.APPROVED,
+        )
+        feed_archived = Listing.objects.get(pk=listings["K-2"].pk)
+        self.assertEqual(feed_archived.status, ListingStatus.ARCHIVED)
+        self.assertIsNotNone(feed_archived.feed_archived_at)
+        # The seller edits the archived unit without touching its status: the feed may still relist it.
+        feed_archived.description = "New tyres fitted."
+        feed_archived.save()
+        feed_archived.refresh_from_db()
+        self.assertIsNotNone(feed_archived.feed_archived_at)
+        Listing.objects.filter(pk=feed_archived.pk).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+
+        with mock.patch("listings.feeds.notify_catalogue_changed") as notify:
+            result = import_feed(self.dealer, path, status=ListingStatus.APPROVED)
+        self.assertEqual(result.updated, 1)
+        notify.assert_called_once_with([feed_archived.pk], activated=[feed_archived.pk])
+        relisted = Listing.objects.get(pk=feed_archived.pk)
+        self.assertEqual(
+            (relisted.status, relisted.feed_archived_at, relisted.expires_at),
+            (ListingStatus.APPROVED, None, None),
+        )
+        self.assertEqual(archive_expired_listings(), 0)
+        for stock_number in ("K-1", "T-9"):
+            self.assertEqual(
+                Listing.objects.get(pk=listings[stock_number].pk).status,
+                ListingStatus.ARCHIVED,
+            )
+
+    def test_bad_feed_photos_are_reported_per_photo(self) -> None:
+        images = Path(self.tmp.name) / "images"
+        images.mkdir()
+        Image.new("RGB", (40, 30), color="red").save(images / "huge.png", format="PNG")
+        gone = json.dumps(
+            {
+                "stock": "GONE",
+                "year": 2021,
+                "make": "Kia",
+                "model": "Niro",
+                "price": 30000,
+            }
+        )
+        import_feed(
+            self.dealer,
+            self._write("old.jsonl", gone),
+            status=ListingStatus.APPROVED,
+            photos=False,
+        )
+        feed = json.dumps(
+            {
+                "stock": "B-1",
+                "year": 2024,
+                "make": "Kia",
+                "model": "EV9",
+                "price": 70000,
+                "photos": "images/huge.png",
+            }
+        )
+
+        # Over Pillow's pixel limit: a decompression bomb is a photo error, not a failed import.
+        with TemporaryDirectory() as media, override_settings(
+            MEDIA_ROOT=media
+        ), mock.patch.object(Image, "MAX_IMAGE_PIXELS", 100), mock.patch(
+            "listings.photos.group"
+        ):
+            result = import_feed(
+                self.dealer,
+                self._write("feed.jsonl", feed),
+                status=ListingStatus.APPROVED,
+            )
+        self.assertEqual((result.created, result.archived, result.photos), (1, 1, 0))
+        self.assertIn("images/huge.png", result.errors[0])
+        self.assertFalse(Photo.objects.filter(listing__dealer=self.dealer).exists())
+
+        # A remote feed cannot read the worker's disk.
+        base = "https://dealer.example.com/feeds/inventory.jsonl"
+        self.assertEqual(
+            resolve_source("img/1.jpg", base),
+            "https://dealer.example.com/feeds/img/1.jpg",
+        )
+        self.assertEqual(
+            resolve_source("/img/1.jpg", base), "https://dealer.example.com/img/1.jpg"
+        )
+        for source in ("file:///etc/passwd", "ftp://dealer.example.com/1.jpg"):
+            with self.assertRaises(ValueError):
+                resolve_source(source, base)
+        local = str(images / "huge.png")
+        self.assertEqual(
+            resolve_source(f"file://{local}", self.tmp.name), f"file://{local}"
+        )
+        self.assertEqual(resolve_source(local, self.tmp.name), local)
+
+    def test_xml_feed_and_review_queue(self) -> None:
+        feed = (
+            "<?xml version='1.0'?><inventory>"
+            "<vehicle><stock_number>X-1</stock_number><year>2024</year><make>Hyundai</make>"
+            "<model>Ioniq 5</model><price>55000</price><province>British Columbia</province></vehicle>"
+            "</inventory>"
+        )
+        result = import_dealer_feed(self.dealer.pk, self._write("feed.xml", feed))
+        self.assertEqual(result["created"], 1)
+        listing = Listing.objects.get(dealer=self.dealer)
+        self.assertEqual(
+            (listing.status, listing.province, listing.city),
+            (ListingStatus.PENDING_REVIEW, "BC", "Toronto"),
+        )
+        self.assertFalse(Listing.objects.active().exists())
+
+        with self.assertRaises(FeedError):
+            import_feed(self.dealer, self._write("broken.xml", "<inventory><vehicle>"))
+        bomb = "<?xml version='1.0'?><!DOCTYPE inventory [<!ENTITY lol 'lol'>]><inventory>&lol;</inventory>"
+        with self.assertRaises(FeedError):
+            import_feed(self.dealer, self._write("entities.xml", bomb))
 
 
 class PublicListingViewsTests(TestCase):
     def setUp(self) -> None:
+        ratelimit.get_backend().reset()
         self.user = get_user_model().objects.create_user(
             email="seller@example.com",
             password="pass1234",
@@ -291,14 +1532,18 @@ class PublicListingViewsTests(TestCase):
         self.assertNotIn(self.other_listing, listings)
 
     def test_filtering_by_multiple_provinces(self) -> None:
-        response = self.client.get(reverse("listings:list"), {"province": [Province.BC, Province.ON]})
+        response = self.client.get(
+            reverse("listings:list"), {"province": [Province.BC, Province.ON]}
+        )
         self.assertEqual(response.status_code, 200)
         listings = list(response.context["listings"])  # type: ignore[index]
         self.assertIn(self.approved_listing, listings)
         self.assertIn(self.other_listing, listings)
 
     def test_filtering_by_multiple_makes(self) -> None:
-        response = self.client.get(reverse("listings:list"), {"make": ["Tesla", "Hyundai"]})
+        response = self.client.get(
+            reverse("listings:list"), {"make": ["Tesla", "Hyundai"]}
+        )
         self.assertEqual(response.status_code, 200)
         listings = list(response.context["listings"])  # type: ignore[index]
         self.assertIn(self.approved_listing, listings)
@@ -309,7 +1554,9 @@ class PublicListingViewsTests(TestCase):
         self.approved_listing.save(update_fields=["drivetrain"])
         self.other_listing.drivetrain = Drivetrain.AWD
         self.other_listing.save(update_fields=["drivetrain"])
-        response = self.client.get(reverse("listings:list"), {"drivetrain": [Drivetrain.AWD, Drivetrain.RWD]})
+        response = self.client.get(
+            reverse("listings:list"), {"drivetrain": [Drivetrain.AWD, Drivetrain.RWD]}
+        )
         self.assertEqual(response.status_code, 200)
         listings = list(response.context["listings"])  # type: ignore[index]
         self.assertIn(self.approved_listing, listings)
@@ -352,6 +1599,105 @@ class PublicListingViewsTests(TestCase):
         self.assertIn(response.context["page_obj"].paginator.num_pages, numbers)
         self.assertTrue(any(item.get("is_ellipsis") for item in links))
 
+    def _create_extra_listings(self, count: int) -> None:
+        for idx in range(count):
+            Listing.objects.create(
+                seller=self.user,
+                title=f"Extra Listing {idx}",
+                year=2020,
+                make="Brand",
+                model=f"Model {idx}",
+                price=Decimal("39990"),
+                province=Province.BC,
+                city="Calgary",
+                status=ListingStatus.APPROVED,
+            )
+
+    def _catalogue_queries(self) -> tuple[int, int]:
+        for listing in Listing.objects.active().filter(photos__isnull=True):
+            Photo.objects.create(listing=listing, image=f"photos/{listing.pk}-1.jpg")
+            Photo.objects.create(
+                listing=listing, image=f"photos/{listing.pk}-2.jpg", is_primary=True
+            )
+        # Warm the facet and option caches so only the page itself is measured.
+        self.client.get(reverse("listings:list"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("listings:list"))
+        self.assertContains(response, "photos/")
+        return len(response.context["listings"]), len(queries)
+
+    def test_catalogue_card_queries_do_not_grow_with_page_size(self) -> None:
+        small_cards, small_queries = self._catalogue_queries()
+        self._create_extra_listings(12)
+        full_cards, full_queries = self._catalogue_queries()
+        self.assertLess(small_cards, full_cards)
+        self.assertEqual(full_cards, 12)
+        self.assertEqual(full_queries, small_queries)
+
+    @override_settings(LISTING_PAGINATION="cursor", LISTING_CLASSIC_PAGE_LIMIT=2)
+    def test_cursor_pagination_walks_every_listing_once(self) -> None:
+        self._create_extra_listings(30)
+        # Force ties on published_at so the (created_at, id) tie-breakers are exercised.
+        Listing.objects.filter(title__startswith="Extra Listing 1").update(
+            published_at=self.approved_listing.published_at
+        )
+        expected = list(
+            Listing.objects.active().order_by("-published_at", "-created_at", "-id")
+        )
+
+        seen: list[Listing] = []
+        response = self.client.get(reverse("listings:list"))
+        pages = 1
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(response.context["listings"])
+            next_param = response.context["pagination_nav"]["next"]
+            if not next_param:
+                break
+            response = self.client.get(f"{reverse('listings:list')}?{next_param}")
+            pages += 1
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+        self.assertEqual(response.context["page_obj"].number, 3)
+
+        previous_param = response.context["pagination_nav"]["previous"]
+        self.assertTrue(previous_param.startswith("page=2"))
+        response = self.client.get(f"{reverse('listings:list')}?{previous_param}")
+        self.assertEqual(list(response.context["listings"]), expected[12:24])
+        previous_cursor = response.context["page_obj"].previous_cursor
+        response = self.client.get(
+            reverse("listings:list"), {"cursor": previous_cursor}
+        )
+        self.assertEqual(list(response.context["listings"]), expected[:12])
+
+    @override_settings(
+        LISTING_PAGINATION="cursor",
+        LISTING_CLASSIC_PAGE_LIMIT=1,
+        LISTING_APPROXIMATE_COUNT_LIMIT=20,
+    )
+    def test_cursor_pagination_uses_approximate_count_and_limits_classic_pages(
+        self,
+    ) -> None:
+        self._create_extra_listings(30)
+        response = self.client.get(reverse("listings:list"))
+        self.assertTrue(response.context["result_count_is_approximate"])
+        self.assertContains(response, "20+ vehicles found")
+        numbers = [
+            item["number"]
+            for item in response.context["pagination_links"]
+            if "number" in item
+        ]
+        self.assertEqual(numbers, [1, 2])
+        self.assertEqual(
+            self.client.get(reverse("listings:list"), {"page": 2}).status_code, 404
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse("listings:list"), {"cursor": "garbage"}
+            ).status_code,
+            404,
+        )
+
     @override_settings(FEATURE_SAVED_SEARCHES=True)
     def test_save_search_creation(self) -> None:
         self.client.login(email="seller@example.com", password="pass1234")
@@ -363,7 +1709,9 @@ class PublicListingViewsTests(TestCase):
                 "next": reverse("listings:list"),
             },
         )
-        self.assertRedirects(response, reverse("listings:list"), fetch_redirect_response=False)
+        self.assertRedirects(
+            response, reverse("listings:list"), fetch_redirect_response=False
+        )
         saved = SavedSearch.objects.get(user=self.user)
         self.assertEqual(saved.name, "BC Deals")
         self.assertEqual(saved.query_params["province"], "BC")
@@ -385,7 +1733,9 @@ class PublicListingViewsTests(TestCase):
                 "next": reverse("listings:list"),
             },
         )
-        self.assertRedirects(response, reverse("listings:list"), fetch_redirect_response=False)
+        self.assertRedirects(
+            response, reverse("listings:list"), fetch_redirect_response=False
+        )
         saved = SavedSearch.objects.get(user=self.user)
         self.assertEqual(saved.name, "Updated")
 
@@ -402,26 +1752,133 @@ class PublicListingViewsTests(TestCase):
             reverse("listings:delete_saved_search", args=[saved.pk]),
             {"next": reverse("listings:list")},
         )
-        self.assertRedirects(response, reverse("listings:list"), fetch_redirect_response=False)
+        self.assertRedirects(
+            response, reverse("listings:list"), fetch_redirect_response=False
+        )
         self.assertFalse(SavedSearch.objects.filter(pk=saved.pk).exists())
 
     def test_detail_view_renders(self) -> None:
-        response = self.client.get(reverse("listings:detail", args=[self.approved_listing.slug]))
+        response = self.client.get(
+            reverse("listings:detail", args=[self.approved_listing.slug])
+        )
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Tesla Model 3")
         self.assertContains(response, "$48,990")
 
     def test_detail_view_includes_vehicle_schema(self) -> None:
-        response = self.client.get(reverse("listings:detail", args=[self.approved_listing.slug]))
+        response = self.client.get(
+            reverse("listings:detail", args=[self.approved_listing.slug])
+        )
         schema_json = response.context["vehicle_schema_json"]
         data = json.loads(schema_json)
         self.assertEqual(data["@type"], "Vehicle")
         self.assertIn("offers", data)
-        self.assertEqual(data["offers"]["price"], format(self.approved_listing.price, ".2f"))
+        self.assertEqual(
+            data["offers"]["price"], format(self.approved_listing.price, ".2f")
+        )
         self.assertIn("address", data)
-        self.assertEqual(data["address"]["addressRegion"], self.approved_listing.get_province_display())
+        self.assertEqual(
+            data["address"]["addressRegion"],
+            self.approved_listing.get_province_display(),
+        )
         self.assertEqual(data.get("fuelType"), "Electric")
 
+    def test_detail_fragments_are_cached_and_invalidated(self) -> None:
+        with TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+            user_model = get_user_model()
+            dealer = DealerProfile.objects.create(
+                user=user_model.objects.create_user(
+                    email="frag-dealer@example.com", password="pass1234"
+                ),
+                name="Fragment Motors",
+            )
+            self.approved_listing.dealer = dealer
+            self.approved_listing.save()
+            photo = Photo.objects.create(
+                listing=self.approved_listing,
+                image=SimpleUploadedFile(
+                    "car.jpg", b"not-an-image", content_type="image/jpeg"
+                ),
+                alt_text="Front three-quarter view",
+            )
+            url = reverse("listings:detail", args=[self.approved_listing.slug])
+
+            cold = self.client.get(url)
+            self.assertContains(cold, "Front three-quarter view")
+            self.assertContains(cold, "Fragment Motors")
+            with CaptureQueriesContext(connection) as warm_queries:
+                warm = self.client.get(url)
+            self.assertEqual(
+                warm.context["detail_main_html"], cold.context["detail_main_html"]
+            )
+            self.assertFalse(
+                any(
+                    "listings_photo" in query["sql"]
+                    for query in warm_queries.captured_queries
+                )
+            )
+
+            photo.alt_text = "Rear view"
+            photo.save()
+            self.assertContains(self.client.get(url), "Rear view")
+            dealer.name = "Renamed Motors"
+            dealer.save()
+            response = self.client.get(url)
+            self.assertContains(response, "Renamed Motors")
+            self.assertEqual(
+                json.loads(response.context["vehicle_schema_json"])["seller"]["name"],
+                "Renamed Motors",
+            )
+
+            # The inquiry form stays personalised on a warm cache.
+            self.client.login(email="seller@example.com", password="pass1234")
+            self.assertContains(self.client.get(url), 'value="seller@example.com"')
+
+    def test_detail_and_catalogue_answer_conditional_gets(self) -> None:
+        detail_url = reverse("listings:detail", args=[self.approved_listing.slug])
+        first = self.client.get(detail_url)
+        self.assertIn("no-cache", first["Cache-Control"])
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.client.get(detail_url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            self.client.get(
+                detail_url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+            ).status_code,
+            304,
+        )
+
+        with TemporaryDirectory() as tmpdir, override_settings(MEDIA_ROOT=tmpdir):
+            image = SimpleUploadedFile("a.jpg", b"x", content_type="image/jpeg")
+            Photo.objects.create(listing=self.approved_listing, image=image)
+            self.assertEqual(
+                self.client.get(
+                    detail_url, HTTP_IF_NONE_MATCH=first["ETag"]
+                ).status_code,
+                200,
+            )
+
+        list_url = reverse("listings:list") + "?province=BC"
+        catalogue = self.client.get(list_url)
+        self.assertEqual(
+            self.client.get(list_url, HTTP_IF_NONE_MATCH=catalogue["ETag"]).status_code,
+            304,
+        )
+        self.other_listing.transition(ListingStatus.ARCHIVED)
+        self.assertEqual(
+            self.client.get(list_url, HTTP_IF_NONE_MATCH=catalogue["ETag"]).status_code,
+            200,
+        )
+
+        # Signed-in pages are personalised and never answered with 304.
+        self.client.login(email="seller@example.com", password="pass1234")
+        self.assertEqual(
+            self.client.get(detail_url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code,
+            200,
+        )
+
     def test_submit_inquiry_via_htmx(self) -> None:
         response = self.client.post(
             reverse("listings:inquire", args=[self.approved_listing.slug]),
@@ -435,15 +1892,26 @@ class PublicListingViewsTests(TestCase):
             REMOTE_ADDR="203.0.113.5",
         )
         self.assertEqual(response.status_code, 201)
-        self.assertEqual(Inquiry.objects.filter(listing=self.approved_listing).count(), 1)
+        self.assertEqual(
+            Inquiry.objects.filter(listing=self.approved_listing).count(), 1
+        )
         inquiry = Inquiry.objects.get(listing=self.approved_listing)
         event = inquiry.events.filter(event_type=InquiryEvent.EventType.CREATED).first()
         self.assertIsNotNone(event)
         if event:
             self.assertEqual(event.metadata.get("remote_addr"), "203.0.113.5")
+        # The request only writes the outbox row; the worker sends the email.
+        self.assertEqual(inquiry.delivery_status, InquiryDeliveryStatus.PENDING)
+        self.assertEqual(inquiry.delivery.status, InquiryDeliveryStatus.PENDING)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(drain_inquiry_outbox(), 1)
+        inquiry.refresh_from_db()
         self.assertEqual(inquiry.delivery_status, InquiryDeliveryStatus.SENT)
         self.assertIsNotNone(inquiry.delivered_at)
-        self.assertTrue(inquiry.events.filter(event_type=InquiryEvent.EventType.EMAIL_SENT).exists())
+        self.assertTrue(
+            inquiry.events.filter(event_type=InquiryEvent.EventType.EMAIL_SENT).exists()
+        )
         self.assertEqual(len(mail.outbox), 1)
         self.assertIn("Tesla", mail.outbox[0].subject)
 
@@ -474,7 +1942,9 @@ class PublicListingViewsTests(TestCase):
         listings = list(response.context["listings"])  # type: ignore[index]
         self.assertNotIn(pending, listings)
         self.assertNotIn(draft, listings)
-        detail_response = self.client.get(reverse("listings:detail", args=[pending.slug]))
+        detail_response = self.client.get(
+            reverse("listings:detail", args=[pending.slug])
+        )
         self.assertEqual(detail_response.status_code, 404)
 
     @override_settings(INQUIRY_RATE_LIMIT_PER_MINUTE=1)
@@ -499,12 +1969,15 @@ class PublicListingViewsTests(TestCase):
             REMOTE_ADDR="198.51.100.10",
         )
         self.assertEqual(second.status_code, 429)
-        self.assertEqual(Inquiry.objects.filter(listing=self.approved_listing).count(), 1)
-        inquiry = Inquiry.objects.get(listing=self.approved_listing)
-        self.assertEqual(inquiry.delivery_status, InquiryDeliveryStatus.SENT)
+        self.assertEqual(
+            Inquiry.objects.filter(listing=self.approved_listing).count(), 1
+        )
+        self.assertEqual(InquiryDelivery.objects.count(), 1)
 
     def test_inquiry_captcha_failure_blocks_submission(self) -> None:
-        with mock.patch("listings.views.verify_captcha", return_value=(False, "Captcha failed", {})):
+        with mock.patch(
+            "listings.views.verify_captcha", return_value=(False, "Captcha failed", {})
+        ):
             response = self.client.post(
                 reverse("listings:inquire", args=[self.approved_listing.slug]),
                 {
@@ -517,13 +1990,32 @@ class PublicListingViewsTests(TestCase):
                 REMOTE_ADDR="198.51.100.20",
             )
         self.assertEqual(response.status_code, 422)
-        self.assertEqual(Inquiry.objects.filter(listing=self.approved_listing).count(), 0)
+        self.assertEqual(
+            Inquiry.objects.filter(listing=self.approved_listing).count(), 0
+        )
         self.assertEqual(InquiryEvent.objects.count(), 0)
         self.assertEqual(len(mail.outbox), 0)
         self.assertIn("Captcha failed", response.content.decode())
 
-    @mock.patch("listings.views.send_inquiry_notification", return_value=(False, {"error": "SES failure"}))
-    def test_inquiry_email_failure_updates_status(self, mock_send) -> None:
+    def test_invalid_inquiry_without_htmx_renders_full_detail_page(self) -> None:
+        response = self.client.post(
+            reverse("listings:inquire", args=[self.approved_listing.slug]),
+            {"name": "No Email", "message": "Is it still available?"},
+            REMOTE_ADDR="198.51.100.30",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Inquiry.objects.count(), 0)
+        self.assertIn("Tesla", response.context["detail_main_html"])
+        self.assertContains(response, "application/ld+json", status_code=400)
+        self.assertContains(response, 'value="No Email"', status_code=400)
+        self.assertEqual(response.context["inquiry_form"].errors.keys(), {"email"})
+
+    @override_settings(INQUIRY_DELIVERY_MAX_ATTEMPTS=2, INQUIRY_DELIVERY_RETRY_DELAY=30)
+    @mock.patch(
+        "listings.tasks.send_inquiry_notification",
+        return_value=(False, {"error": "SES failure"}),
+    )
+    def test_inquiry_email_failure_retries_then_fails(self, mock_send) -> None:
         response = self.client.post(
             reverse("listings:inquire", args=[self.approved_listing.slug]),
             {
@@ -536,19 +2028,121 @@ class PublicListingViewsTests(TestCase):
             REMOTE_ADDR="198.51.100.30",
         )
         self.assertEqual(response.status_code, 201)
+        mock_send.assert_not_called()
+
+        self.assertEqual(drain_inquiry_outbox(), 1)
         inquiry = Inquiry.objects.get(listing=self.approved_listing)
-        self.assertEqual(inquiry.delivery_status, InquiryDeliveryStatus.FAILED)
+        delivery = inquiry.delivery
+        self.assertEqual(inquiry.delivery_status, InquiryDeliveryStatus.PENDING)
         self.assertIn("SES failure", inquiry.delivery_error)
-        self.assertTrue(inquiry.events.filter(event_type=InquiryEvent.EventType.EMAIL_FAILED).exists())
+        self.assertEqual(delivery.attempts, 1)
+        self.assertGreater(
+            delivery.available_at, timezone.now() + timedelta(seconds=20)
+        )
+        # Backing off: nothing is due yet.
+        self.assertEqual(drain_inquiry_outbox(), 0)
+
+        InquiryDelivery.objects.filter(pk=delivery.pk).update(
+            available_at=timezone.now()
+        )
+        self.assertEqual(drain_inquiry_outbox(), 1)
+        inquiry.refresh_from_db()
+        delivery.refresh_from_db()
+        self.assertEqual(inquiry.delivery_status, InquiryDeliveryStatus.FAILED)
+        self.assertEqual(delivery.status, InquiryDeliveryStatus.FAILED)
+        self.assertEqual(delivery.attempts, 2)
+        self.assertEqual(
+            inquiry.events.filter(
+                event_type=InquiryEvent.EventType.EMAIL_FAILED
+            ).count(),
+            2,
+        )
+        self.assertEqual(mock_send.call_count, 2)
         self.assertEqual(len(mail.outbox), 0)
 
-    def test_sitemap_includes_active_listings_and_guides(self) -> None:
-        response = self.client.get(reverse("sitemap"))
+    def test_inquiry_delivery_is_enqueued_after_commit(self) -> None:
+        with mock.patch("listings.views.deliver_inquiry.apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    reverse("listings:inquire", args=[self.approved_listing.slug]),
+                    {
+                        "name": "Interested Buyer",
+                        "email": "buyer@example.com",
+                        "message": "Is it still available?",
+                    },
+                    HTTP_HX_REQUEST="true",
+                    REMOTE_ADDR="198.51.100.40",
+                )
+                apply_async.assert_not_called()
+        delivery = InquiryDelivery.objects.get(inquiry__listing=self.approved_listing)
+        apply_async.assert_called_once_with(args=[delivery.pk], retry=False)
+
+        # A delivery that is already leased or sent is not sent twice.
+        self.assertEqual(deliver_inquiry(delivery.pk), "sent")
+        self.assertEqual(deliver_inquiry(delivery.pk), "skipped")
+        self.assertEqual(len(mail.outbox), 1)
+
+    def _sitemap(self, url: str) -> str:
+        response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
-        content = response.content.decode()
+        body = (
+            b"".join(response.streaming_content)
+            if response.streaming
+            else response.content
+        )
+        return body.decode()
+
+    def test_sitemap_includes_active_listings_and_guides(self) -> None:
+        index = self._sitemap(reverse("sitemap"))
+        self.assertIn("<sitemapindex", index)
+        self.assertIn(reverse("sitemap-guides"), index)
+        self.assertIn(reverse("sitemap-listings", args=[0]), index)
+        content = self._sitemap(reverse("sitemap-listings", args=[0]))
         self.assertIn(self.approved_listing.slug, content)
         guide = get_guides()[0]
-        self.assertIn(guide.slug, content)
+        self.assertIn(guide.slug, self._sitemap(reverse("sitemap-guides")))
+
+    @override_settings(SITEMAP_SHARD_SIZE=2)
+    def test_sitemap_shards_stream_narrow_rows_and_follow_activation(self) -> None:
+        for index in range(3):
+            Listing.objects.create(
+                seller=self.user,
+                title=f"Shard {index}",
+                year=2022,
+                make="Kia",
+                model="EV6",
+                price=Decimal("40000"),
+                status=ListingStatus.APPROVED,
+            )
+        index = self._sitemap(reverse("sitemap"))
+        self.assertEqual(
+            index.count("<sitemap>"), 4
+        )  # guides + ceil(5 / 2) listing shards
+        with CaptureQueriesContext(connection) as queries:
+            shards = [
+                self._sitemap(reverse("sitemap-listings", args=[n])) for n in range(3)
+            ]
+        self.assertFalse(
+            any("description" in query["sql"] for query in queries.captured_queries)
+        )
+        slugs = set(Listing.objects.active().values_list("slug", flat=True))
+        self.assertEqual(sum(shard.count("<url>") for shard in shards), len(slugs))
+        self.assertTrue(all(any(slug in shard for shard in shards) for slug in slugs))
+        self.assertEqual(
+            self.client.get(reverse("sitemap-listings", args=[3])).status_code, 404
+        )
+
+        # Served from cache until a listing enters or leaves the catalogue.
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(
+                self._sitemap(reverse("sitemap-listings", args=[0])), shards[0]
+            )
+        self.assertEqual(len(queries), 0)
+        self.other_listing.transition(ListingStatus.ARCHIVED)
+        shards = [
+            self._sitemap(reverse("sitemap-listings", args=[n])) for n in range(2)
+        ]
+        self.assertNotIn(self.other_listing.slug, "".join(shards))
 
     def test_robots_txt_reports_sitemap(self) -> None:
         response = self.client.get(reverse("robots"))
@@ -557,13 +2151,88 @@ class PublicListingViewsTests(TestCase):
         self.assertIn("Sitemap:", body)
         self.assertIn("sitemap.xml", body)
 
+    def test_facets_are_disjunctive_and_follow_the_filter_context(self) -> None:
+        response = self.client.get(reverse("listings:list"), {"make": "Tesla"})
+        facets = response.context["facets"]
+        self.assertEqual(facets["makes"], {"Tesla": 1, "Hyundai": 1})
+        self.assertEqual(facets["provinces"], {Province.BC: 1})
+        price_counts = {bucket["label"]: bucket["count"] for bucket in facets["prices"]}
+        self.assertEqual(price_counts["$45k–$60k"], 1)
+        self.assertContains(
+            response, 'Hyundai <span class="text-muted small">(1)</span>', html=False
+        )
+
+    def test_facets_are_cached_until_the_active_set_changes(self) -> None:
+        filters = parse_listing_filters({"province": Province.ON})
+        self.assertEqual(get_facets(filters)["makes"], {"Hyundai": 1})
+        with self.assertNumQueries(0):
+            get_facets(filters)
+
+        pending = Listing.objects.create(
+            seller=self.user,
+            title="2023 Kia Niro EV",
+            year=2023,
+            make="Kia",
+            model="Niro EV",
+            price=Decimal("41990"),
+            province=Province.ON,
+            city="Ottawa",
+            status=ListingStatus.PENDING_REVIEW,
+        )
+        with self.assertNumQueries(0):
+            get_facets(filters)
+        pending.transition(ListingStatus.APPROVED)
+        self.assertEqual(get_facets(filters)["makes"], {"Hyundai": 1, "Kia": 1})
+        pending.transition(ListingStatus.ARCHIVED)
+        self.assertEqual(get_facets(filters)["makes"], {"Hyundai": 1})
+
     def test_search_query_filters_results(self) -> None:
         response = self.client.get(reverse("listings:list"), {"q": "toronto"})
         listings = list(response.context["listings"])  # type: ignore[index]
         self.assertIn(self.other_listing, listings)
         self.assertNotIn(self.approved_listing, listings)
 
+    def test_search_matches_prefixes_and_ranks_title_hits_first(self) -> None:
+        tagged = Listing.objects.create(
+            seller=self.user,
+            title="2022 Kia EV6 Wind",
+            year=2022,
+            make="Kia",
+            model="EV6",
+            price=Decimal("45990"),
+            province=Province.BC,
+            city="Victoria",
+            tags="tesla-alternative",
+            status=ListingStatus.APPROVED,
+        )
+        response = self.client.get(reverse("listings:list"), {"q": "tes"})
+        listings = list(response.context["listings"])  # type: ignore[index]
+        self.assertEqual(listings, [self.approved_listing, tagged])
 
+    def test_search_respects_filters_and_renders_keyword_chip(self) -> None:
+        response = self.client.get(
+            reverse("listings:list"), {"q": "model", "province": Province.ON}
+        )
+        listings = list(response.context["listings"])  # type: ignore[index]
+        self.assertEqual(listings, [])
+        chips = response.context["filter_chips"]
+        self.assertIn({"key": "q", "value": "model", "label": "Keyword: model"}, chips)
+        self.assertIn(
+            {"key": "province", "value": "ON", "label": "Province: ON"}, chips
+        )
 
+    def test_search_index_follows_listing_edits(self) -> None:
+        self.other_listing.city = "Ottawa"
+        self.other_listing.save(update_fields=["city"])
+        self.other_listing.refresh_from_db()
+        self.assertIn("Ottawa", self.other_listing.search_document)
+        response = self.client.get(reverse("listings:list"), {"q": "ottawa"})
+        self.assertEqual(list(response.context["listings"]), [self.other_listing])  # type: ignore[index]
+        response = self.client.get(reverse("listings:list"), {"q": "toronto"})
+        self.assertEqual(list(response.context["listings"]), [])  # type: ignore[index]
 
-
+        # Deleting a listing drops its index entry.
+        pk = self.other_listing.pk
+        with mock.patch("listings.search.get_search_backend") as backend:
+            self.other_listing.delete()
+        backend.return_value.remove.assert_called_once_with([pk])
@@ -1,36 +1,51 @@
 from __future__ import annotations
 
 import logging
-from decimal import Decimal
+from functools import cached_property, partial
 from http import HTTPStatus
-from functools import cached_property
 from typing import Any
+from urllib.parse import parse_qs
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.cache import cache
 from django.core.mail import send_mail
-from django.db.models import Max, Min, Q
+from django.db import transaction
+from django.db.models import Max
 from django.http import Http404, HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from urllib.parse import parse_qs
-from django.utils import timezone
 from django.views import View
 from django.views.generic import DetailView, ListView
 
+from config import ratelimit
+from config.conditional import ConditionalGetMixin, latest
 from dealers.models import DealerProfile
 
-from .captcha import get_field_name as get_captcha_field_name, get_provider as get_captcha_provider, get_site_key as get_captcha_site_key, verify_captcha
-from .emails import send_inquiry_notification
+from .captcha import get_field_name as get_captcha_field_name
+from .captcha import get_provider as get_captcha_provider
+from .captcha import get_site_key as get_captcha_site_key
+from .captcha import verify_captcha
+from .facets import facet_version, get_catalogue_options, get_facets
+from .filters import apply_listing_filters, parse_listing_filters
 from .forms import InquiryForm, SavedSearchForm
-from .models import ChargePort, Drivetrain, InquiryDeliveryStatus, InquiryEvent, Listing, Province, SavedSearch
-from .schema import dumps_vehicle_schema
-
+from .fragments import get_detail_fragments
+from .models import (
+    ChargePort,
+    Drivetrain,
+    InquiryDelivery,
+    InquiryEvent,
+    Listing,
+    Province,
+    SavedSearch,
+)
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import get_search_backend
+from .tasks import deliver_inquiry
 
 logger = logging.getLogger(__name__)
 
+
 def build_canonical_url(request: HttpRequest, path: str) -> str:
     base = getattr(settings, "SITE_BASE_URL", "").rstrip("/")
     if base:
@@ -38,7 +53,7 @@ def build_canonical_url(request: HttpRequest, path: str) -> str:
     return request.build_absolute_uri(path)
 
 
-class ListingListView(ListView):
+class ListingListView(ConditionalGetMixin, ListView):
     """Public catalogue of approved listings with lightweight filtering."""
 
     model = Listing
@@ -54,37 +69,13 @@ class ListingListView(ListView):
         )
 
         filters = self.filters
-
-        if filters["dealer"]:
-            qs = qs.filter(dealer__slug=filters["dealer"])
-        if filters["makes"]:
-            qs = qs.filter(make__in=filters["makes"])
-        if filters["provinces"]:
-            qs = qs.filter(province__in=filters["provinces"])
-        if filters["drivetrains"]:
-            qs = qs.filter(drivetrain__in=filters["drivetrains"])
-        if filters["charge_types"]:
-            qs = qs.filter(dc_fast_charge_type__in=filters["charge_types"])
-        if filters["year_min"]:
-            qs = qs.filter(year__gte=filters["year_min"])
-        if filters["year_max"]:
-            qs = qs.filter(year__lte=filters["year_max"])
-        if filters["price_min"]:
-            qs = qs.filter(price__gte=filters["price_min"])
-        if filters["price_max"]:
-            qs = qs.filter(price__lte=filters["price_max"])
+        qs = apply_listing_filters(qs, filters, skip=("query",))
 
         search_query = filters["query"]
         if search_query:
-            qs = qs.filter(
-                Q(title__icontains=search_query)
-                | Q(make__icontains=search_query)
-                | Q(model__icontains=search_query)
-                | Q(trim__icontains=search_query)
-                | Q(city__icontains=search_query)
-                | Q(province__icontains=search_query)
-                | Q(tags__icontains=search_query)
-            )
+            backend = get_search_backend()
+            qs = backend.rank(backend.filter(qs, search_query), search_query)
+            return qs.order_by("-search_rank", "-published_at", "-created_at")
 
         return qs.order_by("-published_at", "-created_at")
 
@@ -92,44 +83,24 @@ class ListingListView(ListView):
     def filters(self) -> dict[str, Any]:
         """Return normalized filter values from the query string."""
 
-        request = self.request
-
-        def as_int(value: str | None) -> int | None:
-            if not value:
-                return None
-            try:
-                return int(value)
-            except (TypeError, ValueError):
-                return None
-
-        def as_decimal(value: str | None) -> Decimal | None:
-            if not value:
-                return None
-            try:
-                return Decimal(value)
-            except (TypeError, ValueError):
-                return None
-
-        def as_list(name: str) -> list[str]:
-            values = [value.strip() for value in request.GET.getlist(name) if value]
-            if values:
-                return values
-            single = request.GET.get(name, "").strip()
-            return [single] if single else []
-
-        return {
-            "query": request.GET.get("q", "").strip(),
-            "dealer": request.GET.get("dealer", "").strip(),
-            "makes": as_list("make"),
-            "provinces": as_list("province"),
-            "drivetrains": as_list("drivetrain"),
-            "charge_types": as_list("charge_type"),
-            "year_min": as_int(request.GET.get("year_min")),
-            "year_max": as_int(request.GET.get("year_max")),
-            "price_min": as_decimal(request.GET.get("price_min")),
-            "price_max": as_decimal(request.GET.get("price_max")),
-        }
-
+        return parse_listing_filters(self.request.GET)
+
+    def get_validators(self) -> tuple[list[Any], Any]:
+        # Every status is aggregated so a listing that left the results (archived, expired or
+        # rejected, always with a new updated_at) still moves the timestamp; the facet version
+        # also changes whenever the active set does.
+        stamps = apply_listing_filters(
+            Listing.objects.order_by(), self.filters
+        ).aggregate(
+            updated=Max("updated_at"),
+            dealer_updated=Max("dealer__updated_at"),
+        )
+        last_modified = latest(*stamps.values())
+        return [
+            facet_version(),
+            self.request.get_full_path(),
+            last_modified,
+        ], last_modified
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
@@ -137,41 +108,154 @@ class ListingListView(ListView):
         context.update(
             {
                 "filters": self.filters,
+                "filter_chips": self.get_filter_chips(),
                 "filter_options": self.get_filter_options(),
-                "querystring_without_page": self.get_querystring(exclude=("page",)),
-                "querystring_without_dealer": self.get_querystring(exclude=("page", "dealer")),
+                "facets": get_facets(self.filters),
+                "querystring_without_page": self.get_querystring(
+                    exclude=("page", "cursor")
+                ),
+                "querystring_without_dealer": self.get_querystring(
+                    exclude=("page", "cursor", "dealer")
+                ),
                 "current_querystring": querystring,
             }
         )
         dealer_slug = self.filters.get("dealer")
         if dealer_slug:
-            context["selected_dealer"] = DealerProfile.objects.filter(slug=dealer_slug).first()
+            context["selected_dealer"] = DealerProfile.objects.filter(
+                slug=dealer_slug
+            ).first()
+        paginator = context.get("paginator")
+        if paginator is not None:
+            context["result_count"] = paginator.count
+            context["result_count_is_approximate"] = getattr(
+                paginator, "count_is_approximate", False
+            )
         if context.get("is_paginated"):
-            context["pagination_links"] = self.build_pagination_links(context["page_obj"])
-        context["canonical_url"] = build_canonical_url(self.request, reverse("listings:list"))
+            context["pagination_links"] = self.build_pagination_links(
+                context["page_obj"]
+            )
+            context["pagination_nav"] = self.build_pagination_nav(context["page_obj"])
+        context["canonical_url"] = build_canonical_url(
+            self.request, reverse("listings:list")
+        )
         feature_saved_searches = getattr(settings, "FEATURE_SAVED_SEARCHES", False)
         context["feature_saved_searches"] = feature_saved_searches
         if feature_saved_searches and self.request.user.is_authenticated:
             if querystring:
-                context["save_search_form"] = SavedSearchForm(initial={"querystring": querystring})
+                context["save_search_form"] = SavedSearchForm(
+                    initial={"querystring": querystring}
+                )
             else:
                 context["save_search_form"] = None
             context["saved_searches"] = list(
-                SavedSearch.objects.filter(user=self.request.user).order_by("-created_at")[:5]
+                SavedSearch.objects.filter(user=self.request.user).order_by(
+                    "-created_at"
+                )[:5]
             )
         else:
             context["save_search_form"] = None
             context["saved_searches"] = []
         return context
 
+    def get_filter_chips(self) -> list[dict[str, str]]:
+        """Return removable chips for every active query-string filter, keyword included."""
+
+        labels = {
+            "q": "Keyword",
+            "dealer": "Dealer",
+            "make": "Make",
+            "province": "Province",
+            "drivetrain": "Drivetrain",
+            "charge_type": "Charge",
+            "year_min": "From",
+            "year_max": "To",
+            "price_min": "Min $",
+            "price_max": "Max $",
+        }
+        chips: list[dict[str, str]] = []
+        for key, label in labels.items():
+            for value in self.request.GET.getlist(key):
+                value = value.strip()
+                if value:
+                    chips.append(
+                        {"key": key, "value": value, "label": f"{label}: {value}"}
+                    )
+        return chips
+
     def get_querystring(self, *, exclude: tuple[str, ...] = ()) -> str:
         params = self.request.GET.copy()
         for key in exclude:
             params.pop(key, None)
         return params.urlencode()
 
+    def paginate_queryset(
+        self, queryset: Any, page_size: int
+    ) -> tuple[Any, Any, Any, bool]:
+        """Use keyset pagination when enabled, except for relevance-ranked searches."""
+
+        if (
+            getattr(settings, "LISTING_PAGINATION", "page") != "cursor"
+            or self.filters["query"]
+        ):
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(
+            queryset,
+            page_size,
+            classic_pages=getattr(settings, "LISTING_CLASSIC_PAGE_LIMIT", 0),
+            count_limit=getattr(settings, "LISTING_APPROXIMATE_COUNT_LIMIT", 1000),
+        )
+        cursor = self.request.GET.get("cursor")
+        try:
+            if cursor:
+                page = paginator.page_from_cursor(cursor)
+            else:
+                page_number = self.request.GET.get(self.page_kwarg) or 1
+                page = paginator.page(int(page_number))
+        except (InvalidCursor, TypeError, ValueError) as exc:
+            raise Http404("Invalid page") from exc
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def build_pagination_nav(self, page_obj) -> dict[str, str | None]:
+        """Return query-string fragments for the first/previous/next/last controls."""
+
+        if getattr(page_obj, "is_keyset", False):
+            return {
+                "first": "page=1" if page_obj.has_previous() else None,
+                "previous": (
+                    page_obj.page_param(page_obj.number - 1)
+                    if page_obj.has_previous()
+                    else None
+                ),
+                "next": (
+                    page_obj.page_param(page_obj.number + 1)
+                    if page_obj.has_next()
+                    else None
+                ),
+                "last": None,
+            }
+        return {
+            "first": "page=1" if page_obj.has_previous() else None,
+            "previous": (
+                f"page={page_obj.previous_page_number()}"
+                if page_obj.has_previous()
+                else None
+            ),
+            "next": (
+                f"page={page_obj.next_page_number()}" if page_obj.has_next() else None
+            ),
+            "last": (
+                f"page={page_obj.paginator.num_pages}" if page_obj.has_next() else None
+            ),
+        }
+
     def build_pagination_links(self, page_obj) -> list[dict[str, Any]]:
-        """Return a compact list of pages with ellipses for display controls."""
+        """Return a compact list of pages with ellipses for display controls.
+
+        Keyset pages only link numbers they can reach: the classic prefix and
+        the immediate neighbours; the total comes from the approximate count.
+        """
 
         total = page_obj.paginator.num_pages
         current = page_obj.number
@@ -181,44 +265,43 @@ class ListingListView(ListView):
             pages.add(current - offset)
             pages.add(current + offset)
 
-        ordered_pages = [number for number in sorted(pages) if 1 <= number <= total]
+        is_keyset = getattr(page_obj, "is_keyset", False)
+        if is_keyset and page_obj.has_next():
+            pages.add(current + 1)
+        ordered_pages = [
+            number for number in sorted(pages) if 1 <= number <= max(total, current)
+        ]
         links: list[dict[str, Any]] = []
         previous_number: int | None = None
         for number in ordered_pages:
+            if is_keyset:
+                param = page_obj.page_param(number)
+                if param is None and number != current:
+                    continue
+            else:
+                param = f"page={number}"
             if previous_number is not None and number - previous_number > 1:
                 links.append({"is_ellipsis": True})
-            links.append({"number": number, "is_current": number == current})
+            links.append(
+                {"number": number, "is_current": number == current, "param": param}
+            )
             previous_number = number
         return links
 
     def get_filter_options(self) -> dict[str, list[tuple[str, str]] | list[str]]:
         """Collect options for select inputs."""
 
-        qs = Listing.objects.active()
-        makes = (
-            qs.exclude(make="")
-            .values_list("make", flat=True)
-            .order_by("make")
-            .distinct()
-        )
-        years = (
-            qs.exclude(year__isnull=True)
-            .values_list("year", flat=True)
-            .order_by("-year")
-            .distinct()
-        )
-        prices = qs.aggregate(min=Min("price"), max=Max("price"))
+        options = get_catalogue_options()
         return {
-            "makes": list(makes),
+            "makes": options["makes"],
             "provinces": Province.choices,
             "drivetrains": Drivetrain.choices,
             "charge_types": ChargePort.choices,
-            "years": list(years),
-            "prices": prices,
+            "years": options["years"],
+            "prices": options["prices"],
         }
 
 
-
 class SavedSearchDeleteView(LoginRequiredMixin, View):
     """Delete a saved search owned by the authenticated user."""
 
@@ -227,15 +310,20 @@ class SavedSearchDeleteView(LoginRequiredMixin, View):
             raise Http404()
         return super().dispatch(request, *args, **kwargs)
 
-    def post(self, request: HttpRequest, pk: int, *args: Any, **kwargs: Any) -> HttpResponse:
-        redirect_to = request.POST.get("next") or request.META.get("HTTP_REFERER") or reverse("listings:list")
+    def post(
+        self, request: HttpRequest, pk: int, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        redirect_to = (
+            request.POST.get("next")
+            or request.META.get("HTTP_REFERER")
+            or reverse("listings:list")
+        )
         saved = get_object_or_404(SavedSearch, pk=pk, user=request.user)
         saved.delete()
         messages.success(request, "Removed the saved search.")
         return redirect(redirect_to)
 
 
-
 class SavedSearchCreateView(LoginRequiredMixin, View):
     """Persist the current filter set for the authenticated user."""
 
@@ -246,9 +334,25 @@ class SavedSearchCreateView(LoginRequiredMixin, View):
 
     def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         form = SavedSearchForm(request.POST)
-        redirect_to = request.POST.get("next") or request.META.get("HTTP_REFERER") or reverse("listings:list")
+        redirect_to = (
+            request.POST.get("next")
+            or request.META.get("HTTP_REFERER")
+            or reverse("listings:list")
+        )
+        if not ratelimit.hit_rate(
+            "saved-search",
+            request.user.pk,
+            getattr(settings, "SAVED_SEARCH_RATE_LIMIT", "20/1h"),
+        ).allowed:
+            messages.error(
+                request, "You're saving searches too quickly. Please try again later."
+            )
+            return redirect(redirect_to)
         if not form.is_valid():
-            messages.error(request, "Unable to save search. Please provide a name or adjust your filters.")
+            messages.error(
+                request,
+                "Unable to save search. Please provide a name or adjust your filters.",
+            )
             return redirect(redirect_to)
 
         querystring = form.cleaned_data["querystring"]
@@ -302,8 +406,7 @@ class SavedSearchCreateView(LoginRequiredMixin, View):
         return " | ".join(pieces) if pieces else "Custom search"
 
 
-
-class ListingDetailView(DetailView):
+class ListingDetailView(ConditionalGetMixin, DetailView):
     """Public listing detail page."""
 
     model = Listing
@@ -311,7 +414,21 @@ class ListingDetailView(DetailView):
     context_object_name = "listing"
 
     def get_queryset(self) -> Any:
-        return Listing.objects.active().select_related("dealer", "spec", "seller").prefetch_related("photos")
+        # Photos are only loaded when the cached detail fragments need re-rendering.
+        return Listing.objects.active().select_related("dealer", "spec", "seller")
+
+    def get_object(self, queryset: Any = None) -> Listing:
+        # Fetched once for both the validators and the render.
+        if not hasattr(self, "_listing"):
+            self._listing = super().get_object(queryset)
+        return self._listing
+
+    def get_validators(self) -> tuple[list[Any], Any]:
+        listing = self.get_object()
+        dealer_updated = listing.dealer.updated_at if listing.dealer_id else None
+        return [listing.pk, listing.updated_at, dealer_updated], latest(
+            listing.updated_at, dealer_updated
+        )
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
@@ -323,57 +440,91 @@ class ListingDetailView(DetailView):
         initial: dict[str, str] = {}
         user = self.request.user
         if user.is_authenticated:
-            full_name = user.get_full_name().strip() if hasattr(user, "get_full_name") else ""
+            full_name = (
+                user.get_full_name().strip() if hasattr(user, "get_full_name") else ""
+            )
             if full_name:
                 initial["name"] = full_name
             if getattr(user, "email", None):
                 initial.setdefault("name", user.email)
                 initial["email"] = user.email
         context["inquiry_form"] = InquiryForm(initial=initial)
-        context["vehicle_schema_json"] = dumps_vehicle_schema(listing, self.request)
-        context["canonical_url"] = build_canonical_url(self.request, reverse("listings:detail", args=[listing.slug]))
+        context.update(get_detail_fragments(listing, self.request))
+        context["canonical_url"] = build_canonical_url(
+            self.request, reverse("listings:detail", args=[listing.slug])
+        )
         context["captcha_provider"] = get_captcha_provider()
         context["captcha_site_key"] = get_captcha_site_key()
         context["captcha_field_name"] = get_captcha_field_name()
         return context
 
+
 class ListingInquiryView(View):
     """Handle public inquiries for a listing with HTMX support."""
 
     template_form = "listings/partials/inquiry_form.html"
     template_success = "listings/partials/inquiry_success.html"
 
-    def post(self, request: HttpRequest, slug: str, *args: Any, **kwargs: Any) -> HttpResponse:
+    def post(
+        self, request: HttpRequest, slug: str, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
         listing = get_object_or_404(
             Listing.objects.active().select_related("seller", "dealer"),
             slug=slug,
         )
         form = InquiryForm(request.POST)
         remote_ip = self._get_client_ip(request)
-        if self._is_rate_limited(listing, remote_ip):
+        limited = ratelimit.hit(
+            "inquiry",
+            f"{listing.pk}:{remote_ip}",
+            limit=(
+                int(getattr(settings, "INQUIRY_RATE_LIMIT_PER_MINUTE", 0) or 0)
+                if remote_ip
+                else 0
+            ),
+            window=60,
+        )
+        if not limited.allowed:
             error_message = "Too many inquiries from your network. Please wait a minute and try again."
             form.add_error(None, error_message)
             if not request.headers.get("HX-Request"):
                 messages.error(request, error_message)
-            return self._render_form(request, listing, form, status=HTTPStatus.TOO_MANY_REQUESTS)
+            response = self._render_form(
+                request, listing, form, status=HTTPStatus.TOO_MANY_REQUESTS
+            )
+            response["Retry-After"] = str(limited.retry_after)
+            return response
 
         if form.is_valid():
             captcha_token = self._extract_captcha_token(request)
-            captcha_ok, captcha_error, captcha_payload = verify_captcha(captcha_token, remote_ip)
+            captcha_ok, captcha_error, captcha_payload = verify_captcha(
+                captcha_token, remote_ip
+            )
             if not captcha_ok:
-                message_text = captcha_error or "Captcha verification failed. Please try again."
+                message_text = (
+                    captcha_error or "Captcha verification failed. Please try again."
+                )
                 form.add_error(None, message_text)
                 if not request.headers.get("HX-Request"):
                     messages.error(request, message_text)
-                return self._render_form(request, listing, form, status=HTTPStatus.UNPROCESSABLE_ENTITY)
+                return self._render_form(
+                    request, listing, form, status=HTTPStatus.UNPROCESSABLE_ENTITY
+                )
 
             inquiry = form.save(commit=False)
             inquiry.listing = listing
             metadata = inquiry.metadata or {}
-            captcha_metadata: dict[str, Any] = {"provider": get_captcha_provider(), "verified": captcha_ok}
+            captcha_metadata: dict[str, Any] = {
+                "provider": get_captcha_provider(),
+                "verified": captcha_ok,
+            }
             if captcha_payload:
                 allowed_keys = {"action", "score", "hostname", "challenge_ts"}
-                details = {key: captcha_payload.get(key) for key in allowed_keys if key in captcha_payload}
+                details = {
+                    key: captcha_payload.get(key)
+                    for key in allowed_keys
+                    if key in captcha_payload
+                }
                 if details:
                     captcha_metadata["details"] = details
             metadata.update(
@@ -386,48 +537,22 @@ class ListingInquiryView(View):
                 }
             )
             inquiry.metadata = metadata
-            inquiry.save()
-            self._increment_rate_limit(listing, remote_ip)
-
-            InquiryEvent.objects.create(
-                inquiry=inquiry,
-                event_type=InquiryEvent.EventType.CREATED,
-                message="Inquiry submitted from public listing detail page.",
-                metadata={
-                    "source": "public_detail",
-                    "remote_addr": remote_ip,
-                    "user_agent": request.META.get("HTTP_USER_AGENT"),
-                    "captcha": captcha_metadata,
-                },
-            )
-
-            send_success, delivery_data = send_inquiry_notification(inquiry)
-            now_ts = timezone.now()
-            inquiry.last_attempted_at = now_ts
-            inquiry.delivery_reference = str(delivery_data.get("message_id") or delivery_data.get("backend") or "")
-            update_fields = ["delivery_status", "delivery_reference", "delivery_error", "last_attempted_at", "updated_at"]
-            if send_success:
-                inquiry.delivery_status = InquiryDeliveryStatus.SENT
-                inquiry.delivery_error = ""
-                inquiry.delivered_at = now_ts
-                update_fields.append("delivered_at")
+            with transaction.atomic():
+                inquiry.save()
                 InquiryEvent.objects.create(
                     inquiry=inquiry,
-                    event_type=InquiryEvent.EventType.EMAIL_SENT,
-                    message="Inquiry email delivered to seller.",
-                    metadata=delivery_data,
+                    event_type=InquiryEvent.EventType.CREATED,
+                    message="Inquiry submitted from public listing detail page.",
+                    metadata={
+                        "source": "public_detail",
+                        "remote_addr": remote_ip,
+                        "user_agent": request.META.get("HTTP_USER_AGENT"),
+                        "captcha": captcha_metadata,
+                    },
                 )
-            else:
-                inquiry.delivery_status = InquiryDeliveryStatus.FAILED
-                inquiry.delivery_error = str(delivery_data.get("error") or "Unable to deliver inquiry email.")
-                InquiryEvent.objects.create(
-                    inquiry=inquiry,
-                    event_type=InquiryEvent.EventType.EMAIL_FAILED,
-                    message="Inquiry email delivery failed.",
-                    metadata=delivery_data,
-                )
-            inquiry.save(update_fields=update_fields)
-
+                delivery = InquiryDelivery.objects.create(inquiry=inquiry)
+                # The seller email is sent by a worker; the outbox drain covers a missed enqueue.
+                transaction.on_commit(partial(self._enqueue_delivery, delivery.pk))
 
             if request.headers.get("HX-Request"):
                 return render(
@@ -445,13 +570,44 @@ class ListingInquiryView(View):
 
         if not request.headers.get("HX-Request"):
             messages.error(request, "Please correct the errors below and try again.")
-        status_code = HTTPStatus.UNPROCESSABLE_ENTITY if request.headers.get("HX-Request") else HTTPStatus.BAD_REQUEST
+        status_code = (
+            HTTPStatus.UNPROCESSABLE_ENTITY
+            if request.headers.get("HX-Request")
+            else HTTPStatus.BAD_REQUEST
+        )
         return self._render_form(request, listing, form, status=status_code)
 
-    def _render_form(self, request: HttpRequest, listing: Listing, form: InquiryForm, *, status: HTTPStatus) -> HttpResponse:
-        context = {"listing": listing, "form": form}
+    @staticmethod
+    def _enqueue_delivery(delivery_id: int) -> None:
+        try:
+            deliver_inquiry.apply_async(args=[delivery_id], retry=False)
+        except (
+            Exception
+        ) as exc:  # pragma: no cover - broker availability differs per env
+            logger.warning(
+                "Unable to enqueue inquiry delivery %s", delivery_id, exc_info=exc
+            )
+
+    def _render_form(
+        self,
+        request: HttpRequest,
+        listing: Listing,
+        form: InquiryForm,
+        *,
+        status: HTTPStatus,
+    ) -> HttpResponse:
+        context: dict[str, Any] = {"listing": listing, "form": form}
         if request.headers.get("HX-Request"):
             return render(request, self.template_form, context, status=status)
+        # Without HTMX the whole detail page is returned, so it needs the same context as ListingDetailView.
+        context["inquiry_form"] = form
+        context.update(get_detail_fragments(listing, request))
+        context["canonical_url"] = build_canonical_url(
+            request, reverse("listings:detail", args=[listing.slug])
+        )
+        context["captcha_provider"] = get_captcha_provider()
+        context["captcha_site_key"] = get_captcha_site_key()
+        context["captcha_field_name"] = get_captcha_field_name()
         return render(request, "listings/detail.html", context, status=status)
 
     def _get_client_ip(self, request: HttpRequest) -> str | None:
@@ -463,39 +619,6 @@ class ListingInquiryView(View):
                     return candidate
         return request.META.get("REMOTE_ADDR")
 
-    def _rate_limit_key(self, listing: Listing, remote_ip: str | None) -> str | None:
-        if not remote_ip:
-            return None
-        return f"inquiry-rate:{listing.pk}:{remote_ip}"
-
-    def _is_rate_limited(self, listing: Listing, remote_ip: str | None) -> bool:
-        limit = getattr(settings, "INQUIRY_RATE_LIMIT_PER_MINUTE", 0)
-        try:
-            limit_value = int(limit)
-        except (TypeError, ValueError):
-            limit_value = 0
-        if limit_value <= 0:
-            return False
-        cache_key = self._rate_limit_key(listing, remote_ip)
-        if not cache_key:
-            return False
-        attempts = cache.get(cache_key, 0) or 0
-        try:
-            attempts_int = int(attempts)
-        except (TypeError, ValueError):
-            attempts_int = 0
-        return attempts_int >= limit_value
-
-    def _increment_rate_limit(self, listing: Listing, remote_ip: str | None) -> None:
-        cache_key = self._rate_limit_key(listing, remote_ip)
-        if not cache_key:
-            return
-        try:
-            current = int(cache.get(cache_key, 0) or 0)
-        except (TypeError, ValueError):
-            current = 0
-        cache.set(cache_key, current + 1, timeout=60)
-
     def _extract_captcha_token(self, request: HttpRequest) -> str | None:
         field_name = get_captcha_field_name()
         tokens: list[str] = []
@@ -507,7 +630,3 @@ class ListingInquiryView(View):
         if fallback:
             tokens.append(fallback)
         return tokens[0] if tokens else None
-
-
-
-